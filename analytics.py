@@ -0,0 +1,313 @@
+"""
+훈련 부하/추세 분석 (/api/analytics/*)
+
+필요한 컬럼을 쿼리 한 번으로 읽어 NumPy 배열로 옮긴 뒤, 날짜별 루프 대신 배열 연산으로 계산한다.
+- 훈련 부하: 일일 집계(DailyRollup)를 날짜 인덱스 배열에 펼치고 누적합 차이로 7일/28일 이동 평균과
+  급성:만성 부하 비율(ACWR = 7일 평균 / 28일 평균)을 구한다.
+- 부위별 주간 볼륨: 기록별 (주 번호, 부위) 칸에 세트 × 횟수 × 무게를 bincount로 더한다.
+  기간이 보관된 달(archive.py)에 걸치면 보관된 기록도 더한다.
+- 몸무게 추세: 같은 날 기록은 평균, 기록 없는 날은 선형 보간한 뒤 이동 평균으로 다듬고
+  최근 기록의 최소제곱 기울기로 주당 변화량을 낸다.
+- 긴 기간 몸무게 시계열: LTTB(Largest-Triangle-Three-Buckets)로 요청한 점 수만큼 고르고,
+  같은 구간으로 최솟값/최댓값, 체지방률/근육량 평균, 추세선을 한 번에 구한다.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+import archive
+from models import db, DailyRollup, Exercise, WeightRecord, WorkoutRecord, WorkoutSession
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+TREND_DAYS = 28  # 주당 변화량을 구할 최근 기간
+
+LOAD_METRICS = {
+    'duration': DailyRollup.total_duration,  # 분
+    'volume': DailyRollup.volume,  # kg
+    'distance': DailyRollup.distance,  # km
+}
+
+# (상한, 이름) - 흔히 쓰는 ACWR 구간 (0.8~1.3이 적정, 1.5를 넘으면 부상 위험이 큼)
+ACWR_ZONES = ((0.8, 'low'), (1.3, 'optimal'), (1.5, 'high'), (float('inf'), 'danger'))
+
+# 몸무게 시계열 기간 이름 → 일 수 (None은 전체 기간)
+WEIGHT_RANGES = {'30d': 30, '90d': 90, '180d': 180, '1y': 365, '2y': 730, 'all': None}
+
+
+def _day_index(dates, start):
+    """날짜 목록 → start부터 며칠째인지 (정수 배열)"""
+    # date 객체 목록을 datetime64로 바꾸는 것보다 서수(toordinal)로 빼는 편이 훨씬 빠르다
+    return np.fromiter((day.toordinal() for day in dates), dtype=np.int64, count=len(dates)) - start.toordinal()
+
+
+def _dates(start, days):
+    return [(start + timedelta(days=i)).isoformat() for i in range(days)]
+
+
+def to_list(values, digits=2):
+    """JSON으로 보낼 목록 (NaN은 None)"""
+    rounded = np.round(values, digits)
+    return [None if v != v else v for v in rounded.tolist()]
+
+
+def rolling_mean(values, window):
+    """뒤쪽 window일 이동 평균 (앞부분은 없는 날을 0으로 보고 window로 나눔)"""
+    sums = np.cumsum(values, dtype=np.float64)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums / window
+
+
+def daily_series(user_id, start, end, metric='duration'):
+    """start~end 날짜별 값 배열 (운동하지 않은 날은 0)"""
+    column = LOAD_METRICS[metric]
+    rows = db.session.query(DailyRollup.date, column).filter(
+        DailyRollup.user_id == user_id,
+        DailyRollup.date >= start,
+        DailyRollup.date <= end
+    ).all()
+    values = np.zeros((end - start).days + 1)
+    if rows:
+        dates, amounts = zip(*rows)
+        values[_day_index(dates, start)] = amounts
+    return values
+
+
+def acwr_zone(ratio):
+    if ratio is None:
+        return None
+    return next(name for limit, name in ACWR_ZONES if ratio < limit)
+
+
+def training_load(user_id, start, end, metric='duration'):
+    """날짜별 부하, 7일/28일 이동 평균, ACWR
+
+    첫날부터 28일 창이 다 차도록 start보다 27일 앞에서부터 읽는다.
+    """
+    warmup = CHRONIC_DAYS - 1
+    values = daily_series(user_id, start - timedelta(days=warmup), end, metric)
+    acute = rolling_mean(values, ACUTE_DAYS)[warmup:]
+    chronic = rolling_mean(values, CHRONIC_DAYS)[warmup:]
+    ratio = np.divide(acute, chronic, out=np.full_like(acute, np.nan), where=chronic > 0)
+
+    latest = to_list(ratio[-1:])[0]
+    return {
+        'metric': metric,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'dates': _dates(start, len(acute)),
+        'load': to_list(values[warmup:]),
+        'acute': to_list(acute),
+        'chronic': to_list(chronic),
+        'acwr': to_list(ratio),
+        'latest': {
+            'acute': to_list(acute[-1:])[0],
+            'chronic': to_list(chronic[-1:])[0],
+            'acwr': latest,
+            'zone': acwr_zone(latest),
+        },
+    }
+
+
+def weekly_body_part_volume(user_id, start, weeks):
+    """start(월요일)부터 weeks주 동안 부위별 주간 볼륨 (세트 × 횟수 × 무게, kg)"""
+    end = start + timedelta(days=weeks * 7 - 1)
+    rows = db.session.query(
+        WorkoutSession.date, Exercise.body_part, WorkoutRecord.sets, WorkoutRecord.reps, WorkoutRecord.weight
+    ).join(WorkoutSession, WorkoutRecord.session_id == WorkoutSession.id).join(
+        Exercise, WorkoutRecord.exercise_id == Exercise.id
+    ).filter(
+        WorkoutSession.user_id == user_id,
+        WorkoutSession.date >= start,
+        WorkoutSession.date <= end
+    ).all()
+    for session in archive.with_exercises(archive.sessions(user_id, start, end)):
+        rows.extend(
+            (session.date, record.body_part, record.sets, record.reps, record.weight)
+            for record in session.records if record.exercise is not None
+        )
+
+    body_parts = {}
+    if rows:
+        dates, parts, sets, reps, weights = zip(*rows)
+        volume = np.nan_to_num(np.array(sets, dtype=np.float64)) \
+            * np.nan_to_num(np.array(reps, dtype=np.float64)) \
+            * np.nan_to_num(np.array(weights, dtype=np.float64))
+        week = _day_index(dates, start) // 7
+        names, part = np.unique(np.array(parts), return_inverse=True)
+        totals = np.bincount(part * weeks + week, weights=volume, minlength=len(names) * weeks)
+        body_parts = {
+            name: to_list(row, 1) for name, row in zip(names.tolist(), totals.reshape(len(names), weeks))
+        }
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'weeks': _dates(start, weeks * 7)[::7],
+        'body_parts': body_parts,
+    }
+
+
+def _daily_means(index, values, days):
+    """날짜 인덱스별 평균 (기록 없는 날은 NaN)"""
+    counts = np.bincount(index, minlength=days)
+    sums = np.bincount(index, weights=values, minlength=days)
+    means = np.full(days, np.nan)
+    has_value = counts > 0
+    means[has_value] = sums[has_value] / counts[has_value]
+    return means
+
+
+def _smooth(observed, window):
+    """기록 없는 날을 선형 보간하고 뒤쪽 window일 이동 평균으로 다듬는다
+
+    첫 기록 전이나 마지막 기록 뒤는 NaN으로 두고, 창의 앞부분이 첫 기록 전이면 있는 날만 평균한다.
+    """
+    days = len(observed)
+    smoothed = np.full(days, np.nan)
+    measured = np.flatnonzero(~np.isnan(observed))
+    if len(measured):
+        covered = (np.arange(days) >= measured[0]) & (np.arange(days) <= measured[-1])
+        filled = np.where(covered, np.interp(np.arange(days), measured, observed[measured]), 0.0)
+        totals = rolling_mean(filled, window)
+        coverage = rolling_mean(covered.astype(np.float64), window)
+        np.divide(totals, coverage, out=smoothed, where=covered)
+    return smoothed
+
+
+def weight_trend(user_id, start, end, window=7):
+    """날짜별 몸무게(같은 날은 평균), 이동 평균으로 다듬은 추세, 최근 주당 변화량
+
+    기록이 없는 날은 앞뒤 기록 사이를 선형 보간하고, 첫 기록 전이나 마지막 기록 뒤는 비워 둔다.
+    """
+    warmup = window - 1
+    first = start - timedelta(days=warmup)
+    rows = db.session.query(WeightRecord.date, WeightRecord.weight).filter(
+        WeightRecord.user_id == user_id,
+        WeightRecord.date >= first,
+        WeightRecord.date <= end
+    ).all()
+
+    days = (end - first).days + 1
+    observed = np.full(days, np.nan)
+    smoothed = np.full(days, np.nan)
+    per_week = None
+    if rows:
+        dates, weights = zip(*rows)
+        observed = _daily_means(_day_index(dates, first), np.array(weights, dtype=np.float64), days)
+        smoothed = _smooth(observed, window)
+
+        measured = np.flatnonzero(~np.isnan(observed))
+        recent = measured[measured >= days - TREND_DAYS]
+        if len(recent) >= 2:
+            per_week = round(float(np.polyfit(recent, observed[recent], 1)[0]) * 7, 3)
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'window': window,
+        'dates': _dates(start, days - warmup),
+        'weights': to_list(observed[warmup:]),
+        'smoothed': to_list(smoothed[warmup:]),
+        'trend_kg_per_week': per_week,
+    }
+
+
+def lttb_buckets(count, points):
+    """LTTB 구간 경계 (첫 점과 마지막 점은 각자 한 구간, 나머지는 points - 2개로 고르게 나눔)"""
+    if count <= points:
+        return np.arange(count + 1)
+    inner = np.arange(points - 1, dtype=np.int64) * (count - 2) // (points - 2) + 1
+    return np.concatenate(([0], inner, [count]))
+
+
+def lttb(x, y, edges):
+    """Largest-Triangle-Three-Buckets: 구간마다 (앞에서 고른 점, 다음 구간 평균)과 가장 큰 삼각형을
+    이루는 점을 골라 선의 모양을 살리며 점 수를 줄인다. 고른 점의 인덱스 배열을 돌려준다.
+    """
+    buckets = len(edges) - 1
+    if buckets == len(x):
+        return np.arange(len(x))
+    selected = np.empty(buckets, dtype=np.int64)
+    selected[0], selected[-1] = 0, len(x) - 1
+    previous = 0
+    for i in range(1, buckets - 1):
+        start, stop = edges[i], edges[i + 1]
+        next_x = x[stop:edges[i + 2]].mean()
+        next_y = y[stop:edges[i + 2]].mean()
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i] = previous
+    return selected
+
+
+def _bucket_means(values, edges):
+    """구간별 평균 (NaN은 빼고, 값이 하나도 없는 구간은 NaN)"""
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0.0), edges[:-1])
+    counts = np.add.reduceat(present.astype(np.int64), edges[:-1])
+    return np.divide(sums, counts, out=np.full(len(sums), np.nan), where=counts > 0)
+
+
+def weight_series(user_id, end, days=None, points=200, window=7):
+    """end까지 days일(None이면 전체 기간) 몸무게 시계열을 points개 이하로 줄인다
+
+    몸무게는 LTTB로 고른 점과 같은 구간의 최솟값/최댓값, 체지방률과 근육량은 같은 구간의 평균이다.
+    추세선은 날짜별 평균을 보간해 window일 이동 평균한 값이다 (weight_trend와 같은 방식).
+    하루에 여러 번 잰 기록은 그날 안에서 기록 순서대로 고르게 펼쳐 놓는다.
+    """
+    warmup = window - 1
+    query = db.session.query(
+        WeightRecord.date, WeightRecord.weight, WeightRecord.body_fat_percentage, WeightRecord.muscle_mass
+    ).filter(WeightRecord.user_id == user_id, WeightRecord.date <= end)
+    if days is not None:
+        query = query.filter(WeightRecord.date >= end - timedelta(days=days - 1 + warmup))
+    rows = query.order_by(WeightRecord.date, WeightRecord.id).all()
+
+    start = end - timedelta(days=days - 1) if days is not None else (rows[0].date if rows else end)
+    first = min(start - timedelta(days=warmup), rows[0].date if rows else end)
+    result = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'window': window,
+        'total': 0,
+        'dates': [], 'weights': [], 'weight_low': [], 'weight_high': [], 'trend': [],
+        'body_fat': [], 'muscle_mass': [],
+    }
+    if not rows:
+        return result
+
+    dates, weights, body_fat, muscle = zip(*rows)
+    index = _day_index(dates, first)
+    weights = np.array(weights, dtype=np.float64)
+    trend = _smooth(_daily_means(index, weights, (end - first).days + 1), window)
+
+    # 앞쪽 warmup일은 추세선 계산에만 쓴다
+    shown = index >= (start - first).days
+    index, weights = index[shown], weights[shown]
+    body_fat = np.array(body_fat, dtype=np.float64)[shown]  # None → NaN
+    muscle = np.array(muscle, dtype=np.float64)[shown]
+    if not len(index):
+        return result
+
+    # x: 날짜 + 그날 안에서의 순서
+    day_start = np.searchsorted(index, index, side='left')
+    per_day = np.bincount(index)[index]
+    x = index + (np.arange(len(index)) - day_start) / per_day
+
+    edges = lttb_buckets(len(x), points)
+    selected = lttb(x, weights, edges)
+    result.update(
+        total=len(x),
+        dates=(np.datetime64(first, 'D') + index[selected]).astype(str).tolist(),
+        weights=to_list(weights[selected]),
+        weight_low=to_list(np.minimum.reduceat(weights, edges[:-1])),
+        weight_high=to_list(np.maximum.reduceat(weights, edges[:-1])),
+        trend=to_list(trend[index[selected]]),
+        body_fat=to_list(_bucket_means(body_fat, edges)),
+        muscle_mass=to_list(_bucket_means(muscle, edges)),
+    )
+    return result
@@ -1,134 +1,134 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, Response, abort, current_app, render_template, request, jsonify, redirect, url_for, flash, send_from_directory, stream_with_context
 from datetime import datetime, timedelta, date
-from sqlalchemy import func, extract
+from sqlalchemy import func, extract, cast, String
+from sqlalchemy.exc import IntegrityError
 import json
+import os
+import click
 
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///fitness_tracker.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-
-# 데이터베이스 모델
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(80), unique=True, nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class Exercise(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    body_part = db.Column(db.String(50), nullable=False)
-    difficulty = db.Column(db.String(20), nullable=False)
-    description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class WorkoutSession(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
-    start_time = db.Column(db.DateTime)
-    end_time = db.Column(db.DateTime)
-    total_duration = db.Column(db.Integer)  # 분 단위
-    notes = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class WorkoutRecord(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey('workout_session.id'), nullable=False)
-    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), nullable=False)
-    sets = db.Column(db.Integer, nullable=False)
-    reps = db.Column(db.Integer, nullable=False)
-    weight = db.Column(db.Float)
-    duration = db.Column(db.Integer)  # 분 단위
-    distance = db.Column(db.Float)  # km 단위 (유산소 운동용)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # 관계 설정
-    exercise = db.relationship('Exercise', backref='records')
-    session = db.relationship('WorkoutSession', backref='records')
-
-class Goal(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    title = db.Column(db.String(100), nullable=False)
-    description = db.Column(db.Text)
-    target_value = db.Column(db.Float, nullable=False)
-    current_value = db.Column(db.Float, default=0)
-    unit = db.Column(db.String(20), nullable=False)
-    goal_type = db.Column(db.String(50), nullable=False)  # weekly, monthly, yearly
-    target_date = db.Column(db.Date)
-    is_achieved = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-class WeightRecord(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    weight = db.Column(db.Float, nullable=False)  # kg 단위
-    date = db.Column(db.Date, nullable=False)
-    body_fat_percentage = db.Column(db.Float)  # 체지방률 (선택사항)
-    muscle_mass = db.Column(db.Float)  # 근육량 (선택사항)
-    notes = db.Column(db.Text)  # 메모
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # 관계 설정
-    user = db.relationship('User', backref='weight_records')
+from models import db, User, Exercise, WorkoutSession, WorkoutRecord, Goal, WeightRecord, ImportJob, BackgroundJob, PersonalRecord, eager_records
+from instrumentation import query_budget
+from pagination import paginate, paginate_desc, decode_cursor
+from history import iter_session_batches, session_records, session_to_dict
+import analytics
+import archive
+import instrumentation
+import migrations
+import rollups
+import cache
+import changes
+import importer
+import exercise_search
+import exporter
+import goal_engine
+import jobs
+import prs
+import serialization
+import sync
+import tenancy
+import workout_edits
+from cache import cached_response
+from stats import compute_dashboard_stats
+from tenancy import current_user_id
+
+# 라우트와 CLI 명령은 블루프린트에 등록하고, 앱은 run.create_app()에서 설정에 맞게 만든다
+bp = Blueprint('main', __name__, cli_group=None)
+
+def get_owned(model, id, **kwargs):
+    """현재 사용자의 행만 돌려준다 (다른 사용자의 행이면 없는 것으로 취급)"""
+    row = db.session.get(model, id, **kwargs)
+    if row is None or row.user_id != current_user_id():
+        return None
+    return row
 
 # 라우트
-@app.route('/')
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/exercises')
+@bp.route('/users/switch/<int:id>')
+def switch_user(id):
+    # 로그인 기능이 생기기 전까지 사용하는 사용자 전환 (이후 모든 화면이 이 사용자 기준)
+    # 인증 없이 아무 사용자나 될 수 있으므로 개발/테스트 설정(USER_SWITCH_ENABLED)에서만 연다
+    if not current_app.config['USER_SWITCH_ENABLED']:
+        abort(404)
+    tenancy.use_user(id)
+    user = db.session.get(User, id)
+    if not user:
+        flash('해당 사용자를 찾을 수 없습니다.', 'error')
+        return redirect(url_for('.index'))
+    tenancy.login(user.id)
+    flash(f'{user.username} 사용자로 전환했습니다.', 'success')
+    return redirect(url_for('.dashboard'))
+
+@bp.route('/exercises')
 def exercises():
     exercises = Exercise.query.all()
     return render_template('exercises.html', exercises=exercises)
 
-@app.route('/exercises/add', methods=['GET', 'POST'])
+@bp.route('/exercises/add', methods=['GET', 'POST'])
 def add_exercise():
     if request.method == 'POST':
         exercise = Exercise(
             name=request.form['name'],
             body_part=request.form['body_part'],
             difficulty=request.form['difficulty'],
-            description=request.form.get('description', '')
+            description=request.form.get('description', ''),
+            aliases=request.form.get('aliases', '')
         )
         db.session.add(exercise)
         db.session.commit()
+        cache.invalidate('exercises')
         flash('운동 종목이 성공적으로 추가되었습니다!', 'success')
-        return redirect(url_for('exercises'))
+        return redirect(url_for('.exercises'))
     return render_template('add_exercise.html')
 
-@app.route('/exercises/edit/<int:id>', methods=['GET', 'POST'])
+@bp.route('/exercises/edit/<int:id>', methods=['GET', 'POST'])
 def edit_exercise(id):
     exercise = Exercise.query.get_or_404(id)
     if request.method == 'POST':
+        if request.form['body_part'] != exercise.body_part:
+            rollups.move_exercise_body_part(exercise.id, exercise.body_part, request.form['body_part'])
         exercise.name = request.form['name']
         exercise.body_part = request.form['body_part']
         exercise.difficulty = request.form['difficulty']
         exercise.description = request.form.get('description', '')
+        exercise.aliases = request.form.get('aliases', '')
         db.session.commit()
+        cache.invalidate('exercises')
         flash('운동 종목이 성공적으로 수정되었습니다!', 'success')
-        return redirect(url_for('exercises'))
+        return redirect(url_for('.exercises'))
     return render_template('edit_exercise.html', exercise=exercise)
 
-@app.route('/exercises/delete/<int:id>')
+@bp.route('/exercises/delete/<int:id>')
 def delete_exercise(id):
     exercise = Exercise.query.get_or_404(id)
+    rollups.move_exercise_body_part(exercise.id, exercise.body_part, None)
+    prs.clear(exercise_id=exercise.id)
     db.session.delete(exercise)
     db.session.commit()
+    cache.invalidate('exercises')
     flash('운동 종목이 삭제되었습니다!', 'success')
-    return redirect(url_for('exercises'))
+    return redirect(url_for('.exercises'))
 
-@app.route('/workouts')
+@bp.route('/workouts')
+@query_budget(7)
 def workouts():
-    sessions = WorkoutSession.query.order_by(WorkoutSession.date.desc()).all()
-    return render_template('workouts.html', sessions=sessions)
+    # 운동 기록과 종목을 함께 읽어 템플릿에서 추가 쿼리가 나가지 않도록 함
+    # 페이지가 보관된 달에 닿으면 보관된 세션(읽기 전용)을 날짜 순서대로 이어 붙인다
+    # (핫 데이터만 읽는 페이지는 2~4번, 보관된 달의 이전 페이지는 핫/보관 묶음을 두 번씩 읽어 최대 7번)
+    page = paginate(
+        archive.session_fetcher(
+            WorkoutSession.query.filter_by(user_id=current_user_id()).options(eager_records()),
+            current_user_id()
+        ),
+        per_page=current_app.config.get('POSTS_PER_PAGE', 10),
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    return render_template('workouts.html', sessions=archive.fill(page.items), page=page)
 
-@app.route('/workouts/add', methods=['GET', 'POST'])
+@bp.route('/workouts/add', methods=['GET', 'POST'])
 def add_workout():
     if request.method == 'POST':
         # 안전한 숫자 변환 함수
@@ -145,7 +145,7 @@ def add_workout():
                 return default
         
         session = WorkoutSession(
-            user_id=1,  # 임시로 1번 사용자
+            user_id=current_user_id(),
             date=datetime.strptime(request.form['date'], '%Y-%m-%d').date(),
             total_duration=safe_int(request.form.get('duration')),
             notes=request.form.get('notes', '')
@@ -161,6 +161,7 @@ def add_workout():
         exercise_duration_list = request.form.getlist('exercise_duration')
         distance_list = request.form.getlist('distance')
         
+        records = []
         for i, exercise_id in enumerate(exercises):
             if exercise_id and exercise_id.strip():
                 record = WorkoutRecord(
@@ -173,20 +174,25 @@ def add_workout():
                     distance=safe_float(distance_list[i] if i < len(distance_list) else '')
                 )
                 db.session.add(record)
+                records.append(record)
         
+        rollups.add_session(session)
+        prs.add_lifts(session.user_id, prs.lifts(session, records))
         db.session.commit()
+        cache.invalidate('workouts', user_id=current_user_id())
         flash('운동 기록이 성공적으로 추가되었습니다!', 'success')
-        return redirect(url_for('workouts'))
+        return redirect(url_for('.workouts'))
     
-    exercises = Exercise.query.all()
-    return render_template('add_workout.html', exercises=exercises)
+    # 운동 종목 선택 목록은 입력에 따라 /api/exercises/search로 채움
+    return render_template('add_workout.html')
 
-@app.route('/workouts/edit/<int:id>', methods=['GET', 'POST'])
+@bp.route('/workouts/edit/<int:id>', methods=['GET', 'POST'])
+@query_budget(3)
 def edit_workout(id):
-    session = db.session.get(WorkoutSession, id)
+    session = get_owned(WorkoutSession, id, options=[eager_records()])
     if not session:
         flash('해당 운동 기록을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('workouts'))
+        return redirect(url_for('.workouts'))
     
     if request.method == 'POST':
         # 안전한 숫자 변환 함수
@@ -202,250 +208,141 @@ def edit_workout(id):
             except (ValueError, AttributeError):
                 return default
         
-        # 세션 정보 업데이트
-        session.date = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
-        session.total_duration = safe_int(request.form.get('duration'))
-        session.notes = request.form.get('notes', '')
-        
-        # 기존 운동 기록 삭제
-        WorkoutRecord.query.filter_by(session_id=session.id).delete()
-        
-        # 새로운 운동 기록 추가
+        # 제출된 기록을 기존 기록과 비교해 바뀐 행만 반영 (workout_edits.py 참고)
         exercises = request.form.getlist('exercise_id')
+        record_ids = request.form.getlist('record_id')
         sets_list = request.form.getlist('sets')
         reps_list = request.form.getlist('reps')
         weight_list = request.form.getlist('weight')
         exercise_duration_list = request.form.getlist('exercise_duration')
         distance_list = request.form.getlist('distance')
         
+        submitted = []
         for i, exercise_id in enumerate(exercises):
             if exercise_id and exercise_id.strip():
-                record = WorkoutRecord(
-                    session_id=session.id,
-                    exercise_id=safe_int(exercise_id),
-                    sets=safe_int(sets_list[i] if i < len(sets_list) else ''),
-                    reps=safe_int(reps_list[i] if i < len(reps_list) else ''),
-                    weight=safe_float(weight_list[i] if i < len(weight_list) else ''),
-                    duration=safe_int(exercise_duration_list[i] if i < len(exercise_duration_list) else ''),
-                    distance=safe_float(distance_list[i] if i < len(distance_list) else '')
-                )
-                db.session.add(record)
+                submitted.append({
+                    'id': safe_int(record_ids[i] if i < len(record_ids) else '', None),
+                    'exercise_id': safe_int(exercise_id),
+                    'sets': safe_int(sets_list[i] if i < len(sets_list) else ''),
+                    'reps': safe_int(reps_list[i] if i < len(reps_list) else ''),
+                    'weight': safe_float(weight_list[i] if i < len(weight_list) else ''),
+                    'duration': safe_int(exercise_duration_list[i] if i < len(exercise_duration_list) else ''),
+                    'distance': safe_float(distance_list[i] if i < len(distance_list) else '')
+                })
         
-        db.session.commit()
+        try:
+            edit = workout_edits.plan_records(session.records, submitted)
+        except workout_edits.EditError as e:
+            flash(str(e), 'error')
+            return redirect(url_for('.edit_workout', id=session.id))
+        edit.fields = workout_edits.plan_session(session, {
+            'date': datetime.strptime(request.form['date'], '%Y-%m-%d').date(),
+            'total_duration': safe_int(request.form.get('duration')),
+            'notes': request.form.get('notes', '')
+        })
+        if edit:
+            workout_edits.apply(session, edit)
+            db.session.commit()
+            cache.invalidate('workouts', user_id=current_user_id())
         flash('운동 기록이 성공적으로 수정되었습니다!', 'success')
-        return redirect(url_for('workouts'))
+        return redirect(url_for('.workouts'))
     
-    exercises = Exercise.query.all()
-    return render_template('edit_workout.html', session=session, exercises=exercises)
+    return render_template('edit_workout.html', session=session)
 
-@app.route('/workouts/delete/<int:id>')
+@bp.route('/workouts/delete/<int:id>')
 def delete_workout(id):
-    session = db.session.get(WorkoutSession, id)
+    session = get_owned(WorkoutSession, id)
     if not session:
         flash('해당 운동 기록을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('workouts'))
+        return redirect(url_for('.workouts'))
+    
+    rollups.remove_session(session)
+    old_lifts = prs.lifts(session, session.records)
     
-    # 관련된 운동 기록들도 함께 삭제
-    WorkoutRecord.query.filter_by(session_id=session.id).delete()
+    # 관련된 운동 기록들도 함께 삭제 (ORM으로 지워야 변경 기록에 삭제 표시가 남음)
+    for record in session.records:
+        db.session.delete(record)
     db.session.delete(session)
+    db.session.flush()
+    # 지운 기록이 세운 개인 기록이 있는 종목만 다시 계산
+    prs.apply_diff(session.user_id, old_lifts, [])
     db.session.commit()
+    cache.invalidate('workouts', user_id=current_user_id())
     
     flash('운동 기록이 삭제되었습니다!', 'success')
-    return redirect(url_for('workouts'))
+    return redirect(url_for('.workouts'))
 
-@app.route('/workouts/delete_all')
+@bp.route('/workouts/delete_all')
 def delete_all_workouts():
-    WorkoutRecord.query.delete()
-    WorkoutSession.query.delete()
+    # 현재 사용자의 운동 기록만 삭제
+    user_id = current_user_id()
+    session_ids = db.select(WorkoutSession.id).where(WorkoutSession.user_id == user_id)
+    changes.log_select(WorkoutRecord, db.select(WorkoutSession.user_id, WorkoutRecord.id).join(
+        WorkoutSession, WorkoutRecord.session_id == WorkoutSession.id
+    ).where(WorkoutSession.user_id == user_id))
+    changes.log_select(WorkoutSession, db.select(WorkoutSession.user_id, WorkoutSession.id).where(
+        WorkoutSession.user_id == user_id
+    ))
+    WorkoutRecord.query.filter(WorkoutRecord.session_id.in_(session_ids)).delete(synchronize_session=False)
+    WorkoutSession.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    archived_sessions, archived_records = archive.clear(user_id)
+    changes.log(WorkoutRecord, archived_records, user_id, op='delete')
+    changes.log(WorkoutSession, archived_sessions, user_id, op='delete')
+    rollups.clear(user_id)
+    prs.clear(user_id)
+    goal_engine.refresh(user_id=user_id)
     db.session.commit()
+    cache.invalidate('workouts', user_id=current_user_id())
     flash('모든 운동 기록이 삭제되었습니다!', 'success')
-    return redirect(url_for('workouts'))
+    return redirect(url_for('.workouts'))
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
+@query_budget(7)
 def dashboard():
-    # 통계 데이터 계산
+    # 통계 데이터 계산 (집계 쿼리 몇 번으로 모두 계산)
     today = datetime.now().date()
-    week_ago = today - timedelta(days=7)
-    month_ago = today - timedelta(days=30)
-    
-    # 주간 운동 횟수
-    weekly_sessions = WorkoutSession.query.filter(
-        WorkoutSession.date >= week_ago
-    ).count()
-    
-    # 월간 운동 횟수
-    monthly_sessions = WorkoutSession.query.filter(
-        WorkoutSession.date >= month_ago
-    ).count()
-    
-    # 총 운동 시간 (분)
-    total_duration = db.session.query(func.sum(WorkoutSession.total_duration)).scalar() or 0
-    
-    # 부위별 운동 분포
-    body_part_stats = db.session.query(
-        Exercise.body_part,
-        func.count(WorkoutRecord.id)
-    ).join(WorkoutRecord).group_by(Exercise.body_part).all()
-    
-    # 최근 7일간 운동 데이터
-    recent_sessions = db.session.query(
-        WorkoutSession.date,
-        func.count(WorkoutSession.id),
-        func.sum(WorkoutSession.total_duration)
-    ).filter(
-        WorkoutSession.date >= week_ago
-    ).group_by(WorkoutSession.date).all()
-    
-    # 목표 진행률 계산
-    goals = Goal.query.filter_by(user_id=1).all()
-    goal_progress = {}
-    
-    for goal in goals:
-        if goal.goal_type == 'weekly_workouts':
-            # 주 3회 운동 목표
-            current_week_sessions = WorkoutSession.query.filter(
-                WorkoutSession.date >= today - timedelta(days=today.weekday())
-            ).count()
-            progress = min(100, (current_week_sessions / 3) * 100)
-            goal_progress['weekly_workouts'] = round(progress, 1)
-            
-        elif goal.goal_type == 'monthly_duration':
-            # 월 운동 시간 목표
-            current_month_duration = db.session.query(func.sum(WorkoutSession.total_duration)).filter(
-                WorkoutSession.date >= today.replace(day=1)
-            ).scalar() or 0
-            progress = min(100, (current_month_duration / goal.target_value) * 100)
-            goal_progress['monthly_duration'] = round(progress, 1)
-            
-        elif goal.goal_type == 'weight_loss':
-            # 체중 감량 목표
-            latest_weight = db.session.query(WeightRecord.weight).filter_by(user_id=1).order_by(WeightRecord.date.desc()).first()
-            if latest_weight:
-                # 시작 체중을 70kg으로 가정 (실제로는 사용자 테이블에서 가져와야 함)
-                start_weight = 70.0
-                current_loss = start_weight - latest_weight[0]
-                progress = min(100, (current_loss / goal.target_value) * 100)
-                goal_progress['weight_loss'] = round(progress, 1)
-            else:
-                goal_progress['weight_loss'] = 0
-    
-    # 연속 운동일 계산
-    consecutive_days = 0
-    current_date = today
-    while True:
-        session = WorkoutSession.query.filter_by(date=current_date).first()
-        if session:
-            consecutive_days += 1
-            current_date -= timedelta(days=1)
-        else:
-            break
-    
-    # 최근 성과 계산
-    achievements = []
-    
-    # 연속 운동일 성과
-    if consecutive_days >= 7:
-        achievements.append({
-            'title': f'{consecutive_days}일 연속 운동 달성!',
-            'icon': 'bi-award',
-            'color': 'text-warning',
-            'days_ago': 0
-        })
-    elif consecutive_days >= 3:
-        achievements.append({
-            'title': f'{consecutive_days}일 연속 운동 중!',
-            'icon': 'bi-fire',
-            'color': 'text-danger',
-            'days_ago': 0
-        })
-    
-    # 월간 운동 횟수 성과
-    if monthly_sessions >= 20:
-        achievements.append({
-            'title': f'이번 달 운동 {monthly_sessions}회 달성',
-            'icon': 'bi-calendar-check',
-            'color': 'text-primary',
-            'days_ago': 0
-        })
-    elif monthly_sessions >= 10:
-        achievements.append({
-            'title': f'이번 달 운동 {monthly_sessions}회 진행 중',
-            'icon': 'bi-calendar-check',
-            'color': 'text-info',
-            'days_ago': 0
-        })
-    
-    # 개인 기록 갱신 (가장 최근 운동의 무게 기록)
-    latest_record = db.session.query(WorkoutRecord).join(Exercise).filter(
-        WorkoutRecord.weight > 0
-    ).order_by(WorkoutRecord.created_at.desc()).first()
-    
-    if latest_record:
-        achievements.append({
-            'title': f'{latest_record.exercise.name} 개인기록 갱신',
-            'icon': 'bi-graph-up',
-            'color': 'text-success',
-            'days_ago': (today - latest_record.created_at.date()).days
-        })
-    
-    # 히트맵 데이터 계산 (최근 3개월)
-    heatmap_data = []
-    for i in range(90):  # 90일
-        check_date = today - timedelta(days=i)
-        sessions = WorkoutSession.query.filter_by(date=check_date).all()
-        
-        if sessions:
-            # 해당 날짜의 운동 강도 계산 (운동 횟수 + 총 시간 기반)
-            intensity = len(sessions) + (sum(s.total_duration for s in sessions) // 30)  # 30분당 1 강도
-            intensity = min(5, intensity)  # 최대 5
-        else:
-            intensity = 0
-        
-        heatmap_data.append({
-            'date': check_date,
-            'intensity': intensity
-        })
-    
-    return render_template('dashboard.html',
-                         weekly_sessions=weekly_sessions,
-                         monthly_sessions=monthly_sessions,
-                         total_duration=total_duration,
-                         body_part_stats=body_part_stats,
-                         recent_sessions=recent_sessions,
-                         goal_progress=goal_progress,
-                         consecutive_days=consecutive_days,
-                         achievements=achievements,
-                         heatmap_data=heatmap_data)
-
-@app.route('/goals')
+    stats = compute_dashboard_stats(today, user_id=current_user_id())
+    goal_engine.commit_rollovers()  # 기간이 바뀐 목표를 새 기간으로 넘긴 경우에만 저장 (goal_engine.load)
+    return render_template('dashboard.html', **stats)
+
+def goal_metric():
+    """목표 폼의 측정 방법 (모르는 값이면 직접 입력)"""
+    metric = request.form.get('metric', 'manual')
+    return metric if metric in goal_engine.METRICS else 'manual'
+
+@bp.route('/goals')
 def goals():
-    goals = Goal.query.filter_by(user_id=1).all()  # 임시로 1번 사용자
-    return render_template('goals.html', goals=goals)
+    # 진행률은 운동/몸무게 기록을 쓸 때 갱신해 둔 값을 읽는다 (goal_engine.py)
+    goals = goal_engine.load(current_user_id(), datetime.now().date())
+    goal_engine.commit_rollovers()
+    return render_template('goals.html', goals=goals, metrics=goal_engine.METRICS, periods=goal_engine.PERIODS)
 
-@app.route('/goals/add', methods=['GET', 'POST'])
+@bp.route('/goals/add', methods=['GET', 'POST'])
 def add_goal():
     if request.method == 'POST':
         goal = Goal(
-            user_id=1,  # 임시로 1번 사용자
+            user_id=current_user_id(),
             title=request.form['title'],
             description=request.form.get('description', ''),
             target_value=float(request.form['target_value']),
             unit=request.form['unit'],
             goal_type=request.form['goal_type'],
+            metric=goal_metric(),
             target_date=datetime.strptime(request.form['target_date'], '%Y-%m-%d').date()
         )
+        goal_engine.recompute(goal)
         db.session.add(goal)
         db.session.commit()
         flash('목표가 성공적으로 추가되었습니다!', 'success')
-        return redirect(url_for('goals'))
-    return render_template('add_goal.html')
+        return redirect(url_for('.goals'))
+    return render_template('add_goal.html', metrics=goal_engine.METRICS)
 
-@app.route('/goals/edit/<int:id>', methods=['GET', 'POST'])
+@bp.route('/goals/edit/<int:id>', methods=['GET', 'POST'])
 def edit_goal(id):
-    goal = db.session.get(Goal, id)
+    goal = get_owned(Goal, id)
     if not goal:
         flash('해당 목표를 찾을 수 없습니다.', 'error')
-        return redirect(url_for('goals'))
+        return redirect(url_for('.goals'))
     
     if request.method == 'POST':
         goal.title = request.form['title']
@@ -453,92 +350,129 @@ def edit_goal(id):
         goal.target_value = float(request.form['target_value'])
         goal.unit = request.form['unit']
         goal.goal_type = request.form['goal_type']
+        goal.metric = goal_metric()
         goal.target_date = datetime.strptime(request.form['target_date'], '%Y-%m-%d').date()
+        goal_engine.recompute(goal)
+        if goal.metric == 'manual':
+            goal_engine.set_progress(goal, goal.current_value or 0)  # 목표값이 바뀌었을 수 있음
         
         db.session.commit()
         flash('목표가 성공적으로 수정되었습니다!', 'success')
-        return redirect(url_for('goals'))
+        return redirect(url_for('.goals'))
     
-    return render_template('edit_goal.html', goal=goal)
+    return render_template('edit_goal.html', goal=goal, metrics=goal_engine.METRICS)
 
-@app.route('/goals/delete/<int:id>')
+@bp.route('/goals/delete/<int:id>')
 def delete_goal(id):
-    goal = db.session.get(Goal, id)
+    goal = get_owned(Goal, id)
     if not goal:
         flash('해당 목표를 찾을 수 없습니다.', 'error')
-        return redirect(url_for('goals'))
+        return redirect(url_for('.goals'))
     
     db.session.delete(goal)
     db.session.commit()
     flash('목표가 삭제되었습니다!', 'success')
-    return redirect(url_for('goals'))
+    return redirect(url_for('.goals'))
 
-@app.route('/goals/update-progress/<int:id>', methods=['POST'])
+@bp.route('/goals/update-progress/<int:id>', methods=['POST'])
 def update_goal_progress(id):
-    goal = db.session.get(Goal, id)
+    goal = get_owned(Goal, id)
     if not goal:
         flash('해당 목표를 찾을 수 없습니다.', 'error')
-        return redirect(url_for('goals'))
-    
-    new_value = float(request.form.get('current_value', 0))
-    goal.current_value = new_value
+        return redirect(url_for('.goals'))
     
-    # 목표 달성 여부 확인
-    if new_value >= goal.target_value:
-        goal.is_achieved = True
+    if goal.metric != 'manual':
+        flash('기록에서 자동으로 계산되는 목표입니다.', 'error')
+        return redirect(url_for('.goals'))
     
+    # 목표 달성 여부도 함께 갱신
+    goal_engine.set_progress(goal, float(request.form.get('current_value', 0)))
     db.session.commit()
     flash('진행률이 업데이트되었습니다!', 'success')
-    return redirect(url_for('goals'))
+    return redirect(url_for('.goals'))
 
-@app.route('/calendar')
+@bp.route('/calendar')
 def calendar():
-    # 달력용 운동 세션 데이터
-    sessions = WorkoutSession.query.all()
-    calendar_data = {}
-    for session in sessions:
-        date_str = session.date.strftime('%Y-%m-%d')
-        if date_str not in calendar_data:
-            calendar_data[date_str] = []
-        calendar_data[date_str].append({
-            'id': session.id,
-            'duration': session.total_duration,
-            'notes': session.notes
-        })
-    
-    return render_template('calendar.html', calendar_data=json.dumps(calendar_data))
+    # 달력 데이터는 /api/calendar에서 월 단위로 불러온다
+    return render_template('calendar.html')
+
+CALENDAR_WEEKS = 6
+
+@bp.route('/api/calendar')
+@cached_response(scopes=('workouts',))
+def api_calendar():
+    # 달력에 보이는 6주(일요일 시작) 구간의 날짜별 운동 집계와 세션 id
+    today = datetime.now().date()
+    try:
+        year = int(request.args.get('year', today.year))
+        month = int(request.args.get('month', today.month))
+        first = date(year, month, 1)
+    except ValueError:
+        return jsonify({'error': 'year, month 값이 올바르지 않습니다.'}), 400
+    start = first - timedelta(days=(first.weekday() + 1) % 7)
+    end = start + timedelta(days=CALENDAR_WEEKS * 7 - 1)
+
+    rows = db.session.query(
+        WorkoutSession.date,
+        func.count(WorkoutSession.id),
+        func.coalesce(func.sum(WorkoutSession.total_duration), 0),
+        func.aggregate_strings(cast(WorkoutSession.id, String), ',')
+    ).filter(
+        WorkoutSession.user_id == current_user_id(),
+        WorkoutSession.date >= start,
+        WorkoutSession.date <= end
+    ).group_by(WorkoutSession.date).all()
 
-@app.route('/api/chart-data')
+    days = {
+        day.isoformat(): {
+            'session_count': count,
+            'total_duration': duration,
+            'session_ids': sorted(int(i) for i in ids.split(','))
+        }
+        for day, count, duration, ids in rows
+    }
+    # 보관된 달에 걸치면 보관된 세션도 더한다 (보관된 세션은 수정 화면 대신 목록으로 연결)
+    for session in archive.sessions(current_user_id(), start, end):
+        day = days.setdefault(session.date.isoformat(), {'session_count': 0, 'total_duration': 0, 'session_ids': []})
+        day['session_count'] += 1
+        day['total_duration'] += session.total_duration or 0
+        day['session_ids'] = sorted(day['session_ids'] + [session.id])
+        day.setdefault('archived_session_ids', []).append(session.id)
+    return jsonify({
+        'year': year,
+        'month': month,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': days
+    })
+
+@bp.route('/api/chart-data')
+@cached_response(scopes=('workouts',))
 def chart_data():
     # Chart.js용 API 엔드포인트
     today = datetime.now().date()
     week_ago = today - timedelta(days=7)
     
-    # 최근 7일간 운동 데이터
-    sessions = WorkoutSession.query.filter(
-        WorkoutSession.date >= week_ago
-    ).order_by(WorkoutSession.date).all()
+    # 최근 7일간 운동 데이터 (일일 집계에서)
+    daily = rollups.daily_totals(week_ago, today, current_user_id())
     
     labels = []
     data = []
     for i in range(7):
         date = week_ago + timedelta(days=i)
         labels.append(date.strftime('%m/%d'))
-        day_duration = sum(s.total_duration or 0 for s in sessions if s.date == date)
-        data.append(day_duration)
+        data.append(daily.get(date, (0, 0))[1])
     
     return jsonify({
         'labels': labels,
         'data': data
     })
 
-@app.route('/api/body-part-data')
+@bp.route('/api/body-part-data')
+@cached_response(scopes=('workouts', 'exercises'))
 def body_part_data():
-    # 부위별 운동 분포 데이터
-    stats = db.session.query(
-        Exercise.body_part,
-        func.count(WorkoutRecord.id)
-    ).join(WorkoutRecord).group_by(Exercise.body_part).all()
+    # 부위별 운동 분포 데이터 (일일 집계에서)
+    stats = rollups.body_part_counts(current_user_id())
     
     labels = [stat[0] for stat in stats]
     data = [stat[1] for stat in stats]
@@ -548,13 +482,274 @@ def body_part_data():
         'data': data
     })
 
+@bp.route('/api/prs')
+@cached_response(scopes=('workouts', 'exercises'))
+def api_prs():
+    # 운동 종목별 개인 기록 (PR 인덱스에서 바로 읽음)
+    rows = db.session.query(PersonalRecord, Exercise.name, Exercise.body_part).join(
+        Exercise, PersonalRecord.exercise_id == Exercise.id
+    ).filter(PersonalRecord.user_id == current_user_id()).order_by(Exercise.body_part, Exercise.name).all()
+
+    def metric(pr, name):
+        value = getattr(pr, name)
+        return None if value is None else {'value': value, 'date': getattr(pr, name + '_date').isoformat()}
+
+    return jsonify({'prs': [
+        dict({
+            'exercise_id': pr.exercise_id,
+            'exercise': name,
+            'body_part': body_part,
+            'improved_on': pr.improved_on.isoformat()
+        }, **{column: metric(pr, column) for column, _, _ in prs.METRICS})
+        for pr, name, body_part in rows
+    ]})
+
+@bp.route('/api/exercises/search')
+@cached_response(scopes=('exercises',))
+def api_exercise_search():
+    # 운동 종목 자동 완성: 이름/별칭 앞부분, 자모, 초성으로 검색 (body_part, difficulty로 거르기)
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit은 정수여야 합니다.'}), 400
+    if not 1 <= limit <= exercise_search.MAX_LIMIT:
+        return jsonify({'error': f'limit은 1~{exercise_search.MAX_LIMIT} 사이여야 합니다.'}), 400
+    results = exercise_search.search(
+        request.args.get('q', ''),
+        body_part=request.args.get('body_part'),
+        difficulty=request.args.get('difficulty'),
+        limit=limit
+    )
+    return jsonify({'results': results})
+
+@bp.route('/api/workouts')
+def api_workouts():
+    # 운동 기록 전체를 NDJSON(한 줄에 세션 하나)으로 스트리밍
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': '날짜 형식은 YYYY-MM-DD 입니다.'}), 400
+    after = request.args.get('after')
+    cursor = decode_cursor(after)
+    if after and cursor is None:
+        return jsonify({'error': '잘못된 커서입니다.'}), 400
+
+    def generate():
+        for sessions, records in iter_session_batches(user_id=current_user_id(), start=start, end=end, after=cursor):
+            yield serialization.dumps_lines(session_to_dict(session, records.get(session.id, [])) for session in sessions)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.route('/api/workouts/<int:id>', methods=['PATCH'])
+def api_patch_workout(id):
+    # 세션 부분 수정: 보낸 필드와 기록만 바꾸고 나머지 기록은 그대로 둔다 (workout_edits.parse_patch 참고)
+    session = get_owned(WorkoutSession, id, options=[eager_records()])
+    if not session:
+        return jsonify({'error': '해당 운동 기록을 찾을 수 없습니다.'}), 404
+    try:
+        edit = workout_edits.parse_patch(session, request.get_json(silent=True))
+    except workout_edits.EditError as e:
+        return jsonify({'error': str(e)}), 400
+    applied = workout_edits.apply(session, edit)
+    if edit:
+        db.session.commit()
+        cache.invalidate('workouts', user_id=current_user_id())
+    data = session_to_dict(session, session_records([session.id]).get(session.id, []))
+    data['changes'] = applied
+    return jsonify(data)
+
+@bp.route('/api/sync', methods=['POST'])
+def api_sync():
+    # 오프라인 클라이언트 일괄 쓰기: 세션/운동 기록/몸무게 항목을 멱등 키로 중복 제거해 한 트랜잭션으로 반영
+    try:
+        parsed = sync.parse_batch(request.get_json(silent=True))
+    except workout_edits.EditError as e:
+        return jsonify({'error': str(e)}), 400
+    results = sync.apply_batch(current_user_id(), parsed)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 같은 키를 가진 다른 요청이 먼저 커밋함 - 다시 보내면 duplicate로 처리된다
+        db.session.rollback()
+        return jsonify({'error': '같은 key의 항목이 동시에 반영되었습니다. 다시 시도해주세요.'}), 409
+    for scope in {sync.SCOPES[result['type']] for result in results if result['status'] == 'created'}:
+        cache.invalidate(scope, user_id=current_user_id())
+    return jsonify({
+        'results': results,
+        'created': sum(result['status'] == 'created' for result in results),
+        'duplicates': sum(result['status'] == 'duplicate' for result in results),
+        'errors': sum(result['status'] == 'error' for result in results)
+    })
+
+@bp.route('/api/changes')
+def api_changes():
+    # 델타 동기화: since 토큰 이후 바뀐 행만 (처음에는 since=0, 응답의 next를 다음 요청의 since로)
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', 500))
+        if since < 0 or not 1 <= limit <= changes.MAX_LIMIT:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': f'since는 0 이상의 토큰, limit은 1~{changes.MAX_LIMIT} 사이여야 합니다.'}), 400
+    return jsonify(changes.changes_since(current_user_id(), since, limit))
+
+def import_job_to_dict(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'source': job.source,
+        'format': job.format,
+        'rows_processed': job.rows_processed,
+        'sessions_created': job.sessions_created,
+        'records_created': job.records_created,
+        'error': job.error
+    }
+
+def job_to_dict(job):
+    result = json.loads(job.result) if job.result else None
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'result': result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'run_at': job.run_at.isoformat() if job.run_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+    if job.kind == 'export' and job.status == 'completed':
+        data['download_url'] = url_for('.api_job_download', id=job.id)
+    return data
+
+def job_accepted(job):
+    # 작업을 큐에 넣었다는 202 응답 (Location으로 상태 확인)
+    return jsonify(job_to_dict(job)), 202, {'Location': url_for('.api_job', id=job.id)}
+
+@bp.route('/api/import', methods=['POST'])
+def api_import():
+    # CSV/JSON 운동 기록 대량 가져오기
+    # 기본은 백그라운드 작업으로 넣고 202를 돌려준다. wait=1이면 요청 안에서 가져오고,
+    # 그때 실패하면 같은 파일과 resume=<가져오기 작업 id>로 이어서 가져올 수 있다.
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': '가져올 파일(file)을 첨부해주세요.'}), 400
+    fmt = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    fmt = 'json' if fmt in ('json', 'jsonl', 'ndjson') else fmt
+    if fmt not in ('csv', 'json'):
+        return jsonify({'error': f'지원하지 않는 형식입니다: {fmt}'}), 400
+    resume = request.form.get('resume', type=int)
+    if resume is not None and get_owned(ImportJob, resume) is None:
+        return jsonify({'error': '가져오기 작업을 찾을 수 없습니다.'}), 404
+
+    if request.form.get('wait', '0') in ('0', 'false', 'no'):
+        # 업로드는 메모리/작업 행에 올리지 않고 작업 파일 디렉터리에 저장해 파일 이름만 넘긴다
+        payload = {'format': fmt, 'source': upload.filename, 'resume': resume, 'input_file': jobs.spool(upload.stream)}
+        job = jobs.enqueue('import-workouts', payload, user_id=current_user_id())
+        db.session.commit()
+        return job_accepted(job)
+
+    try:
+        job = importer.run_import(importer.open_text(upload.stream), fmt, user_id=current_user_id(),
+                                  source=upload.filename, resume_job_id=resume)
+    except importer.ImportFailed as e:
+        status = 400 if isinstance(e.__cause__, importer.ImportRowError) else 500
+        return jsonify({'error': str(e), 'job': import_job_to_dict(db.session.get(ImportJob, e.job_id))}), status
+    except importer.ImportJobNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    finally:
+        cache.invalidate('workouts', user_id=current_user_id())
+        cache.invalidate('exercises')
+    return jsonify(import_job_to_dict(job))
+
+@bp.route('/api/import/<int:id>')
+def api_import_status(id):
+    job = get_owned(ImportJob, id)
+    if not job:
+        return jsonify({'error': '가져오기 작업을 찾을 수 없습니다.'}), 404
+    return jsonify(import_job_to_dict(job))
+
+@bp.route('/api/export/<dataset>', methods=['GET', 'POST'])
+def api_export(dataset):
+    # 전체 기록 내보내기 (format=csv|jsonl|columnar, gzip=1이면 압축하면서 스트리밍)
+    # POST는 파일 만들기를 백그라운드 작업으로 넣고, 끝나면 /api/jobs/<id>/download로 받는다.
+    fmt = request.values.get('format', 'csv')
+    if dataset not in exporter.DATASETS:
+        return jsonify({'error': f'데이터 종류는 {", ".join(exporter.DATASETS)} 중 하나입니다.'}), 404
+    if fmt not in exporter.FORMATS:
+        return jsonify({'error': f'형식은 {", ".join(exporter.FORMATS)} 중 하나입니다.'}), 400
+    compress = request.values.get('gzip', '1') not in ('0', 'false', 'no')
+
+    if request.method == 'POST':
+        job = jobs.enqueue('export', {'dataset': dataset, 'format': fmt, 'gzip': compress}, user_id=current_user_id())
+        db.session.commit()
+        return job_accepted(job)
+
+    mimetype = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson', 'columnar': 'application/octet-stream'}[fmt]
+    response = Response(
+        stream_with_context(exporter.export_stream(dataset, fmt, user_id=current_user_id(), compress=compress)),
+        mimetype='application/gzip' if compress else mimetype
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename={exporter.export_filename(dataset, fmt, compress)}'
+    return response
+
+@bp.route('/api/jobs')
+def api_jobs():
+    # 현재 사용자의 최근 백그라운드 작업
+    recent = BackgroundJob.query.filter_by(user_id=current_user_id()).order_by(BackgroundJob.id.desc()).limit(20)
+    return jsonify({'jobs': [job_to_dict(job) for job in recent]})
+
+@bp.route('/api/jobs/<int:id>')
+def api_job(id):
+    job = get_owned(BackgroundJob, id)
+    if not job:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job_to_dict(job))
+
+@bp.route('/api/jobs/<int:id>/download')
+def api_job_download(id):
+    job = get_owned(BackgroundJob, id)
+    if not job or job.kind != 'export':
+        return jsonify({'error': '내보내기 작업을 찾을 수 없습니다.'}), 404
+    if job.status != 'completed':
+        return jsonify({'error': '아직 파일이 만들어지지 않았습니다.', 'job': job_to_dict(job)}), 409
+    result = json.loads(job.result)
+    if not os.path.exists(os.path.join(jobs.files_dir(), result['file'])):
+        return jsonify({'error': '파일 보관 기간이 지났습니다. 다시 내보내기 해주세요.', 'job': job_to_dict(job)}), 410
+    return send_from_directory(jobs.files_dir(), result['file'], as_attachment=True, download_name=result['filename'])
+
+@bp.route('/metrics')
+def metrics():
+    # Prometheus 수집용 요청 계측 값 (워커 프로세스별)
+    return Response(instrumentation.render_metrics(), mimetype='text/plain; version=0.0.4')
+
 # 몸무게 관리 라우트들
-@app.route('/weight')
+@bp.route('/weight')
+@query_budget(4)
 def weight_records():
-    records = WeightRecord.query.filter_by(user_id=1).order_by(WeightRecord.date.desc()).all()
-    return render_template('weight.html', records=records)
+    query = WeightRecord.query.filter_by(user_id=current_user_id())
+    page = paginate_desc(
+        query,
+        WeightRecord,
+        per_page=current_app.config.get('POSTS_PER_PAGE', 10),
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    # 통계 카드는 페이지와 상관없이 전체 기록 기준
+    latest_records = query.order_by(WeightRecord.date.desc(), WeightRecord.id.desc()).limit(2).all()
+    total_records = query.count()
+    return render_template('weight.html',
+                         records=page.items,
+                         page=page,
+                         latest_records=latest_records,
+                         total_records=total_records)
 
-@app.route('/weight/add', methods=['GET', 'POST'])
+@bp.route('/weight/add', methods=['GET', 'POST'])
 def add_weight():
     if request.method == 'POST':
         def safe_float(value, default=None):
@@ -564,7 +759,7 @@ def add_weight():
                 return default
         
         record = WeightRecord(
-            user_id=1,  # 임시로 1번 사용자
+            user_id=current_user_id(),
             weight=safe_float(request.form['weight']),
             date=datetime.strptime(request.form['date'], '%Y-%m-%d').date(),
             body_fat_percentage=safe_float(request.form.get('body_fat_percentage')),
@@ -574,21 +769,22 @@ def add_weight():
         
         if record.weight is None:
             flash('몸무게를 입력해주세요!', 'error')
-            return redirect(url_for('add_weight'))
+            return redirect(url_for('.add_weight'))
         
         db.session.add(record)
         db.session.commit()
+        cache.invalidate('weight', user_id=current_user_id())
         flash('몸무게 기록이 성공적으로 추가되었습니다!', 'success')
-        return redirect(url_for('weight_records'))
+        return redirect(url_for('.weight_records'))
     
     return render_template('add_weight.html')
 
-@app.route('/weight/edit/<int:id>', methods=['GET', 'POST'])
+@bp.route('/weight/edit/<int:id>', methods=['GET', 'POST'])
 def edit_weight(id):
-    record = db.session.get(WeightRecord, id)
+    record = get_owned(WeightRecord, id)
     if not record:
         flash('해당 기록을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('weight_records'))
+        return redirect(url_for('.weight_records'))
     
     if request.method == 'POST':
         def safe_float(value, default=None):
@@ -608,30 +804,33 @@ def edit_weight(id):
             return render_template('edit_weight.html', record=record)
         
         db.session.commit()
+        cache.invalidate('weight', user_id=current_user_id())
         flash('몸무게 기록이 성공적으로 수정되었습니다!', 'success')
-        return redirect(url_for('weight_records'))
+        return redirect(url_for('.weight_records'))
     
     return render_template('edit_weight.html', record=record)
 
-@app.route('/weight/delete/<int:id>')
+@bp.route('/weight/delete/<int:id>')
 def delete_weight(id):
-    record = db.session.get(WeightRecord, id)
+    record = get_owned(WeightRecord, id)
     if not record:
         flash('해당 기록을 찾을 수 없습니다.', 'error')
-        return redirect(url_for('weight_records'))
+        return redirect(url_for('.weight_records'))
     db.session.delete(record)
     db.session.commit()
+    cache.invalidate('weight', user_id=current_user_id())
     flash('몸무게 기록이 삭제되었습니다!', 'success')
-    return redirect(url_for('weight_records'))
+    return redirect(url_for('.weight_records'))
 
-@app.route('/api/weight-chart-data')
+@bp.route('/api/weight-chart-data')
+@cached_response(scopes=('weight',))
 def weight_chart_data():
     # 최근 30일간 몸무게 데이터
     today = datetime.now().date()
     month_ago = today - timedelta(days=30)
     
     records = WeightRecord.query.filter(
-        WeightRecord.user_id == 1,
+        WeightRecord.user_id == current_user_id(),
         WeightRecord.date >= month_ago
     ).order_by(WeightRecord.date).all()
     
@@ -643,14 +842,227 @@ def weight_chart_data():
         'weights': weights
     })
 
+ANALYTICS_MAX_DAYS = 730
+
+def _analytics_int(name, default, low, high):
+    """분석 API의 정수 쿼리 인자 (범위를 벗어나면 ValueError)"""
+    value = int(request.args.get(name, default))
+    if not low <= value <= high:
+        raise ValueError(name)
+    return value
+
+@bp.route('/api/analytics/training-load')
+@cached_response(scopes=('workouts',))
+def api_training_load():
+    # 최근 days일 훈련 부하와 7일/28일 이동 평균, 급성:만성 부하 비율
+    metric = request.args.get('metric', 'duration')
+    try:
+        days = _analytics_int('days', 90, 1, ANALYTICS_MAX_DAYS)
+    except ValueError:
+        return jsonify({'error': f'days는 1~{ANALYTICS_MAX_DAYS} 사이의 정수여야 합니다.'}), 400
+    if metric not in analytics.LOAD_METRICS:
+        return jsonify({'error': f'metric은 {", ".join(analytics.LOAD_METRICS)} 중 하나여야 합니다.'}), 400
+    today = datetime.now().date()
+    return jsonify(analytics.training_load(current_user_id(), today - timedelta(days=days - 1), today, metric))
+
+@bp.route('/api/analytics/body-part-volume')
+@cached_response(scopes=('workouts', 'exercises'))
+def api_body_part_volume():
+    # 최근 weeks주(월요일 시작) 부위별 주간 볼륨
+    try:
+        weeks = _analytics_int('weeks', 12, 1, ANALYTICS_MAX_DAYS // 7)
+    except ValueError:
+        return jsonify({'error': f'weeks는 1~{ANALYTICS_MAX_DAYS // 7} 사이의 정수여야 합니다.'}), 400
+    today = datetime.now().date()
+    start = today - timedelta(days=today.weekday() + (weeks - 1) * 7)
+    return jsonify(analytics.weekly_body_part_volume(current_user_id(), start, weeks))
+
+@bp.route('/api/analytics/weight-trend')
+@cached_response(scopes=('weight',))
+def api_weight_trend():
+    # 최근 days일 몸무게와 이동 평균 추세, 주당 변화량
+    try:
+        days = _analytics_int('days', 90, 1, ANALYTICS_MAX_DAYS)
+        window = _analytics_int('window', 7, 1, 60)
+    except ValueError:
+        return jsonify({'error': f'days는 1~{ANALYTICS_MAX_DAYS}, window는 1~60 사이의 정수여야 합니다.'}), 400
+    today = datetime.now().date()
+    return jsonify(analytics.weight_trend(current_user_id(), today - timedelta(days=days - 1), today, window))
+
+@bp.route('/api/weight-series')
+@cached_response(scopes=('weight',))
+def api_weight_series():
+    # 기간(range)의 몸무게를 points개 이하로 줄인 시계열과 추세선, 체지방률/근육량 (기간별로 캐시)
+    span = request.args.get('range', '90d')
+    if span not in analytics.WEIGHT_RANGES:
+        return jsonify({'error': f'range는 {", ".join(analytics.WEIGHT_RANGES)} 중 하나여야 합니다.'}), 400
+    try:
+        points = _analytics_int('points', 200, 10, 1000)
+        window = _analytics_int('window', 7, 1, 60)
+    except ValueError:
+        return jsonify({'error': 'points는 10~1000, window는 1~60 사이의 정수여야 합니다.'}), 400
+    today = datetime.now().date()
+    return jsonify(analytics.weight_series(
+        current_user_id(), today, analytics.WEIGHT_RANGES[span], points, window
+    ))
+
+# CLI 명령
+@bp.cli.command('db-upgrade')
+def db_upgrade_command():
+    """테이블을 만들고 아직 적용되지 않은 스키마 마이그레이션을 적용합니다 (사용자 샤드 포함)."""
+    for key in tenancy.shard_keys():
+        engine = db.engines[key]
+        label = key or '기본 DB'
+        db.metadata.create_all(engine)
+        applied = migrations.upgrade(engine=engine)
+        if applied:
+            click.echo(f'[{label}] 마이그레이션 적용: {", ".join(map(str, applied))}')
+        click.echo(f'[{label}] 현재 스키마 버전: {migrations.current_version(engine)}')
+
+@bp.cli.command('rebuild-rollups')
+@click.option('--background', is_flag=True, help='백그라운드 작업으로 넣고 바로 끝내기')
+def rebuild_rollups_command(background):
+    """운동 기록 원본에서 일일 집계와 개인 기록(PR) 테이블을 다시 만들고 목표 진행률을 다시 계산합니다 (사용자 샤드 포함)."""
+    for key in tenancy.shard_keys():
+        tenancy.use_shard(key)
+        if background:
+            job = jobs.enqueue('rebuild-rollups')
+            db.session.commit()
+            click.echo(f'[{key or "기본 DB"}] 작업 {job.id}을(를) 큐에 넣었습니다.')
+            continue
+        result = jobs.rebuild_derived()
+        click.echo(f'[{key or "기본 DB"}] 일일 집계 {result["days"]}일치, '
+                   f'개인 기록 {result["personal_records"]}개를 다시 만들었습니다.')
+
+@bp.cli.command('archive-workouts')
+@click.option('--days', type=int, help='이 일수보다 오래된 달을 보관 (기본: ARCHIVE_AFTER_DAYS)')
+@click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), help='이 날짜가 든 달보다 오래된 달을 보관')
+@click.option('--user-id', type=int, help='이 사용자만 보관 (기본: 모든 사용자)')
+def archive_workouts_command(days, before, user_id):
+    """오래된 운동 세션과 기록을 달 단위 압축 묶음으로 옮깁니다 (일일 집계와 개인 기록은 그대로 둠)."""
+    if before is None:
+        before = date.today() - timedelta(days=days if days is not None else current_app.config['ARCHIVE_AFTER_DAYS'])
+    else:
+        before = before.date()
+    for key in _target_shards(user_id):
+        moved = archive.archive(before, user_id=user_id)
+        _invalidate_users(moved.user_ids)
+        click.echo(f'[{key or "기본 DB"}] {before.replace(day=1)} 이전: 사용자×월 묶음 {moved.months}개, '
+                   f'세션 {moved.sessions}개 / 기록 {moved.records}개를 보관했습니다.')
+
+@bp.cli.command('restore-workouts')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='이 날짜가 든 달부터 (기본: 처음부터)')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='이 날짜가 든 달까지 (기본: 끝까지)')
+@click.option('--user-id', type=int, help='이 사용자만 되돌림 (기본: 모든 사용자)')
+def restore_workouts_command(start, end, user_id):
+    """보관된 운동 기록을 핫 테이블로 되돌립니다 (달 단위, id 유지)."""
+    for key in _target_shards(user_id):
+        try:
+            moved = archive.restore(user_id=user_id, start=start.date() if start else None, end=end.date() if end else None)
+        except archive.IdConflict as e:
+            raise click.ClickException(f'[{key or "기본 DB"}] {e}')
+        _invalidate_users(moved.user_ids)
+        click.echo(f'[{key or "기본 DB"}] 묶음 {moved.months}개, 세션 {moved.sessions}개 / 기록 {moved.records}개를 되돌렸습니다.')
+
+def _invalidate_users(user_ids):
+    # None: 모든 사용자 범위의 보관 범위(archive.bounds) 캐시
+    for user_id in [*user_ids, None]:
+        cache.invalidate('workouts', user_id=user_id)
+
+def _target_shards(user_id):
+    """CLI 명령을 실행할 샤드 (사용자를 지정하면 그 사용자의 샤드만)"""
+    if user_id is not None:
+        tenancy.use_user(user_id)
+        yield tenancy.shard_for_user(user_id)
+        return
+    for key in tenancy.shard_keys():
+        tenancy.use_shard(key)
+        yield key
+
+@bp.cli.command('run-worker')
+@click.option('--threads', default=2, show_default=True, help='동시에 실행할 작업 수')
+@click.option('--burst', is_flag=True, help='큐에 있는 작업만 실행하고 종료 (한 스레드)')
+def run_worker_command(threads, burst):
+    """백그라운드 작업 큐 워커를 실행합니다 (SIGTERM을 받으면 실행 중인 작업을 마치고 종료)."""
+    if burst:
+        click.echo(f'작업 {jobs.run_pending()}개를 실행했습니다.')
+        removed = jobs.sweep_files()
+        if removed:
+            click.echo(f'오래된 작업 파일 {removed}개를 지웠습니다.')
+        return
+    app = current_app._get_current_object()
+    worker = jobs.Worker(app, threads, app.config['JOB_POLL_INTERVAL'])
+    click.echo(f'작업 워커 {worker.name} 시작 (스레드 {threads}개)')
+    worker.run_forever()
+
+@bp.cli.command('import-workouts')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'json']), help='파일 형식 (기본: 확장자로 판단)')
+@click.option('--user-id', default=1, show_default=True, help='기록을 추가할 사용자')
+@click.option('--resume', type=int, help='실패한 가져오기 작업 id (같은 파일로 이어서 가져오기)')
+@click.option('--batch-size', default=importer.BATCH_SIZE, show_default=True, help='배치당 운동 기록 수')
+def import_workouts_command(path, fmt, user_id, resume, batch_size):
+    """CSV/JSON 파일에서 운동 기록을 대량으로 가져옵니다."""
+    if fmt is None:
+        fmt = 'csv' if path.lower().endswith('.csv') else 'json'
+
+    def report(job):
+        click.echo(f'  작업 {job.id}: {job.rows_processed}행 처리, 세션 {job.sessions_created}개 / 기록 {job.records_created}개 추가')
+
+    tenancy.use_user(user_id)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        try:
+            job = importer.run_import(f, fmt, user_id=user_id, source=os.path.basename(path),
+                                      resume_job_id=resume, batch_size=batch_size, progress=report)
+        except importer.ImportFailed as e:
+            raise click.ClickException(f'가져오기 실패: {e} (이어서 가져오려면 --resume {e.job_id})')
+        except importer.ImportJobNotFound as e:
+            raise click.ClickException(str(e))
+    click.echo(f'가져오기 완료 (작업 {job.id}): 세션 {job.sessions_created}개, 기록 {job.records_created}개')
+
+@bp.cli.command('export-data')
+@click.argument('dataset', type=click.Choice(exporter.DATASETS))
+@click.argument('path', type=click.Path(dir_okay=False, writable=True))
+@click.option('--format', 'fmt', type=click.Choice(exporter.FORMATS), default='csv', show_default=True, help='출력 형식')
+@click.option('--user-id', default=1, show_default=True, help='내보낼 사용자')
+@click.option('--gzip', 'compress', is_flag=True, help='gzip으로 압축해서 저장')
+def export_data_command(dataset, path, fmt, user_id, compress):
+    """운동 세션/기록/몸무게 기록 전체를 파일로 내보냅니다."""
+    tenancy.use_user(user_id)
+    written = 0
+    with open(path, 'wb') as f:
+        for chunk in exporter.export_stream(dataset, fmt, user_id=user_id, compress=compress):
+            f.write(chunk)
+            written += len(chunk)
+    click.echo(f'{dataset} → {path} ({written:,} bytes)')
+
+@bp.cli.command('check-indexes')
+def check_indexes_command():
+    """주요 라우트의 쿼리가 인덱스를 사용하는지 EXPLAIN QUERY PLAN으로 검사합니다."""
+    import explain
+
+    failures = 0
+    for path, statement, plan, scans in explain.check_routes(current_app._get_current_object()):
+        status = 'FULL SCAN ' + ', '.join(scans) if scans else 'ok'
+        click.echo(f'[{status}] {path}: {" ".join(statement.split())[:120]}')
+        for detail in plan:
+            click.echo(f'    {detail}')
+        failures += bool(scans)
+    if failures:
+        raise click.ClickException(f'인덱스를 사용하지 않는 쿼리 {failures}개')
+
 # 템플릿에서 사용할 함수들을 전역으로 등록
-@app.template_global()
+@bp.app_template_global()
 def today():
     return date.today()
 
 if __name__ == '__main__':
+    from run import create_app
+
+    app = create_app()
     with app.app_context():
         db.create_all()
+        migrations.upgrade()
         
         # 샘플 데이터 추가 (처음 실행 시에만)
         if Exercise.query.count() == 0:
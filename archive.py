@@ -0,0 +1,420 @@
+"""
+운동 기록 보관 (핫/콜드 분리)
+
+오래된 운동 세션과 기록을 사용자 × 달마다 workout_archive의 압축된 행 하나로 옮긴다
+(flask archive-workouts). workout_session/workout_record에는 최근 기록만 남으므로 목록, 달력,
+수정 화면의 쿼리와 인덱스 크기가 전체 히스토리 길이와 상관없이 일정하다.
+
+- 일일 집계(DailyRollup, DailyBodyPartRollup), 개인 기록(PR), 목표 진행 값은 그대로 둔다.
+  대시보드와 통계는 보관 여부와 상관없이 같은 값을 보여 준다.
+- 조회 범위가 보관된 달에 걸칠 때만 그 달의 묶음을 풀어 핫 테이블의 행과 (date, id) 순서로
+  합친다 (운동 기록 목록의 뒤쪽 페이지, 달력, /api/workouts, 내보내기, 부위별 볼륨, 델타 동기화).
+- 보관된 세션은 읽기 전용이다. 고치려면 flask restore-workouts로 핫 테이블에 되돌린다 (id 유지).
+- 집계/PR을 원본에서 다시 만들 때(rebuild)는 보관된 기록도 포함한다.
+- 보관/복원은 데이터가 사라지거나 새로 생기는 것이 아니므로 변경 기록(change_log)에 남기지 않는다.
+- 세션/기록 테이블은 AUTOINCREMENT라(마이그레이션 13) 보관한 id를 새 행이 쓰지 않으므로 복원한 행은 원래 id 그대로다.
+
+묶음 형식: zlib으로 압축한 JSON {"sessions": [[SESSION_FIELDS 순서 값]], "records": [[RECORD_FIELDS 순서 값]]}
+(날짜/시각은 ISO 문자열)
+"""
+
+import heapq
+import itertools
+import json
+import zlib
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from operator import attrgetter
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from models import db, Exercise, WorkoutArchive, WorkoutRecord, WorkoutSession
+from pagination import keyset_after, query_fetcher
+
+SESSION_FIELDS = ('id', 'date', 'start_time', 'end_time', 'total_duration', 'notes', 'created_at', 'updated_at')
+RECORD_FIELDS = ('id', 'session_id', 'exercise_id', 'sets', 'reps', 'weight', 'duration', 'distance',
+                 'created_at', 'updated_at')
+COMPRESS_LEVEL = 6
+CHUNK_BATCH = 4  # 쿼리 한 번에 읽는 묶음 수
+ID_BATCH = 500  # IN 목록 하나에 넣는 id 수
+
+_key = attrgetter('date', 'id')
+
+# archive()/restore() 결과: 옮긴 달 수, 세션 수, 기록 수, 대상 사용자 id 집합
+Moved = namedtuple('Moved', 'months sessions records user_ids')
+
+
+class ArchivedSession(namedtuple('ArchivedSession', ('user_id',) + SESSION_FIELDS + ('records',))):
+    """보관 묶음에서 꺼낸 세션 (읽기 전용, 목록/히스토리에서 WorkoutSession 행 대신 쓴다)"""
+    __slots__ = ()
+    archived = True
+
+
+class ArchivedRecord(namedtuple('ArchivedRecord', RECORD_FIELDS + ('exercise',))):
+    """보관 묶음에서 꺼낸 운동 기록 (exercise는 with_exercises()로 채운다)"""
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.exercise.name if self.exercise is not None else None
+
+    @property
+    def body_part(self):
+        return self.exercise.body_part if self.exercise is not None else None
+
+
+def _parser(column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat
+    if python_type is date:
+        return date.fromisoformat
+    return None
+
+
+_SESSION_PARSERS = [_parser(WorkoutSession.__table__.c[name]) for name in SESSION_FIELDS]
+_RECORD_PARSERS = [_parser(WorkoutRecord.__table__.c[name]) for name in RECORD_FIELDS]
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _decode(values, parsers):
+    return [parse(value) if parse and value is not None else value for value, parse in zip(values, parsers)]
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _batches(ids):
+    for i in range(0, len(ids), ID_BATCH):
+        yield ids[i:i + ID_BATCH]
+
+
+def pack(sessions, records):
+    """세션/기록 행(SESSION_FIELDS, RECORD_FIELDS 순서의 값) → 압축된 묶음"""
+    data = {
+        'sessions': [[_encode(value) for value in row] for row in sessions],
+        'records': [[_encode(value) for value in row] for row in records],
+    }
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), COMPRESS_LEVEL)
+
+
+def unpack(user_id, payload):
+    """압축된 묶음 → (date, id) 순서의 ArchivedSession 목록 (기록은 id 순서)"""
+    data = json.loads(zlib.decompress(payload))
+    records = {}
+    for values in data['records']:
+        record = ArchivedRecord(*_decode(values, _RECORD_PARSERS), None)
+        records.setdefault(record.session_id, []).append(record)
+    sessions = [
+        ArchivedSession(user_id, *_decode(values, _SESSION_PARSERS), sorted(records.get(values[0], []), key=attrgetter('id')))
+        for values in data['sessions']
+    ]
+    sessions.sort(key=_key)
+    return sessions
+
+
+def _session_row(session):
+    return tuple(session[1:1 + len(SESSION_FIELDS)])
+
+
+def _record_row(record):
+    return tuple(record[:len(RECORD_FIELDS)])
+
+
+def _where(query, user_id, start, end):
+    archive_t = WorkoutArchive.__table__
+    if user_id is not None:
+        query = query.where(archive_t.c.user_id == user_id)
+    if start is not None:
+        query = query.where(archive_t.c.month >= _month(start))
+    if end is not None:
+        query = query.where(archive_t.c.month <= end)
+    return query
+
+
+def bounds(user_id=None):
+    """보관된 세션의 (첫 날짜, 마지막 날짜) - 보관된 것이 없으면 None
+
+    응답 캐시에 'workouts' 데이터 버전과 함께 저장해 두므로(보관/복원/전체 삭제 뒤에는 invalidate)
+    핫 경로에서는 보통 쿼리 없이 끝난다. 응답 캐시 없이 만든 앱(내보내기만 쓰는 스크립트 등)에서는 매번 조회한다.
+    """
+    store = current_app.extensions.get('response_cache')
+    if store is None:
+        return _query_bounds(user_id)
+    key = f'archive-bounds:{user_id}:{store.versions(("workouts",), user_id)}'
+    cached = store.backend.get(key)
+    if cached is None:
+        span = _query_bounds(user_id)
+        cached = [span[0].isoformat(), span[1].isoformat()] if span is not None else []
+        store.backend.set(key, cached, store.timeout)
+    return (date.fromisoformat(cached[0]), date.fromisoformat(cached[1])) if cached else None
+
+
+def _query_bounds(user_id):
+    archive_t = WorkoutArchive.__table__
+    first, last = db.session.execute(_where(
+        select(func.min(archive_t.c.first_date), func.max(archive_t.c.last_date)), user_id, None, None
+    )).one()
+    return (first, last) if first is not None else None
+
+
+def overlaps(span, start=None, end=None):
+    """bounds()의 결과가 [start, end] 기간에 걸치는지 (None은 제한 없음)"""
+    return span is not None and (start is None or span[1] >= start) and (end is None or span[0] <= end)
+
+
+def iter_chunks(execute=None, user_id=None, start=None, end=None, descending=False):
+    """기간에 걸친 묶음을 달 순서로 하나씩 풀어 (user_id, 달, 세션 목록)으로 돌려준다
+
+    묶음은 CHUNK_BATCH개씩 (month, user_id) 키셋으로 읽으므로, 앞쪽 몇 달만 필요한 쪽은 중간에 멈추면 된다.
+    """
+    execute = execute or db.session.execute
+    archive_t = WorkoutArchive.__table__
+    query = _where(select(archive_t.c.user_id, archive_t.c.month, archive_t.c.payload), user_id, start, end)
+    if descending:
+        query = query.order_by(archive_t.c.month.desc(), archive_t.c.user_id.desc())
+    else:
+        query = query.order_by(archive_t.c.month, archive_t.c.user_id)
+    cursor = None
+    while True:
+        batch = query
+        if cursor is not None:
+            batch = batch.where(keyset_after(archive_t.c.month, archive_t.c.user_id, cursor, descending))
+        rows = execute(batch.limit(CHUNK_BATCH)).all()
+        for chunk_user_id, month, payload in rows:
+            yield chunk_user_id, month, unpack(chunk_user_id, payload)
+        if len(rows) < CHUNK_BATCH:
+            return
+        cursor = (rows[-1].month, rows[-1].user_id)
+
+
+def iter_sessions(user_id=None, start=None, end=None, after=None, inclusive=False, descending=False, execute=None):
+    """보관된 세션을 (date, id) 순서로 하나씩 돌려준다 (after: 키셋 커서처럼 이 (date, id) 다음부터)"""
+    if after is not None:
+        if descending:
+            end = min(end, after[0]) if end else after[0]
+        else:
+            start = max(start, after[0]) if start else after[0]
+    chunks = iter_chunks(execute, user_id, start, end, descending)
+    # 같은 달의 묶음(사용자별)을 합쳐 정렬한다
+    for _, group in itertools.groupby(chunks, key=lambda chunk: chunk[1]):
+        month_sessions = sorted((s for _, _, chunk in group for s in chunk), key=_key, reverse=descending)
+        for session in month_sessions:
+            if (start and session.date < start) or (end and session.date > end):
+                continue
+            if after is not None:
+                key = _key(session)
+                if (key == after and not inclusive) or (key < after if not descending else key > after):
+                    continue
+            yield session
+
+
+def sessions(user_id, start=None, end=None):
+    """기간 안의 보관된 세션 목록 (운동 종목은 채우지 않음, 보관 범위 밖이면 쿼리 없이 빈 목록)"""
+    if not overlaps(bounds(user_id), start, end):
+        return []
+    return list(iter_sessions(user_id, start, end))
+
+
+def with_exercises(archived):
+    """보관된 세션들의 운동 기록에 운동 종목 객체를 채운다 (쿼리 한 번)"""
+    ids = {record.exercise_id for session in archived for record in session.records}
+    if not ids:
+        return list(archived)
+    exercises = {exercise.id: exercise for exercise in Exercise.query.filter(Exercise.id.in_(ids))}
+    return [
+        session._replace(records=[record._replace(exercise=exercises.get(record.exercise_id)) for record in session.records])
+        for session in archived
+    ]
+
+
+def session_fetcher(query, user_id):
+    """운동 기록 목록(paginate)용 읽기 함수: 핫 테이블 query와 보관된 세션을 (date, id) 순서로 합친다
+
+    보관된 세션은 페이지가 보관 기간에 닿을 때만 읽는다. 운동 종목은 fill()로 채운다.
+    """
+    hot = query_fetcher(query, WorkoutSession)
+    span = bounds(user_id)
+    if span is None:
+        return hot
+
+    def fetch(cursor, descending, inclusive, limit):
+        rows = hot(cursor, descending, inclusive, limit)
+        start = end = None
+        if descending:
+            end = cursor[0] if cursor else None
+            if len(rows) == limit:
+                start = rows[-1].date  # 이보다 오래된 보관 세션은 이번 페이지에 들어오지 못함
+        else:
+            start = cursor[0] if cursor else None
+            if len(rows) == limit:
+                end = rows[-1].date
+        if not overlaps(span, start, end):
+            return rows
+        archived = iter_sessions(user_id, start, end, after=cursor, inclusive=inclusive, descending=descending)
+        return list(itertools.islice(heapq.merge(rows, archived, key=_key, reverse=descending), limit))
+
+    return fetch
+
+
+def fill(items):
+    """목록(session_fetcher로 읽은 페이지)의 보관된 세션에만 운동 종목을 채운다"""
+    filled = iter(with_exercises([session for session in items if session.archived]))
+    return [next(filled) if session.archived else session for session in items]
+
+
+def _write_chunk(user_id, month, chunk_sessions, chunk_records):
+    """달 하나의 묶음을 새로 쓴다 (기존 묶음은 지움)"""
+    archive_t = WorkoutArchive.__table__
+    db.session.execute(delete(archive_t).where(archive_t.c.user_id == user_id, archive_t.c.month == month))
+    chunk_sessions.sort(key=lambda row: (row[1], row[0]))
+    chunk_records.sort(key=lambda row: row[0])
+    db.session.execute(insert(archive_t).values(
+        user_id=user_id, month=month,
+        first_date=chunk_sessions[0][1], last_date=chunk_sessions[-1][1],
+        session_count=len(chunk_sessions), record_count=len(chunk_records),
+        payload=pack(chunk_sessions, chunk_records), created_at=datetime.utcnow()
+    ))
+
+
+def archive(before, user_id=None):
+    """before가 든 달보다 오래된 달의 세션과 기록을 보관 묶음으로 옮긴다
+
+    달 하나씩 커밋하므로 중간에 멈춰도 다시 실행하면 남은 달부터 이어서 옮긴다. 이미 보관된 달에
+    (가져오기 등으로) 새로 생긴 세션은 기존 묶음에 합친다. Moved를 돌려준다.
+    """
+    session_t = WorkoutSession.__table__
+    record_t = WorkoutRecord.__table__
+    archive_t = WorkoutArchive.__table__
+    cutoff = _month(before)
+
+    days = select(session_t.c.user_id, session_t.c.date).where(session_t.c.date < cutoff).distinct()
+    if user_id is not None:
+        days = days.where(session_t.c.user_id == user_id)
+    months = sorted({(row_user_id, _month(day)) for row_user_id, day in db.session.execute(days)})
+
+    total_sessions = total_records = 0
+    for month_user_id, month in months:
+        rows = db.session.execute(select(*[session_t.c[name] for name in SESSION_FIELDS]).where(
+            session_t.c.user_id == month_user_id,
+            session_t.c.date >= month,
+            session_t.c.date < _next_month(month)
+        )).all()
+        session_ids = [row.id for row in rows]
+        records = []
+        for batch in _batches(session_ids):
+            records.extend(db.session.execute(
+                select(*[record_t.c[name] for name in RECORD_FIELDS]).where(record_t.c.session_id.in_(batch))
+            ).all())
+
+        chunk_sessions = [tuple(row) for row in rows]
+        chunk_records = [tuple(row) for row in records]
+        payload = db.session.execute(select(archive_t.c.payload).where(
+            archive_t.c.user_id == month_user_id, archive_t.c.month == month
+        )).scalar()
+        if payload is not None:
+            for session in unpack(month_user_id, payload):
+                chunk_sessions.append(_session_row(session))
+                chunk_records.extend(_record_row(record) for record in session.records)
+        _write_chunk(month_user_id, month, chunk_sessions, chunk_records)
+
+        for batch in _batches(session_ids):
+            db.session.execute(delete(record_t).where(record_t.c.session_id.in_(batch)))
+            db.session.execute(delete(session_t).where(session_t.c.id.in_(batch)))
+        db.session.commit()
+        total_sessions += len(rows)
+        total_records += len(records)
+    return Moved(len(months), total_sessions, total_records, {month_user_id for month_user_id, _ in months})
+
+
+class IdConflict(Exception):
+    """보관된 행의 id를 핫 테이블의 다른 행이 쓰고 있음 (마이그레이션 13 전에 SQLite가 id를 다시 쓴 경우)"""
+
+
+def _insert_rows(table, fields, rows, user_id=None):
+    """보관된 행을 원래 id 그대로 다시 넣는다 (동기화 클라이언트와 삭제 기록이 아는 id 유지)"""
+    values = [dict(zip(fields, row)) for row in rows]
+    if user_id is not None:
+        for item in values:
+            item['user_id'] = user_id
+    if values:
+        db.session.execute(insert(table), values)
+
+
+def _taken(table, ids):
+    taken = set()
+    for batch in _batches(ids):
+        taken.update(db.session.execute(select(table.c.id).where(table.c.id.in_(batch))).scalars())
+    return taken
+
+
+def restore(user_id=None, start=None, end=None):
+    """기간에 걸친 달의 보관 묶음을 핫 테이블로 되돌린다 (달 단위, 묶음마다 커밋, id 유지). Moved를 돌려준다.
+
+    핫 테이블에 같은 id의 행이 이미 있으면 그 달은 되돌리지 않고 IdConflict를 낸다 (앞의 달은 이미 커밋됨).
+    """
+    session_t = WorkoutSession.__table__
+    record_t = WorkoutRecord.__table__
+    months = total_sessions = total_records = 0
+    user_ids = set()
+    archive_t = WorkoutArchive.__table__
+    for chunk_user_id, month, chunk in iter_chunks(None, user_id, start, end):
+        session_rows = [_session_row(session) for session in chunk]
+        record_rows = [_record_row(record) for session in chunk for record in session.records]
+        taken_sessions = _taken(session_t, [row[0] for row in session_rows])
+        taken_records = _taken(record_t, [row[0] for row in record_rows])
+        if taken_sessions or taken_records:
+            raise IdConflict(
+                f'{chunk_user_id}번 사용자의 {month:%Y-%m} 묶음: 세션 id {sorted(taken_sessions)}, '
+                f'기록 id {sorted(taken_records)}를 핫 테이블의 다른 행이 쓰고 있습니다.'
+            )
+
+        _insert_rows(session_t, SESSION_FIELDS, session_rows, user_id=chunk_user_id)
+        _insert_rows(record_t, RECORD_FIELDS, record_rows)
+        db.session.execute(delete(archive_t).where(archive_t.c.user_id == chunk_user_id, archive_t.c.month == month))
+        db.session.commit()
+        months += 1
+        total_sessions += len(session_rows)
+        total_records += len(record_rows)
+        user_ids.add(chunk_user_id)
+    return Moved(months, total_sessions, total_records, user_ids)
+
+
+def clear(user_id):
+    """사용자의 보관 묶음을 모두 지운다 (전체 운동 기록 삭제 시). 지운 (세션 id, 기록 id) 목록을 돌려준다.
+    커밋은 호출한 쪽에서 한다."""
+    session_ids, record_ids = [], []
+    for _, _, chunk in iter_chunks(None, user_id):
+        for session in chunk:
+            session_ids.append(session.id)
+            record_ids.extend(record.id for record in session.records)
+    archive_t = WorkoutArchive.__table__
+    db.session.execute(delete(archive_t).where(archive_t.c.user_id == user_id))
+    return session_ids, record_ids
+
+
+def find(user_id, entity, ids):
+    """보관된 세션/기록을 id로 찾는다 (델타 동기화에서 핫 테이블에 없는 행). {id: 행}
+
+    사용자의 묶음을 모두 풀어야 하므로 핫 테이블에서 못 찾은 행이 있을 때만 호출한다.
+    """
+    wanted = set(ids)
+    found = {}
+    for _, _, chunk in iter_chunks(None, user_id):
+        for session in chunk:
+            if entity == WorkoutSession.__tablename__ and session.id in wanted:
+                found[session.id] = session
+            elif entity == WorkoutRecord.__tablename__:
+                found.update((record.id, record) for record in session.records if record.id in wanted)
+        if len(found) == len(wanted):
+            break
+    return found
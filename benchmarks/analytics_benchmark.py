@@ -0,0 +1,161 @@
+"""
+분석 API 벤치마크: NumPy 배열 연산 vs 날짜별 파이썬 루프
+
+같은 합성 데이터에서 훈련 부하(7일/28일 이동 평균, ACWR), 부위별 주간 볼륨, 몸무게 추세를
+analytics.py의 배열 연산 버전과 날짜마다 창을 다시 더하는 단순 루프 버전으로 계산해
+결과가 같은지 확인하고 호출당 지연 시간을 비교한다. 기준값 비교(--check)는 배열 연산 버전만 한다.
+
+    python benchmarks/analytics_benchmark.py --days 90 365 730 --repeat 20
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+import common
+import analytics
+from models import db, DailyRollup, Exercise, WeightRecord, WorkoutRecord, WorkoutSession
+
+USER_ID = 1
+
+
+def naive_training_load(user_id, start, end):
+    first = start - timedelta(days=analytics.CHRONIC_DAYS - 1)
+    load = {
+        row.date: row.total_duration
+        for row in DailyRollup.query.filter(
+            DailyRollup.user_id == user_id, DailyRollup.date >= first, DailyRollup.date <= end
+        )
+    }
+    acute, chronic, ratio = [], [], []
+    day = start
+    while day <= end:
+        a = sum(load.get(day - timedelta(days=k), 0) for k in range(analytics.ACUTE_DAYS)) / analytics.ACUTE_DAYS
+        c = sum(load.get(day - timedelta(days=k), 0) for k in range(analytics.CHRONIC_DAYS)) / analytics.CHRONIC_DAYS
+        acute.append(a)
+        chronic.append(c)
+        ratio.append(a / c if c > 0 else None)
+        day += timedelta(days=1)
+    return {'acute': acute, 'chronic': chronic, 'acwr': ratio}
+
+
+def naive_body_part_volume(user_id, start, weeks):
+    end = start + timedelta(days=weeks * 7 - 1)
+    records = WorkoutRecord.query.join(WorkoutSession).join(Exercise).filter(
+        WorkoutSession.user_id == user_id, WorkoutSession.date >= start, WorkoutSession.date <= end
+    ).all()
+    totals = defaultdict(lambda: [0.0] * weeks)
+    for record in records:
+        week = (record.session.date - start).days // 7
+        totals[record.exercise.body_part][week] += (record.sets or 0) * (record.reps or 0) * (record.weight or 0)
+    return {'body_parts': dict(totals)}
+
+
+def naive_weight_trend(user_id, start, end, window=7):
+    first = start - timedelta(days=window - 1)
+    by_day = defaultdict(list)
+    for record in WeightRecord.query.filter(
+        WeightRecord.user_id == user_id, WeightRecord.date >= first, WeightRecord.date <= end
+    ):
+        by_day[record.date].append(record.weight)
+    measured = sorted((day, sum(values) / len(values)) for day, values in by_day.items())
+
+    def interpolated(day):
+        if not measured or day < measured[0][0] or day > measured[-1][0]:
+            return None
+        for (d0, w0), (d1, w1) in zip(measured, measured[1:]):
+            if d0 <= day <= d1:
+                return w0 + (w1 - w0) * (day - d0).days / (d1 - d0).days
+        return measured[-1][1]
+
+    smoothed = []
+    day = start
+    while day <= end:
+        values = [interpolated(day - timedelta(days=k)) for k in range(window)]
+        values = [v for v in values if v is not None]
+        smoothed.append(sum(values) / len(values) if values and interpolated(day) is not None else None)
+        day += timedelta(days=1)
+    return {'smoothed': smoothed}
+
+
+def _same(expected, actual):
+    """루프 버전(반올림 전)과 배열 연산 버전(소수 둘째 자리 반올림) 결과 비교"""
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(_same(expected[k], actual[k]) for k in expected)
+    if isinstance(expected, list):
+        return len(expected) == len(actual) and all(_same(e, a) for e, a in zip(expected, actual))
+    if expected is None or actual is None:
+        return expected is None and actual is None
+    return abs(expected - actual) <= 0.06
+
+
+def cases(days):
+    today = date.today()
+    start = today - timedelta(days=days - 1)
+    weeks = max(1, days // 7)
+    week_start = today - timedelta(days=today.weekday() + (weeks - 1) * 7)
+    return {
+        f'training_load_{days}d': (
+            lambda: naive_training_load(USER_ID, start, today),
+            lambda: analytics.training_load(USER_ID, start, today),
+        ),
+        f'body_part_volume_{weeks}w': (
+            lambda: naive_body_part_volume(USER_ID, week_start, weeks),
+            lambda: analytics.weekly_body_part_volume(USER_ID, week_start, weeks),
+        ),
+        f'weight_trend_{days}d': (
+            lambda: naive_weight_trend(USER_ID, start, today),
+            lambda: analytics.weight_trend(USER_ID, start, today),
+        ),
+    }
+
+
+def measure(func, repeat):
+    func()  # 워밍업
+    db.session.remove()
+    latencies = []
+    with common.QueryCounter(db.engine) as counter:
+        for _ in range(repeat):
+            t = time.perf_counter()
+            func()
+            latencies.append(time.perf_counter() - t)
+            db.session.remove()
+    result = common.summarize(latencies)
+    result['queries'] = common.per_call(counter.count, repeat)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='분석 API 벤치마크: NumPy 배열 연산 vs 날짜별 파이썬 루프')
+    common.add_arguments(parser)
+    parser.add_argument('--days', type=int, nargs='+', default=[90, 365, 730], help='분석 기간 (여러 개 가능)')
+    parser.add_argument('--repeat', type=int, default=20, help='함수별 반복 횟수')
+    args = parser.parse_args()
+
+    app, tmp = common.create_bench_app(args)
+    results = {}
+    status = 0
+    print(f'{"함수":<26} {"루프 p50":>10} {"NumPy p50":>10} {"배속":>7} {"결과":>6}')
+    with app.app_context():
+        for days in args.days:
+            for name, (naive, vectorized) in cases(days).items():
+                same = _same(naive(), {key: value for key, value in vectorized().items() if key in naive()})
+                db.session.remove()
+                slow = measure(naive, args.repeat)
+                fast = measure(vectorized, args.repeat)
+                results[name] = fast
+                print(f'{name:<26} {slow["p50"]:>8.2f}ms {fast["p50"]:>8.2f}ms '
+                      f'{slow["p50"] / max(fast["p50"], 1e-6):>6.1f}x {"같음" if same else "다름":>6}')
+                if not same:
+                    status = 1
+
+    status = common.finish(args, 'analytics', results) or status
+    if tmp is not None:
+        tmp.cleanup()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
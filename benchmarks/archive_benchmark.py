@@ -0,0 +1,108 @@
+"""
+운동 기록 보관(핫/콜드 분리) 벤치마크
+
+히스토리 길이(년)를 바꿔 가며 합성 데이터를 만들고, 주요 화면의 요청당 지연 시간과 쿼리 수를
+보관 전(전체가 핫 테이블)과 보관 후(--keep-days보다 오래된 달을 archive.archive()로 옮긴 뒤)로 잰다.
+보관 후 핫 경로 지연 시간은 전체 히스토리 길이와 상관없이 거의 같아야 한다.
+- hot: 대시보드, 운동 기록 첫 페이지, 이번 달 달력, 최근 30일 /api/workouts
+- cold: 보관된 달의 달력, 보관된 달에서 시작하는 운동 기록 페이지 (묶음을 풀어 합치는 비용)
+
+응답 캐시는 끄고 잰다 (매 요청이 DB를 읽도록). 기준값 비교(--check)는 가장 긴 히스토리의 보관 후 결과만 한다.
+
+    python benchmarks/archive_benchmark.py --years-list 1 4 8 --requests 50
+"""
+
+import argparse
+import copy
+import sys
+import time
+from datetime import date, timedelta
+
+import common
+
+import archive
+from models import db, WorkoutArchive, WorkoutSession
+
+
+def hot_paths(today):
+    recent = (today - timedelta(days=30)).isoformat()
+    return {
+        'dashboard': '/dashboard',
+        'workouts': '/workouts',
+        'calendar': f'/api/calendar?year={today.year}&month={today.month}',
+        'api_workouts_30d': f'/api/workouts?start={recent}',
+    }
+
+
+def cold_paths(today, keep_days):
+    old = (today - timedelta(days=keep_days + 120)).replace(day=1)
+    return {
+        'calendar_archived': f'/api/calendar?year={old.year}&month={old.month}',
+        'workouts_archived': f'/workouts?after={old.isoformat()}_0',
+    }
+
+
+def measure(app, path, requests, warmup):
+    client = app.test_client()
+    for _ in range(warmup):
+        client.get(path)
+    with app.app_context():
+        engine = db.engine
+    latencies = []
+    with common.QueryCounter(engine) as counter:
+        for _ in range(requests):
+            t = time.perf_counter()
+            response = client.get(path)
+            response.get_data()
+            latencies.append(time.perf_counter() - t)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path}: HTTP {response.status_code}')
+    result = common.summarize(latencies)
+    result['queries'] = common.per_call(counter.count, requests)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='운동 기록 보관 전후 핫 경로 지연 시간 (히스토리 길이별)')
+    common.add_arguments(parser)
+    parser.add_argument('--years-list', type=float, nargs='+', default=[1, 4, 8], help='합성 히스토리 길이 (년)')
+    parser.add_argument('--keep-days', type=int, default=365, help='핫 테이블에 남길 기간 (일)')
+    parser.add_argument('--requests', type=int, default=50, help='경로별 요청 수')
+    parser.add_argument('--warmup', type=int, default=5)
+    args = parser.parse_args()
+    args.no_cache = True
+
+    today = date.today()
+    results = {}
+    print(f'{"년":>4} {"경로":<18} {"보관 전 p50":>11} {"보관 후 p50":>11} {"쿼리 전/후":>10}')
+    for years in args.years_list:
+        run_args = copy.copy(args)
+        run_args.years = years
+        app, tmp = common.create_bench_app(run_args)
+
+        before = {name: measure(app, path, args.requests, args.warmup) for name, path in hot_paths(today).items()}
+        with app.app_context():
+            moved = archive.archive(today - timedelta(days=args.keep_days))
+            hot = WorkoutSession.query.count()
+            size = db.session.query(db.func.sum(db.func.length(WorkoutArchive.payload))).scalar() or 0
+        print(f'{years:>4g} 보관: 사용자×월 묶음 {moved.months}개, 세션 {moved.sessions:,}개 / 기록 {moved.records:,}개 '
+              f'→ {size / 1024:,.0f} KiB, 핫 세션 {hot:,}개')
+
+        after = {name: measure(app, path, args.requests, args.warmup) for name, path in hot_paths(today).items()}
+        for name in before:
+            print(f'{"":>4} {name:<18} {before[name]["p50"]:>9.2f}ms {after[name]["p50"]:>9.2f}ms '
+                  f'{before[name]["queries"]:>4g}/{after[name]["queries"]:<4g}')
+        cold = {name: measure(app, path, args.requests, args.warmup) for name, path in cold_paths(today, args.keep_days).items()}
+        for name, result in cold.items():
+            print(f'{"":>4} {name:<18} {"":>11} {result["p50"]:>9.2f}ms {"":>4} {result["queries"]:<4g}')
+
+        results = {f'hot {name}': result for name, result in after.items()}
+        results.update({f'cold {name}': result for name, result in cold.items()})
+        if tmp is not None:
+            tmp.cleanup()
+
+    return common.finish(args, 'archive', results)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
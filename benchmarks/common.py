@@ -0,0 +1,150 @@
+"""
+벤치마크 공용 도구: 합성 데이터가 채워진 앱 만들기, 지연 시간 통계, 쿼리 수 세기, 기준값 비교
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+import datagen
+import migrations
+from models import db, User
+from run import create_app
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def add_arguments(parser):
+    """벤치마크 스크립트 공통 옵션"""
+    parser.add_argument('--database', help='사용할 DB 주소 (비어 있으면 합성 데이터를 채움, 기본: 임시 SQLite)')
+    parser.add_argument('--users', type=int, default=3, help='합성 데이터 사용자 수')
+    parser.add_argument('--years', type=float, default=2, help='합성 데이터 기간 (년)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-cache', action='store_true', help='차트 API 응답 캐시 끄기')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='기준값 파일')
+    parser.add_argument('--save-baseline', action='store_true', help='이번 결과를 기준값으로 저장')
+    parser.add_argument('--check', action='store_true', help='기준값보다 느려졌거나 쿼리가 늘면 실패')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='허용하는 지연 시간 증가 비율')
+    parser.add_argument('--p95-floor', type=float, default=2.0,
+                        help='비율과 상관없이 허용하는 p95 증가량 (ms, 1ms 안팎 엔드포인트의 측정 잡음 흡수)')
+
+
+def create_bench_app(args):
+    """합성 데이터가 들어 있는 앱을 만든다 (임시 DB면 디렉터리 객체도 함께 돌려줘 수명을 묶는다)"""
+    tmp = None
+    database = args.database
+    if database is None:
+        tmp = tempfile.TemporaryDirectory()
+        database = 'sqlite:///' + os.path.join(tmp.name, 'bench.db')
+
+    app = create_app('production', {
+        'SQLALCHEMY_DATABASE_URI': database,
+        'RESPONSE_CACHE_BACKEND': 'null' if args.no_cache else 'lru',
+        'QUERY_BUDGET_ENFORCE': False,
+        'SLOW_QUERY_MS': None,
+    })
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        if db.session.query(User.id).first() is None:
+            users, sessions, records, weights = datagen.generate(args.users, args.years, args.seed)
+            print(f'합성 데이터: 사용자 {users}명, 세션 {sessions:,}개, 운동 기록 {records:,}개, 몸무게 기록 {weights:,}개')
+    return app, tmp
+
+
+def percentile(sorted_values, p):
+    """정렬된 값들의 p 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies):
+    """지연 시간(초) 목록 → 밀리초 단위 p50/p95/p99/평균"""
+    values = sorted(latencies)
+    return {
+        'p50': round(percentile(values, 50) * 1000, 3),
+        'p95': round(percentile(values, 95) * 1000, 3),
+        'p99': round(percentile(values, 99) * 1000, 3),
+        'mean': round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+    }
+
+
+def per_call(count, calls):
+    """쿼리 수 합계 → 호출당 쿼리 수 (정수, 워밍업이 끝난 호출만 세서 넘긴다)"""
+    return int(round(count / calls)) if calls else 0
+
+
+class QueryCounter:
+    """with 블록 안에서 엔진이 실행한 쿼리 수 (스레드 무관 합계)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._count)
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(path, section, results):
+    baseline = load_baseline(path)
+    baseline[section] = results
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def find_regressions(section, results, baseline, tolerance, p95_floor=2.0):
+    """기준값과 비교해 회귀 목록을 돌려준다
+
+    쿼리 수는 호출당 정수로 비교해 하나라도 늘면 회귀로 본다. p95 지연 시간은 기준값의 (1 + tolerance)배와
+    기준값 + p95_floor(ms) 중 큰 값을 넘으면 회귀로 본다 (1ms 안팎인 캐시 적중은 비율만으로는 잡음에 걸림).
+    """
+    expected = baseline.get(section, {})
+    regressions = []
+    for name, result in results.items():
+        base = expected.get(name)
+        if base is None:
+            continue
+        if round(result['queries']) > round(base['queries']):
+            regressions.append(f'{name}: 요청당 쿼리 {round(base["queries"])} → {round(result["queries"])}')
+        limit = max(base['p95'] * (1 + tolerance), base['p95'] + p95_floor)
+        if result['p95'] > limit:
+            regressions.append(f'{name}: p95 {base["p95"]:.1f}ms → {result["p95"]:.1f}ms (허용 {limit:.1f}ms)')
+    return regressions
+
+
+def finish(args, section, results):
+    """기준값 저장/비교를 처리하고 종료 코드를 돌려준다"""
+    if args.save_baseline:
+        save_baseline(args.baseline, section, results)
+        print(f'기준값을 저장했습니다: {args.baseline} [{section}]')
+    if args.check:
+        regressions = find_regressions(section, results, load_baseline(args.baseline), args.tolerance, args.p95_floor)
+        if regressions:
+            print('성능 회귀:')
+            for line in regressions:
+                print(f'  - {line}')
+            return 1
+        print('기준값 대비 회귀 없음')
+    return 0
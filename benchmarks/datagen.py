@@ -0,0 +1,213 @@
+"""
+합성 데이터 생성기
+
+사용자 N명 × M년치 운동 세션/기록과 몸무게 기록을 같은 시드면 항상 같은 값으로 만든다.
+
+- 사용자마다 주당 운동 횟수(2~5회), 선호 요일, 근력/유산소 비중이 다르고 가끔 1~3주씩 쉰다.
+- 근력 운동 무게는 종목별 시작 무게에서 천천히 늘고 날마다 조금씩 흔들린다.
+- 몸무게는 사용자별 추세를 따라 움직이며 2~3일에 한 번꼴로 기록된다.
+
+    python benchmarks/datagen.py --users 3 --years 2 --database sqlite:////tmp/bench.db
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+import changes
+import goal_engine
+import prs
+import rollups
+from models import db, Exercise, Goal, User, WeightRecord, WorkoutRecord, WorkoutSession
+
+# (이름, 부위, 난이도, 시작 무게 kg, 유산소 여부)
+CATALOG = [
+    ('벤치프레스', '가슴', '중급', 40, False),
+    ('인클라인 덤벨프레스', '가슴', '중급', 14, False),
+    ('스쿼트', '하체', '초급', 50, False),
+    ('레그프레스', '하체', '초급', 80, False),
+    ('데드리프트', '등', '고급', 60, False),
+    ('풀업', '등', '중급', 0, False),
+    ('바벨로우', '등', '중급', 40, False),
+    ('오버헤드프레스', '어깨', '중급', 25, False),
+    ('사이드 레터럴 레이즈', '어깨', '초급', 6, False),
+    ('바이셉 컬', '팔', '초급', 10, False),
+    ('트라이셉 익스텐션', '팔', '초급', 10, False),
+    ('플랭크', '코어', '초급', 0, False),
+    ('러닝', '유산소', '초급', 0, True),
+    ('사이클', '유산소', '초급', 0, True),
+]
+WEEKDAY_WEIGHT = (1.2, 1.1, 1.2, 1.0, 0.8, 0.7, 0.6)  # 월~일 운동 확률 가중치
+FLUSH_RECORDS = 20000
+
+
+def ensure_exercises():
+    """카탈로그 종목을 (없으면 만들어) {이름: (id, 시작 무게, 유산소 여부)}로 돌려준다"""
+    existing = {e.name: e for e in Exercise.query}
+    for name, body_part, difficulty, _, _ in CATALOG:
+        if name not in existing:
+            existing[name] = Exercise(name=name, body_part=body_part, difficulty=difficulty)
+            db.session.add(existing[name])
+    db.session.flush()
+    return {name: (existing[name].id, base, cardio) for name, _, _, base, cardio in CATALOG}
+
+
+def _user_profile(rng):
+    return {
+        'per_week': rng.uniform(2.0, 5.0),
+        'cardio_share': rng.uniform(0.1, 0.6),
+        'progression': rng.uniform(0.01, 0.04),  # 하루당 무게 증가 (시작 무게 40kg 종목 기준 kg, 종목별로 비례)
+        'start_weight': rng.uniform(58, 95),
+        'weight_trend': rng.uniform(-0.015, 0.01),  # 하루당 몸무게 변화 (kg)
+    }
+
+
+def _session_records(rng, exercises, profile, days_in):
+    strength = [name for name, (_, _, cardio) in exercises.items() if not cardio]
+    cardio = [name for name, (_, _, cardio) in exercises.items() if cardio]
+    records = []
+    for name in rng.sample(strength, rng.randint(3, 5)):
+        exercise_id, base, _ = exercises[name]
+        weight = 0.0
+        if base:
+            weight = round(max(base * 0.5, base + profile['progression'] * days_in * base / 40 + rng.gauss(0, base * 0.05)) * 2) / 2
+        sets = rng.randint(3, 5)
+        records.append({
+            'exercise_id': exercise_id, 'sets': sets, 'reps': rng.randint(5, 12),
+            'weight': weight, 'duration': sets * rng.randint(2, 4), 'distance': 0.0,
+        })
+    if rng.random() < profile['cardio_share']:
+        exercise_id, _, _ = exercises[rng.choice(cardio)]
+        distance = round(max(1.0, rng.gauss(5.5, 2.0)), 1)
+        records.append({
+            'exercise_id': exercise_id, 'sets': 1, 'reps': 1, 'weight': 0.0,
+            'duration': int(distance * rng.uniform(5.0, 7.5)), 'distance': distance,
+        })
+    return records
+
+
+def _flush(pending_sessions, pending_records):
+    if not pending_sessions:
+        return 0
+    session_ids = db.session.scalars(
+        insert(WorkoutSession).returning(WorkoutSession.id, sort_by_parameter_order=True),
+        pending_sessions
+    ).all()
+    rows = []
+    for session_id, records in zip(session_ids, pending_records):
+        for record in records:
+            record['session_id'] = session_id
+            rows.append(record)
+    db.session.execute(insert(WorkoutRecord), rows)
+    return len(rows)
+
+
+def generate(users=3, years=2, seed=42, end=None, progress=None):
+    """합성 데이터를 채우고 (사용자 수, 세션 수, 운동 기록 수, 몸무게 기록 수)를 돌려준다"""
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=int(365 * years) - 1)
+    exercises = ensure_exercises()
+
+    offset = db.session.query(db.func.count(User.id)).scalar()
+    totals = [0, 0, 0, 0]
+    for n in range(offset + 1, offset + users + 1):
+        user = User(username=f'user{n}', email=f'user{n}@example.com')
+        db.session.add(user)
+        db.session.flush()
+        profile = _user_profile(rng)
+        daily_p = profile['per_week'] / sum(WEEKDAY_WEIGHT)
+
+        pending_sessions, pending_records, pending_count = [], [], 0
+        weights = []
+        body_weight = profile['start_weight']
+        break_until = start
+        day = start
+        while day <= end:
+            days_in = (day - start).days
+            if day >= break_until and rng.random() < 1 / 120:
+                break_until = day + timedelta(days=rng.randint(7, 21))  # 휴가, 부상 등
+            if day >= break_until and rng.random() < daily_p * WEEKDAY_WEIGHT[day.weekday()]:
+                records = _session_records(rng, exercises, profile, days_in)
+                pending_sessions.append({
+                    'user_id': user.id,
+                    'date': day,
+                    'total_duration': sum(r['duration'] for r in records) + rng.randint(5, 15),
+                    'notes': rng.choice(['', '', '', '컨디션 좋음', '피곤함', '자세 점검', 'PR 도전']),
+                })
+                pending_records.append(records)
+                pending_count += len(records)
+                if pending_count >= FLUSH_RECORDS:
+                    totals[2] += _flush(pending_sessions, pending_records)
+                    totals[1] += len(pending_sessions)
+                    pending_sessions, pending_records, pending_count = [], [], 0
+
+            body_weight += profile['weight_trend'] + rng.gauss(0, 0.15)
+            if rng.random() < 0.4:
+                measured = round(body_weight + rng.gauss(0, 0.3), 1)
+                weights.append({
+                    'user_id': user.id,
+                    'date': day,
+                    'weight': measured,
+                    'body_fat_percentage': round(rng.uniform(12, 28), 1) if rng.random() < 0.5 else None,
+                    'muscle_mass': round(measured * rng.uniform(0.38, 0.45), 1) if rng.random() < 0.3 else None,
+                    'notes': None,
+                })
+            day += timedelta(days=1)
+
+        totals[2] += _flush(pending_sessions, pending_records)
+        totals[1] += len(pending_sessions)
+        if weights:
+            db.session.execute(insert(WeightRecord), weights)
+        totals[3] += len(weights)
+
+        db.session.add_all([
+            Goal(user_id=user.id, title='체중 감량', target_value=2, current_value=0, unit='kg',
+                 goal_type='monthly', metric='weight_loss', target_date=end + timedelta(days=60)),
+            Goal(user_id=user.id, title='주 4회 운동', target_value=4, current_value=0, unit='회',
+                 goal_type='weekly', metric='sessions', target_date=end + timedelta(days=7)),
+        ])
+        db.session.commit()
+        totals[0] += 1
+        if progress:
+            progress(n, totals)
+
+    rollups.rebuild()
+    prs.rebuild()
+    goal_engine.refresh()
+    changes.backfill()
+    db.session.commit()
+    return tuple(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 운동/몸무게 데이터 생성')
+    parser.add_argument('--users', type=int, default=3)
+    parser.add_argument('--years', type=float, default=2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=date.fromisoformat, help='마지막 날짜 (기본: 오늘)')
+    parser.add_argument('--database', required=True, help='채울 DB 주소 (예: sqlite:////tmp/bench.db)')
+    args = parser.parse_args()
+
+    from run import create_app
+    import migrations
+
+    app = create_app('production', {'SQLALCHEMY_DATABASE_URI': args.database})
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        users, sessions, records, weights = generate(
+            args.users, args.years, args.seed, args.end,
+            progress=lambda n, totals: print(f'  user{n}: 세션 {totals[1]:,}개, 기록 {totals[2]:,}개 (누적)')
+        )
+    print(f'사용자 {users}명, 세션 {sessions:,}개, 운동 기록 {records:,}개, 몸무게 기록 {weights:,}개를 만들었습니다.')
+
+
+if __name__ == '__main__':
+    main()
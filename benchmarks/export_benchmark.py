@@ -0,0 +1,90 @@
+"""
+내보내기 처리량/메모리 벤치마크
+
+임시 SQLite DB에 운동 기록을 채운 뒤 형식별로 내보내기를 끝까지 소비하면서
+초당 행 수와 tracemalloc 최대 메모리를 잰다. 행 수를 늘려도 최대 메모리가
+거의 같아야 스트리밍이 제대로 동작하는 것이다.
+
+    python benchmarks/export_benchmark.py --records 50000 200000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert
+
+import exporter
+from models import db, Exercise, WorkoutSession, WorkoutRecord
+
+RECORDS_PER_SESSION = 5
+
+
+def seed(record_count):
+    exercises = [Exercise(name=f'운동 {i}', body_part=part, difficulty='초급')
+                 for i, part in enumerate(['가슴', '등', '하체', '어깨', '팔', '유산소'])]
+    db.session.add_all(exercises)
+    db.session.flush()
+
+    start = date(2015, 1, 1)
+    session_count = record_count // RECORDS_PER_SESSION
+    session_ids = db.session.scalars(
+        insert(WorkoutSession).returning(WorkoutSession.id, sort_by_parameter_order=True),
+        [{'user_id': 1, 'date': start + timedelta(days=i // 2), 'total_duration': 60, 'notes': '벤치마크'}
+         for i in range(session_count)]
+    ).all()
+    db.session.execute(insert(WorkoutRecord), [
+        {'session_id': session_id, 'exercise_id': exercises[(n + j) % len(exercises)].id,
+         'sets': 3, 'reps': 10, 'weight': 40.0 + j * 2.5, 'duration': 10, 'distance': 0.0}
+        for n, session_id in enumerate(session_ids) for j in range(RECORDS_PER_SESSION)
+    ])
+    db.session.commit()
+    return session_count * RECORDS_PER_SESSION
+
+
+def measure(fmt, compress, rows):
+    """속도는 tracemalloc 없이, 최대 메모리는 tracemalloc을 켠 두 번째 실행에서 잰다"""
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in exporter.export_stream('records', fmt, compress=compress))
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in exporter.export_stream('records', fmt, compress=compress):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows / elapsed, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, nargs='+', default=[20000, 100000], help='운동 기록 수 (여러 개 가능)')
+    args = parser.parse_args()
+
+    print(f'{"기록 수":>10} {"형식":<14} {"행/초":>12} {"크기(bytes)":>14} {"최대 메모리":>12}')
+    for record_count in args.records:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = Flask(__name__)
+            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+            db.init_app(app)
+            with app.app_context():
+                db.create_all()
+                rows = seed(record_count)
+                for fmt in exporter.FORMATS:
+                    for compress in (False, True):
+                        rate, size, peak = measure(fmt, compress, rows)
+                        label = fmt + ('+gzip' if compress else '')
+                        print(f'{rows:>10,} {label:<14} {rate:>12,.0f} {size:>14,} {peak / 1024 / 1024:>10.1f}MB')
+                db.session.remove()
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
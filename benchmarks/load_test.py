@@ -0,0 +1,160 @@
+"""
+주요 화면/API 부하 테스트
+
+합성 데이터를 채운 앱에 엔드포인트별로 요청을 보내 p50/p95/p99 지연 시간, 처리량,
+요청당 쿼리 수(워밍업 제외)를 잰다.
+- client: Flask 테스트 클라이언트로 한 요청씩 (순수 앱 처리 시간)
+- http: 로컬 HTTP 서버(werkzeug, 스레드)를 띄우고 동시 연결 여러 개로 요청
+
+엔드포인트마다 두 번 잰다.
+- 적중: 워밍업 뒤 같은 요청을 반복 (응답/조각 캐시 적중)
+- 미스("경로 (miss)"): 요청마다 직전에 현재 사용자의 모든 데이터 범위를 무효화해 쓰기 직후처럼 캐시를 비움
+  (무효화는 시간/쿼리 수에 넣지 않고, 한 요청씩 순서대로)
+
+    python benchmarks/load_test.py --mode client --requests 200
+    python benchmarks/load_test.py --mode http --concurrency 8 --check
+"""
+
+import argparse
+import http.client
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import common
+
+import cache
+from models import db
+
+ENDPOINTS = [
+    '/dashboard',
+    '/workouts',
+    '/calendar',
+    '/api/calendar',
+    '/api/chart-data',
+    '/api/body-part-data',
+    '/api/prs',
+    '/api/weight-chart-data',
+    '/api/analytics/training-load',
+    '/api/analytics/body-part-volume',
+    '/api/analytics/weight-trend',
+]
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def client_fetch(app, path):
+    client = app.test_client()
+
+    def fetch():
+        response = client.get(path)
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f'{path}: HTTP {response.status_code}')
+    return fetch
+
+
+def http_fetch(port, path):
+    def fetch():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        conn.request('GET', path)
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        if response.status != 200:
+            raise RuntimeError(f'{path}: HTTP {response.status}')
+    return fetch
+
+
+def invalidator(app):
+    """기본 사용자의 모든 데이터 범위 버전을 올리는 함수 (다음 요청은 캐시 미스)"""
+    def invalidate():
+        with app.app_context():
+            for scope in cache.SCOPES:
+                cache.invalidate(scope, user_id=app.config['DEFAULT_USER_ID'])
+    return invalidate
+
+
+def measure(fetch, counter, requests, concurrency=1, before=None):
+    """(지연 시간 목록, 전체 시간, 요청당 쿼리 수) — before는 요청마다 시간/쿼리를 재기 전에 호출"""
+    queries = 0
+
+    def timed(_):
+        nonlocal queries
+        if before is not None:
+            before()
+        count = counter.count
+        t = time.perf_counter()
+        fetch()
+        elapsed = time.perf_counter() - t
+        queries += counter.count - count
+        return elapsed
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        count = counter.count
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = list(pool.map(timed, range(requests)))
+        queries = counter.count - count  # 동시 요청은 구간 합계로
+    else:
+        latencies = [timed(i) for i in range(requests)]
+    wall = time.perf_counter() - started if before is None else sum(latencies)  # 무효화 시간은 빼고
+    return latencies, wall, common.per_call(queries, requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='주요 화면/API 부하 테스트')
+    common.add_arguments(parser)
+    parser.add_argument('--mode', choices=['client', 'http'], default='client')
+    parser.add_argument('--requests', type=int, default=200, help='엔드포인트별 요청 수')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4, help='http 모드 동시 연결 수')
+    parser.add_argument('--endpoint', action='append', help='특정 엔드포인트만 (여러 번 지정 가능)')
+    args = parser.parse_args()
+
+    app, tmp = common.create_bench_app(args)
+    server = None
+    if args.mode == 'http':
+        server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    print(f'{"엔드포인트":<40} {"p50":>8} {"p95":>8} {"p99":>8} {"req/s":>9} {"쿼리/요청":>9}')
+    try:
+        with app.app_context():
+            engine = db.engine
+        for path in args.endpoint or ENDPOINTS:
+            fetch = client_fetch(app, path) if server is None else http_fetch(server.server_port, path)
+            for _ in range(args.warmup):
+                fetch()
+            runs = [
+                (path, {'concurrency': 1 if server is None else args.concurrency}),
+                (f'{path} (miss)', {'before': invalidator(app)}),
+            ]
+            for name, options in runs:
+                with common.QueryCounter(engine) as counter:
+                    latencies, wall, queries = measure(fetch, counter, args.requests, **options)
+                result = common.summarize(latencies)
+                result['rps'] = round(len(latencies) / wall, 1)
+                result['queries'] = queries
+                results[name] = result
+                print(f'{name:<40} {result["p50"]:>7.2f}ms {result["p95"]:>7.2f}ms {result["p99"]:>7.2f}ms '
+                      f'{result["rps"]:>9.1f} {result["queries"]:>9}')
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    status = common.finish(args, f'load-{args.mode}', results)
+    if tmp is not None:
+        tmp.cleanup()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
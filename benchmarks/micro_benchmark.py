@@ -0,0 +1,81 @@
+"""
+핵심 함수 마이크로 벤치마크
+
+HTTP/템플릿을 빼고 통계, 페이지네이션, 집계, 히스토리 읽기, 내보내기 함수만 반복 실행해
+호출당 지연 시간과 쿼리 수를 잰다.
+
+    python benchmarks/micro_benchmark.py --repeat 50 --check
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+import common
+import exporter
+import rollups
+from history import iter_session_batches
+from models import db, eager_records, WorkoutSession
+from pagination import paginate_desc
+from stats import compute_dashboard_stats
+
+
+def _workouts_first_page():
+    return paginate_desc(WorkoutSession.query.filter_by(user_id=1).options(eager_records()), WorkoutSession, per_page=10).items
+
+
+def _history_scan():
+    return sum(len(sessions) for sessions, _ in iter_session_batches(user_id=1))
+
+
+def _export_records_csv():
+    return sum(len(chunk) for chunk in exporter.export_stream('records', 'csv', user_id=1))
+
+
+CASES = {
+    'compute_dashboard_stats': lambda: compute_dashboard_stats(date.today(), user_id=1),
+    'workouts_first_page': _workouts_first_page,
+    'daily_totals_365d': lambda: rollups.daily_totals(date.today() - timedelta(days=365), date.today(), user_id=1),
+    'body_part_counts': lambda: rollups.body_part_counts(user_id=1),
+    'history_scan': _history_scan,
+    'export_records_csv': _export_records_csv,
+    'rollups_rebuild': lambda: (rollups.rebuild(), db.session.commit()),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='핵심 함수 마이크로 벤치마크')
+    common.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=30, help='함수별 반복 횟수')
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='특정 함수만 (여러 번 지정 가능)')
+    args = parser.parse_args()
+
+    app, tmp = common.create_bench_app(args)
+    results = {}
+    print(f'{"함수":<26} {"p50":>9} {"p95":>9} {"p99":>9} {"쿼리/호출":>9}')
+    with app.app_context():
+        for name in args.case or CASES:
+            func = CASES[name]
+            func()  # 워밍업
+            db.session.remove()
+            latencies = []
+            with common.QueryCounter(db.engine) as counter:
+                for _ in range(args.repeat):
+                    t = time.perf_counter()
+                    func()
+                    latencies.append(time.perf_counter() - t)
+                    db.session.remove()  # 호출마다 새 세션 (identity map 재사용 방지)
+            result = common.summarize(latencies)
+            result['queries'] = common.per_call(counter.count, args.repeat)
+            results[name] = result
+            print(f'{name:<26} {result["p50"]:>7.2f}ms {result["p95"]:>7.2f}ms {result["p99"]:>7.2f}ms {result["queries"]:>9}')
+
+    status = common.finish(args, 'micro', results)
+    if tmp is not None:
+        tmp.cleanup()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+운동 종목 검색 벤치마크: FTS5 색인 vs LIKE 스캔 vs 전체 목록을 읽어 파이썬으로 거르기
+
+합성 데이터 위에 운동 종목 N개(한글 이름 + 영어 별칭)를 더 넣고, 자동 완성에서 흔한 검색어
+(초성, 입력 중인 글자, 단어 중간, 영어 별칭)마다 세 방식의 호출당 지연 시간을 잰다.
+- fts: exercise_search.search() (FTS5 색인, 자모/초성 검색)
+- like: 이름/별칭/설명 LIKE '%검색어%' (FTS5가 없는 DB의 대체 경로, 자모/초성 검색 없음)
+- scan: 폼이 하던 대로 Exercise.query.all()로 전체를 읽어 파이썬에서 자모로 거름
+
+기준값 비교(--check)는 fts만 한다.
+
+    python benchmarks/search_benchmark.py --exercises 5000 --repeat 50
+"""
+
+import argparse
+import itertools
+import sys
+import time
+
+from sqlalchemy import insert
+
+import common
+import exercise_search
+from models import db, Exercise
+
+MODIFIERS = [('', ''), ('와이드', 'wide'), ('내로우', 'narrow'), ('리버스', 'reverse'), ('하프', 'half'),
+             ('일시정지', 'paused'), ('템포', 'tempo'), ('스탠딩', 'standing'), ('시티드', 'seated'), ('라잉', 'lying')]
+EQUIPMENT = [('바벨', 'barbell'), ('덤벨', 'dumbbell'), ('케이블', 'cable'), ('머신', 'machine'),
+             ('스미스 머신', 'smith machine'), ('케틀벨', 'kettlebell'), ('밴드', 'band'),
+             ('인클라인', 'incline'), ('디클라인', 'decline'), ('싱글 암', 'single arm')]
+MOVEMENTS = [('프레스', 'press', '가슴'), ('컬', 'curl', '팔'), ('로우', 'row', '등'), ('플라이', 'fly', '가슴'),
+             ('익스텐션', 'extension', '팔'), ('레이즈', 'raise', '어깨'), ('스쿼트', 'squat', '하체'),
+             ('런지', 'lunge', '하체'), ('풀다운', 'pulldown', '등'), ('데드리프트', 'deadlift', '등')]
+DIFFICULTIES = ('초급', '중급', '고급')
+
+QUERIES = ['ㅂㅊ', '벤ㅊ', '덤벨 프', '프레스', '케이블 로우', 'ㅋㅇㅂ', 'curl', 'smith', '스쿼', 'ㄹ']
+
+
+def add_catalog(count):
+    """합성 운동 종목 count개를 bulk INSERT하고 검색 색인을 다시 만든다"""
+    combos = itertools.product(range(count // 1000 + 1), MODIFIERS, EQUIPMENT, MOVEMENTS)
+    rows = []
+    for variant, (modifier, modifier_en), (equipment, equipment_en), (movement, movement_en, body_part) in combos:
+        if len(rows) == count:
+            break
+        suffix = f' {variant + 1}' if variant else ''
+        rows.append({
+            'name': ' '.join(filter(None, (modifier, equipment, movement))) + suffix,
+            'aliases': ' '.join(filter(None, (modifier_en, equipment_en, movement_en))) + suffix,
+            'body_part': body_part,
+            'difficulty': DIFFICULTIES[len(rows) % 3],
+            'description': f'{equipment}를 사용하는 {body_part} 운동',
+        })
+    db.session.execute(insert(Exercise), rows)
+    exercise_search.rebuild()
+    db.session.commit()
+
+
+def naive_scan(query):
+    """전체 목록을 읽고 이름/별칭 자모에 검색어 자모가 들어 있는 종목을 고름"""
+    key = exercise_search.jamo(''.join(query.split()))
+    matches = []
+    for exercise in Exercise.query.all():
+        names = [exercise.name] + exercise_search.split_aliases(exercise.aliases)
+        if any(key in exercise_search.jamo(''.join(name.split())) for name in names):
+            matches.append(exercise)
+    return matches[:20]
+
+
+def like_search(query):
+    return exercise_search._like_search(query.split(), None, None, 20)
+
+
+def measure(func, repeat):
+    func()  # 워밍업
+    db.session.remove()
+    latencies = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t)
+        db.session.remove()
+    return common.summarize(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='운동 종목 검색 벤치마크: FTS5 vs LIKE vs 전체 스캔')
+    common.add_arguments(parser)
+    parser.add_argument('--exercises', type=int, default=5000, help='추가할 합성 운동 종목 수')
+    parser.add_argument('--repeat', type=int, default=50, help='검색어별 반복 횟수')
+    args = parser.parse_args()
+
+    app, tmp = common.create_bench_app(args)
+    results = {}
+    print(f'{"검색어":<12} {"결과":>4} {"FTS5 p50":>10} {"LIKE p50":>10} {"스캔 p50":>10}')
+    with app.app_context():
+        if Exercise.query.count() < args.exercises:
+            add_catalog(args.exercises)
+        for query in QUERIES:
+            found = len(exercise_search.search(query))
+            fts = measure(lambda: exercise_search.search(query), args.repeat)
+            like = measure(lambda: like_search(query), args.repeat)
+            scan = measure(lambda: naive_scan(query), max(1, args.repeat // 10))
+            results[f'search {query}'] = fts
+            print(f'{query:<12} {found:>4} {fts["p50"]:>8.2f}ms {like["p50"]:>8.2f}ms {scan["p50"]:>8.2f}ms')
+
+    status = common.finish(args, 'search', results)
+    if tmp is not None:
+        tmp.cleanup()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
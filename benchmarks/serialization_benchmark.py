@@ -0,0 +1,144 @@
+"""
+JSON 직렬화 / 응답 압축 벤치마크
+
+엔드포인트마다 실제 응답을 한 번 받아 그 데이터를 다시 직렬화하면서
+- 직렬화 CPU: Flask 기본 provider(json, ASCII 이스케이프) vs serialization.py의 json / orjson 백엔드
+- 전송 바이트: ASCII 이스케이프 본문, UTF-8 본문, gzip, (brotli 패키지가 있으면) br, 압축 CPU
+를 비교하고, 압축을 받는 클라이언트(Accept-Encoding: gzip, br)로 요청했을 때의 지연 시간과 쿼리 수를 잰다.
+기준값 비교(--check)는 요청 지연 시간만 한다. HTML 화면은 직렬화 열을 비워 둔다.
+
+    python benchmarks/serialization_benchmark.py --years 4 --repeat 20
+"""
+
+import argparse
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+import common
+
+import compression
+import serialization
+from models import db
+
+ENDPOINTS = [
+    '/api/workouts',
+    '/api/export/records?format=jsonl&gzip=0',
+    '/api/changes?since=0&limit=1000',
+    '/api/calendar',
+    '/api/prs',
+    '/api/analytics/training-load?days=730',
+    '/api/analytics/body-part-volume?weeks=104',
+    '/api/analytics/weight-trend?days=730',
+    '/api/weight-series?range=all',
+    '/dashboard',
+]
+
+
+def p50(func, repeat):
+    func()  # 워밍업
+    latencies = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t)
+    return common.summarize(latencies)['p50']
+
+
+def parse_body(response, backend):
+    """JSON이면 (한 줄 단위 여부, 값 목록), 아니면 None"""
+    if response.mimetype == 'application/json':
+        return False, [backend.loads(response.get_data())]
+    if response.mimetype == 'application/x-ndjson':
+        return True, [backend.loads(line) for line in response.get_data().splitlines() if line]
+    return None
+
+
+def serializers(app):
+    """이름 → (값 목록, 한 줄 단위 여부) → bytes 함수"""
+    flask_default = DefaultJSONProvider(app)
+    backends = {'json': serialization.StdlibBackend()}
+    try:
+        backends['orjson'] = serialization.OrjsonBackend()
+    except ImportError:
+        pass
+
+    def flask_dumps(items, lines):
+        return b''.join(flask_default.dumps(item, separators=(',', ':'), sort_keys=not lines).encode('utf-8') + b'\n'
+                        for item in items)
+
+    funcs = {'flask': flask_dumps}
+    for name, backend in backends.items():
+        funcs[name] = lambda items, lines, dumps=backend.dumps: b''.join(dumps(item, sort_keys=not lines) + b'\n'
+                                                                          for item in items)
+    return funcs
+
+
+def measure_request(app, path, repeat):
+    client = app.test_client()
+    headers = {'Accept-Encoding': 'gzip, br'}
+    client.get(path, headers=headers).get_data()
+    with app.app_context():
+        engine = db.engine
+    latencies = []
+    with common.QueryCounter(engine) as counter:
+        for _ in range(repeat):
+            t = time.perf_counter()
+            client.get(path, headers=headers).get_data()
+            latencies.append(time.perf_counter() - t)
+    result = common.summarize(latencies)
+    result['queries'] = common.per_call(counter.count, repeat)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON 직렬화 백엔드와 응답 압축 비교 (엔드포인트별)')
+    common.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=20, help='엔드포인트별 반복 횟수')
+    args = parser.parse_args()
+
+    app, tmp = common.create_bench_app(args)
+    backend = app.extensions['json_backend']
+    funcs = serializers(app)
+    encodings = compression.available_encodings()
+    print(f'JSON 백엔드: {backend.name}, 압축: {", ".join(encodings)}')
+
+    client = app.test_client()
+    results = {}
+    cpu_header = ''.join(f'{name + " ms":>11}' for name in funcs)
+    wire_header = ''.join(f'{name + " B":>10}{name + " ms":>9}' for name in encodings)
+    print(f'{"엔드포인트":<44}{cpu_header}{"ASCII B":>10}{"UTF-8 B":>10}{wire_header}{"요청 p50":>11}')
+    for path in ENDPOINTS:
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path}: HTTP {response.status_code}')
+        body = response.get_data()
+        parsed = parse_body(response, backend)
+
+        cpu = ''
+        ascii_size = ''
+        if parsed is not None:
+            lines, items = parsed
+            cpu = ''.join(f'{p50(lambda f=f: f(items, lines), args.repeat):>11.3f}' for f in funcs.values())
+            ascii_size = len(funcs['flask'](items, lines))
+        else:
+            cpu = ''.join(f'{"-":>11}' for _ in funcs)
+        wire = ''
+        for encoding in encodings:
+            size = len(compression.compress(body, encoding, app.config))
+            elapsed = p50(lambda e=encoding: compression.compress(body, e, app.config), args.repeat)
+            wire += f'{size:>10,}{elapsed:>9.3f}'
+
+        results[path] = measure_request(app, path, args.repeat)
+        ascii_column = f'{ascii_size:>10,}' if ascii_size != '' else f'{"-":>10}'
+        print(f'{path:<44}{cpu}{ascii_column}{len(body):>10,}{wire}{results[path]["p50"]:>9.2f}ms')
+
+    status = common.finish(args, 'serialization', results)
+    if tmp is not None:
+        tmp.cleanup()
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
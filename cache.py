@@ -0,0 +1,276 @@
+"""
+차트 API 응답 캐시
+
+응답 본문을 (엔드포인트, 사용자, 날짜 구간, 쿼리 파라미터, 데이터 버전) 키로 캐시한다.
+쓰기 라우트는 invalidate()로 해당 데이터 범위(scope)의 버전만 올리고, 이전 버전 키의
+항목은 더 이상 조회되지 않다가 LRU/TTL로 자연히 사라진다.
+
+응답에는 ETag와 Last-Modified를 붙여 브라우저가 304로 재검증할 수 있게 한다.
+
+데이터 버전은 모든 워커와 작업 프로세스(flask run-worker)가 함께 봐야 한 곳의 쓰기가 다른 곳의 캐시 응답,
+ETag, 템플릿 조각(templating.py)을 무효화한다. 공유 백엔드(redis 등)는 백엔드에 버전을 두고,
+프로세스 내 백엔드(lru)는 버전만 DB의 cache_version 테이블(사용자 샤드별)에 둔다. 요청 안에서는
+읽은 버전을 기억해 두어 캐시를 쓰는 요청마다 버전 조회 쿼리는 한 번이다.
+
+백엔드
+- lru: 프로세스 내 LRU (기본값, 버전은 DB)
+- redis: 워커 간 공유 (redis 패키지 필요, RESPONSE_CACHE_REDIS_URL)
+- shared-local: 공유 백엔드와 같은 인터페이스의 프로세스 내 대용품 (테스트/개발용)
+- null: 캐시 끔
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import db, CacheVersion
+from tenancy import current_user_id
+
+SCOPES = ('workouts', 'weight', 'exercises')
+GLOBAL_SCOPES = ('exercises',)  # 사용자와 상관없이 모든 응답에 영향을 주는 데이터
+
+
+class NullBackend:
+    """아무것도 저장하지 않는 백엔드"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout=None):
+        pass
+
+    def get_version(self, name):
+        return 0
+
+    def incr_version(self, name):
+        return 0
+
+
+class LRUBackend:
+    """크기가 제한된 프로세스 내 LRU 캐시"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, name):
+        with self._lock:
+            return self._versions.get(name, 0)
+
+    def incr_version(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            return self._versions[name]
+
+
+class SharedBackend:
+    """redis 클라이언트 인터페이스(get/set/incr)를 쓰는 공유 캐시
+
+    client는 redis.Redis 또는 같은 메서드를 가진 객체(LocalSharedClient)면 된다.
+    """
+
+    def __init__(self, client, prefix='fitness:cache:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, timeout=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=timeout)
+
+    def get_version(self, name):
+        raw = self.client.get(self.prefix + 'version:' + name)
+        return int(raw) if raw is not None else 0
+
+    def incr_version(self, name):
+        return int(self.client.incr(self.prefix + 'version:' + name))
+
+
+class LocalSharedClient:
+    """SharedBackend에 넣을 수 있는 프로세스 내 redis 대용품 (만료 시간은 무시)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = value
+
+    def incr(self, key):
+        with self._lock:
+            self._data[key] = int(self._data.get(key, 0)) + 1
+            return self._data[key]
+
+
+class BackendVersions:
+    """백엔드 자체의 버전 카운터 (공유 백엔드는 이미 워커끼리 공유, null은 항상 0)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_many(self, names, related=()):
+        return [self.backend.get_version(name) for name in names]
+
+    def incr(self, name):
+        self.backend.incr_version(name)
+
+
+class DatabaseVersions:
+    """버전 카운터를 cache_version 테이블에 둔다 (프로세스 내 백엔드를 여러 워커가 쓸 때)
+
+    증가는 호출한 쪽 세션과 별도 연결의 짧은 트랜잭션으로 한다 (invalidate()는 커밋 후에 호출한다).
+    """
+
+    UPSERTS = {'sqlite': sqlite_insert, 'postgresql': postgresql_insert}
+
+    def _memo(self):
+        # 요청 안에서만 기억한다 (CLI/작업 워커는 매번 읽음)
+        return g.setdefault('cache_versions', {}) if has_request_context() else {}
+
+    def get_many(self, names, related=()):
+        """names의 버전 목록 (조회할 때 related도 같은 쿼리로 읽어 두어 요청 안의 다음 조회를 줄인다)"""
+        memo = self._memo()
+        missing = [name for name in names if name not in memo]
+        if missing:
+            missing += [name for name in related if name not in memo and name not in missing]
+            table = CacheVersion.__table__
+            found = dict(db.session.execute(
+                select(table.c.name, table.c.version).where(table.c.name.in_(missing))
+            ).all())
+            memo.update({name: found.get(name, 0) for name in missing})
+        return [memo[name] for name in names]
+
+    def incr(self, name):
+        table = CacheVersion.__table__
+        with db.session.get_bind().begin() as connection:
+            statement = self.UPSERTS[connection.dialect.name](table).values(name=name, version=1)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.name], set_={'version': table.c.version + 1}
+            ))
+        self._memo().pop(name, None)
+
+
+def create_backend(config):
+    """설정값에 맞는 캐시 백엔드를 만든다"""
+    name = config.get('RESPONSE_CACHE_BACKEND', 'lru')
+    if name == 'null':
+        return NullBackend()
+    if name == 'shared-local':
+        return SharedBackend(LocalSharedClient())
+    if name == 'redis':
+        import redis  # 선택 의존성
+        return SharedBackend(redis.Redis.from_url(config['RESPONSE_CACHE_REDIS_URL']))
+    return LRUBackend(config.get('RESPONSE_CACHE_MAX_ENTRIES', 512))
+
+
+def _version_name(scope, user_id):
+    return scope if scope in GLOBAL_SCOPES else f'{scope}:{user_id}'
+
+
+def create_versions(backend):
+    """백엔드에 맞는 버전 저장소 (프로세스 내 LRU면 DB, 아니면 백엔드 자체)"""
+    return DatabaseVersions() if isinstance(backend, LRUBackend) else BackendVersions(backend)
+
+
+class ResponseCache:
+    def __init__(self, backend, timeout=None, versions=None):
+        self.backend = backend
+        self.timeout = timeout
+        self.version_store = versions or create_versions(backend)
+
+    def versions(self, scopes, user_id):
+        """scope별 현재 데이터 버전 (키에 넣으면 invalidate() 후 새 키가 됨)"""
+        names = [_version_name(scope, user_id) for scope in scopes]
+        related = [_version_name(scope, user_id) for scope in SCOPES]
+        return ','.join(map(str, self.version_store.get_many(names, related)))
+
+    def make_key(self, endpoint, user_id, window, scopes):
+        versions = self.versions(scopes, user_id)
+        args = '&'.join(f'{k}={v}' for k, v in sorted(request.args.items(multi=True)))
+        return f'{endpoint}:{user_id}:{window}:{args}:{versions}'
+
+    def invalidate(self, scope, user_id=None):
+        """scope 데이터가 바뀌었음을 알린다 (커밋 후 호출)"""
+        self.version_store.incr(_version_name(scope, user_id))
+
+
+def get_cache():
+    return current_app.extensions['response_cache']
+
+
+def invalidate(scope, user_id=None):
+    """쓰기 라우트에서 호출: 해당 사용자(전역 scope는 전체)의 캐시 응답을 무효화"""
+    get_cache().invalidate(scope, user_id)
+
+
+def cached_response(scopes, user_id=current_user_id, window=lambda: datetime.now().date().isoformat()):
+    """JSON 응답을 캐시하고 ETag/Last-Modified로 조건부 요청(304)을 처리하는 데코레이터
+
+    scopes: 응답이 의존하는 데이터 범위 ('workouts', 'weight', 'exercises')
+    window: 응답의 날짜 구간을 나타내는 값 (기본은 오늘 날짜, 날짜가 바뀌면 키도 바뀜)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            key = cache.make_key(request.endpoint, user_id(), window(), scopes)
+            entry = cache.backend.get(key)
+            if entry is None:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                body = response.get_data(as_text=True)
+                entry = {
+                    'body': body,
+                    'mimetype': response.mimetype,
+                    'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+                    'last_modified': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+                }
+                cache.backend.set(key, entry, cache.timeout)
+
+            response = current_app.response_class(entry['body'], mimetype=entry['mimetype'])
+            response.set_etag(entry['etag'])
+            response.last_modified = datetime.fromisoformat(entry['last_modified'])
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    app.config.setdefault('RESPONSE_CACHE_BACKEND', 'lru')
+    app.config.setdefault('RESPONSE_CACHE_MAX_ENTRIES', 512)
+    app.config.setdefault('RESPONSE_CACHE_TIMEOUT', 24 * 60 * 60)
+    app.extensions['response_cache'] = ResponseCache(create_backend(app.config), app.config['RESPONSE_CACHE_TIMEOUT'])
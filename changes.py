@@ -0,0 +1,179 @@
+"""
+변경 기록과 델타 동기화 (/api/changes?since=<토큰>)
+
+운동 세션, 운동 기록, 몸무게 기록, 목표, 운동 종목 행이 추가/수정/삭제될 때마다 change_log에
+(사용자, 테이블, 행 id, upsert/delete) 한 줄을 남긴다. change_log.id는 커밋 순서대로 늘어나므로
+클라이언트는 마지막으로 받은 id(토큰) 이후의 변경만 받아 가면 되고, 동기화 트래픽이 전체 기록
+크기가 아니라 변경량에 비례한다. 삭제는 행을 지우고 delete 기록(삭제 표시)으로 남긴다.
+
+- ORM으로 쓰는 경우(폼, PATCH, /api/sync 등)는 flush 이벤트에서 자동으로 기록한다.
+- bulk INSERT/DELETE(대량 가져오기, 전체 삭제)는 log()/log_select()로 직접 기록해야 한다.
+- id 순서 = 커밋 순서가 되도록 SQLite는 쓰기 트랜잭션이 하나씩만 실행되고, Postgres는
+  기록을 남기기 전에 트랜잭션 단위 advisory lock을 잡는다.
+"""
+
+import heapq
+import itertools
+from datetime import date, datetime
+
+from sqlalchemy import event, insert, literal, select, text
+
+import archive
+from models import db, ChangeLog, Exercise, Goal, WeightRecord, WorkoutRecord, WorkoutSession
+from tenancy import TenantSession
+
+TRACKED = (WorkoutSession, WorkoutRecord, WeightRecord, Goal, Exercise)
+ENTITIES = {model.__tablename__: model for model in TRACKED}
+ARCHIVED = (WorkoutSession, WorkoutRecord)  # 오래되면 보관 묶음으로 옮겨지는 테이블 (archive.py)
+
+MAX_LIMIT = 2000
+_PG_LOCK_ID = 0x43484c47  # 'CHLG'
+
+
+def _serialize_lock(connection):
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:id)'), {'id': _PG_LOCK_ID})
+
+
+def _insert(connection, rows):
+    if rows:
+        _serialize_lock(connection)
+        connection.execute(insert(ChangeLog.__table__), rows)
+
+
+def _row(user_id, entity, entity_id, op, now):
+    return {'user_id': user_id, 'entity': entity, 'entity_id': entity_id, 'op': op, 'changed_at': now}
+
+
+def log(model, ids, user_id, op='upsert'):
+    """bulk로 쓴 행들의 변경을 기록한다. 커밋은 호출한 쪽에서 한다."""
+    now = datetime.utcnow()
+    _insert(db.session.connection(), [_row(user_id, model.__tablename__, i, op, now) for i in ids])
+
+
+def log_select(model, query, op='delete'):
+    """(user_id, id)를 고르는 select의 행들을 INSERT ... SELECT로 기록한다 (bulk DELETE 전에 호출)"""
+    query = query.subquery()
+    connection = db.session.connection()
+    _serialize_lock(connection)
+    connection.execute(insert(ChangeLog.__table__).from_select(
+        ['user_id', 'entity', 'entity_id', 'op', 'changed_at'],
+        select(query.c[0], literal(model.__tablename__), query.c[1], literal(op), literal(datetime.utcnow()))
+    ))
+
+
+def _session_users(session, session_ids):
+    """운동 기록의 session_id → 사용자 id (메모리에 있는 세션 먼저, 나머지는 쿼리 한 번)"""
+    users = {}
+    for obj in itertools.chain(session.identity_map.values(), session.deleted):
+        if isinstance(obj, WorkoutSession) and obj.id in session_ids:
+            users[obj.id] = obj.user_id
+    missing = session_ids - set(users)
+    if missing:
+        users.update(session.connection().execute(
+            select(WorkoutSession.id, WorkoutSession.user_id).where(WorkoutSession.id.in_(missing))
+        ).all())
+    return users
+
+
+def _after_flush(session, flush_context):
+    # after_flush에서도 new/dirty/deleted는 flush 전 상태를 보여준다 (새 행의 id는 이미 정해짐)
+    changed = itertools.chain(
+        ((obj, 'upsert') for obj in session.new),
+        ((obj, 'upsert') for obj in session.dirty if session.is_modified(obj, include_collections=False)),
+        ((obj, 'delete') for obj in session.deleted),
+    )
+    changed = [(obj, op) for obj, op in changed if isinstance(obj, TRACKED)]
+    if not changed:
+        return
+
+    users = _session_users(session, {obj.session_id for obj, _ in changed if isinstance(obj, WorkoutRecord)})
+    now = datetime.utcnow()
+    rows = []
+    for obj, op in changed:
+        if isinstance(obj, WorkoutRecord):
+            user_id = users.get(obj.session_id)
+        else:
+            user_id = getattr(obj, 'user_id', None)
+        rows.append(_row(user_id, obj.__tablename__, obj.id, op, now))
+    _insert(session.connection(), rows)
+
+
+def backfill(connection=None):
+    """지금 있는 모든 행을 upsert로 기록한다 (마이그레이션, 합성 데이터 생성 후)"""
+    execute = connection.execute if connection is not None else db.session.execute
+    now = datetime.utcnow()
+    columns = ['user_id', 'entity', 'entity_id', 'op', 'changed_at']
+    for model in TRACKED:
+        if model is WorkoutRecord:
+            user_id = WorkoutSession.user_id
+            source = select(user_id, literal(model.__tablename__), model.id, literal('upsert'), literal(now)).join(
+                WorkoutSession, WorkoutRecord.session_id == WorkoutSession.id
+            )
+        else:
+            user_id = getattr(model, 'user_id', literal(None))
+            source = select(user_id, literal(model.__tablename__), model.id, literal('upsert'), literal(now))
+        execute(insert(ChangeLog.__table__).from_select(columns, source.order_by(model.id)))
+
+
+def _json(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def row_to_dict(obj, table=None):
+    """행 객체 → 컬럼 이름별 값 dict (table: 보관된 행처럼 __table__이 없는 객체의 테이블)"""
+    table = table if table is not None else obj.__table__
+    return {column.key: _json(getattr(obj, column.key)) for column in table.columns}
+
+
+def changes_since(user_id, since=0, limit=500):
+    """토큰(since) 이후 사용자에게 보이는 변경 (같은 행은 마지막 변경 하나로 합침)
+
+    {'changes': [{'entity', 'id', 'op', 'data'}], 'next': 다음 토큰, 'has_more': 더 있는지}
+    upsert는 지금 행 내용을 data로 싣고, 그 사이 지워진 행은 delete로 돌려준다.
+    그 사이 보관된 세션/기록(archive.py)은 보관 묶음에서 찾아 upsert로 돌려준다.
+    """
+    # 사용자 행과 공용 행(운동 종목)을 각각 인덱스 순서로 limit만큼 읽어 합친다 (OR + 정렬보다 빠름)
+    log_rows = heapq.merge(*[
+        db.session.query(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op).filter(
+            ChangeLog.user_id == user_id if owner is not None else ChangeLog.user_id.is_(None),
+            ChangeLog.id > since
+        ).order_by(ChangeLog.id).limit(limit + 1).all()
+        for owner in (user_id, None)
+    ])
+    log_rows = list(itertools.islice(log_rows, limit + 1))
+    has_more = len(log_rows) > limit
+    log_rows = log_rows[:limit]
+
+    latest = {}
+    for row in log_rows:
+        key = (row.entity, row.entity_id)
+        latest.pop(key, None)  # 마지막 변경 순서로 다시 넣음
+        latest[key] = row.op
+
+    current = {}
+    for entity, model in ENTITIES.items():
+        ids = [entity_id for (name, entity_id), op in latest.items() if name == entity and op == 'upsert']
+        if ids:
+            current.update(((entity, obj.id), obj) for obj in model.query.filter(model.id.in_(ids)))
+        missing = [entity_id for entity_id in ids if (entity, entity_id) not in current]
+        if missing and model in ARCHIVED:
+            current.update(((entity, entity_id), row) for entity_id, row in archive.find(user_id, entity, missing).items())
+
+    result = []
+    for (entity, entity_id), op in latest.items():
+        obj = current.get((entity, entity_id)) if op == 'upsert' else None
+        if obj is None:
+            result.append({'entity': entity, 'id': entity_id, 'op': 'delete'})
+        else:
+            result.append({'entity': entity, 'id': entity_id, 'op': 'upsert', 'data': row_to_dict(obj, ENTITIES[entity].__table__)})
+    return {
+        'changes': result,
+        'next': str(log_rows[-1].id if log_rows else since),
+        'has_more': has_more,
+    }
+
+
+def init_app(app):
+    if not event.contains(TenantSession, 'after_flush', _after_flush):
+        event.listen(TenantSession, 'after_flush', _after_flush)
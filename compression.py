@@ -0,0 +1,149 @@
+"""
+응답 압축 (Content-Encoding)
+
+after_request에서 Accept-Encoding을 보고 응답 본문을 gzip으로 압축한다. brotli 패키지가 설치되어 있고
+클라이언트가 br을 gzip 이상으로 선호하면 br을 쓴다.
+
+- COMPRESS_MIMETYPES의 200 응답만 압축한다. 이미 Content-Encoding이 있는 응답(/api/export?gzip=1),
+  파일 전송(send_file), Cache-Control: no-transform 응답은 건드리지 않는다.
+- 본문이 COMPRESS_MIN_SIZE 바이트보다 작으면 그대로 보낸다 (압축 헤더/CPU가 이득보다 큼).
+- 스트리밍 응답(/api/workouts NDJSON, 내보내기)은 크기를 미리 알 수 없으므로 항상 압축하며,
+  조각이 나오는 대로 압축기에 넣어 흘려보낸다 (메모리에 본문 전체를 올리지 않음).
+- ETag가 붙은 응답(cache.cached_response)은 압축 결과를 (ETag, 인코딩) 키로 프로세스 내 LRU에 두어,
+  캐시된 응답을 다시 보낼 때 다시 압축하지 않는다. ETag는 약한(W/) ETag로 바꿔 If-None-Match 재검증(304)이
+  압축 여부와 상관없이 맞게 한다.
+- 압축 대상 응답에는 Vary: Accept-Encoding을 붙인다.
+"""
+
+import zlib
+
+from flask import current_app, request
+
+import cache
+
+try:
+    import brotli  # 선택 의존성
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson', 'image/svg+xml',
+)
+
+
+class GzipEncoder:
+    name = 'gzip'
+
+    def __init__(self, config):
+        self._compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    name = 'br'
+
+    def __init__(self, config):
+        self._compressor = brotli.Compressor(quality=config['COMPRESS_BR_QUALITY'])
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+ENCODERS = {'gzip': GzipEncoder, 'br': BrotliEncoder}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """Accept-Encoding에서 쓸 인코딩 ('br', 'gzip', 없으면 None)"""
+    gzip_quality = accept_encodings.quality('gzip')
+    if brotli is not None:
+        br_quality = accept_encodings.quality('br')
+        if br_quality > 0 and br_quality >= gzip_quality:
+            return 'br'
+    return 'gzip' if gzip_quality > 0 else None
+
+
+def compress(data, encoding, config):
+    """bytes 전체를 한 번에 압축한다"""
+    encoder = ENCODERS[encoding](config)
+    return encoder.compress(data) + encoder.finish()
+
+
+def _encode_stream(encoder, chunks):
+    try:
+        for chunk in chunks:
+            data = encoder.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            if data:
+                yield data
+        yield encoder.finish()
+    finally:
+        # 원래 제너레이터(stream_with_context)를 닫아 요청 컨텍스트 정리가 바로 일어나게 한다
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def _compressible(response, config):
+    return (
+        config['COMPRESS_ENABLED']
+        and request.method != 'HEAD'
+        and response.status_code == 200
+        and not response.direct_passthrough
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in config['COMPRESS_MIMETYPES']
+        and not response.cache_control.no_transform
+    )
+
+
+def _compress_response(response):
+    config = current_app.config
+    if not _compressible(response, config):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    if response.is_streamed:
+        response.response = _encode_stream(ENCODERS[encoding](config), response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < config['COMPRESS_MIN_SIZE']:
+            return response
+        store = current_app.extensions['compressed_responses']
+        key = f'{etag}:{encoding}' if etag and not weak else None
+        data = store.get(key) if key else None
+        if data is None:
+            data = compress(body, encoding, config)
+            if key:
+                store.set(key, data)
+        response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    """instrumentation.init_app() 다음에 호출한다 (요청 처리 시간에 압축 시간도 들어가도록)"""
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BR_QUALITY', 4)
+    app.config.setdefault('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES)
+    app.config.setdefault('COMPRESS_CACHE_ENTRIES', 256)
+    app.extensions['compressed_responses'] = cache.LRUBackend(app.config['COMPRESS_CACHE_ENTRIES'])
+    app.after_request(_compress_response)
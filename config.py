@@ -1,19 +1,87 @@
 import os
 from datetime import timedelta
 
+# 사용자 샤드 DB 주소 (쉼표로 구분, 예: sqlite:///shard0.db,sqlite:///shard1.db)
+USER_SHARD_URLS = [url.strip() for url in os.environ.get('USER_SHARD_URLS', '').split(',') if url.strip()]
+
 class Config:
     """기본 설정 클래스"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///fitness_tracker.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_RECORD_QUERIES = True
+    
+    # SQLite 연결마다 적용할 PRAGMA (동시 쓰기 대응, database.py 참고)
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 15000)),  # 밀리초
+        'synchronous': 'NORMAL',
+    }
+    
+    # Postgres 커넥션 풀 (워커 프로세스마다, gunicorn 스레드 수 이상으로)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = 30
+    DB_POOL_RECYCLE = 1800
+    
+    # 사용자 범위: 로그인 세션에 사용자가 없을 때 쓸 사용자 id
+    DEFAULT_USER_ID = int(os.environ.get('DEFAULT_USER_ID', 1))
+    # /users/switch/<id> (인증 없는 사용자 전환): 개발/테스트 설정에서만 켠다
+    USER_SWITCH_ENABLED = False
+    
+    # 사용자 샤딩 (tenancy.py 참고): 사용자마다 user_id % 샤드 수 번째 DB에 데이터를 둔다
+    SQLALCHEMY_BINDS = {f'shard{i}': url for i, url in enumerate(USER_SHARD_URLS)}
+    USER_SHARDS = list(SQLALCHEMY_BINDS)
+    
+    # 뷰별 쿼리 예산 초과 시 요청을 실패시킴 (기본은 경고 로그만)
+    QUERY_BUDGET_ENFORCE = os.environ.get('QUERY_BUDGET_ENFORCE', 'false').lower() in ['true', 'on', '1']
+    
+    # 이 시간(밀리초)보다 오래 걸린 쿼리는 파라미터와 함께 경고 로그로 남김
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    
+    # 샘플링 프로파일러: 가장 느린 요청 PROFILER_KEEP개의 스택을 PROFILER_DIR에 folded 형식으로 저장
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() in ['true', 'on', '1']
+    PROFILER_INTERVAL_MS = 5
+    PROFILER_KEEP = 20
+    PROFILER_DIR = os.environ.get('PROFILER_DIR')  # 기본: instance/profiles
     
     # 세션 설정
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
     
+    # 차트 API 응답 캐시 (lru, redis, shared-local, null)
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'lru')
+    RESPONSE_CACHE_MAX_ENTRIES = 512
+    RESPONSE_CACHE_TIMEOUT = 24 * 60 * 60  # 공유 백엔드 항목 만료 (초)
+    RESPONSE_CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # JSON 직렬화 (serialization.py): auto(orjson이 설치되어 있으면 orjson), orjson, json
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'auto')
+    
+    # 응답 압축 (compression.py): gzip, brotli 패키지가 있으면 br도. COMPRESS_MIN_SIZE 바이트보다 작은 응답은 그대로
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+    COMPRESS_LEVEL = 6  # gzip 1~9
+    COMPRESS_BR_QUALITY = 4  # brotli 0~11 (동적 응답이라 낮게)
+    
+    # 템플릿 (templating.py 참고): 시작할 때 모든 템플릿 미리 컴파일, 컴파일 결과 파일 위치, 조각 캐시 크기
+    TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', 'false').lower() in ['true', 'on', '1']
+    TEMPLATE_BYTECODE_DIR = os.environ.get('TEMPLATE_BYTECODE_DIR')
+    TEMPLATE_FRAGMENT_MAX_ENTRIES = 1024
+    
+    # 백그라운드 작업 큐 (jobs.py 참고): 웹 프로세스 안 워커 스레드 수 (0이면 flask run-worker로 따로 실행)
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 0))
+    JOB_POLL_INTERVAL = 1.0  # 초
+    JOB_MAX_ATTEMPTS = 3
+    JOB_RETRY_DELAY = 30  # 첫 재시도까지 대기 (초, 시도마다 두 배)
+    JOB_TIMEOUT = 60 * 60  # 이보다 오래 running이면 다른 워커가 다시 가져감 (초)
+    JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR')  # 내보내기 결과 파일 (기본: instance/jobs)
+    JOB_FILE_TTL = int(os.environ.get('JOB_FILE_TTL', 24 * 60 * 60))  # 내보내기 결과 파일을 지우기까지 (초)
+    
     # 페이지네이션 설정
     POSTS_PER_PAGE = 10
     
+    # 운동 기록 보관 (archive.py): flask archive-workouts가 이 일수보다 오래된 달을 압축 묶음으로 옮김
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 730))
+    
     # 파일 업로드 설정
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     UPLOAD_FOLDER = 'static/uploads'
@@ -28,18 +96,24 @@ class Config:
 class DevelopmentConfig(Config):
     """개발 환경 설정"""
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or 'sqlite:///fitness_tracker_dev.db'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DEV_DATABASE_URL') or 'sqlite:///fitness_tracker.db'
+    USER_SWITCH_ENABLED = True
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 1))  # 개발 서버 하나로 작업까지 실행
 
 class TestingConfig(Config):
     """테스트 환경 설정"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    QUERY_BUDGET_ENFORCE = True
+    RESPONSE_CACHE_BACKEND = 'shared-local'
+    USER_SWITCH_ENABLED = True
 
 class ProductionConfig(Config):
     """프로덕션 환경 설정"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///fitness_tracker.db'
+    TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', 'true').lower() in ['true', 'on', '1']
     
     # 로깅 설정
     LOG_TO_STDOUT = os.environ.get('LOG_TO_STDOUT')
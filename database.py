@@ -0,0 +1,54 @@
+"""
+DB 백엔드별 엔진 설정
+
+SQLite: 연결마다 WAL 모드, busy_timeout, synchronous=NORMAL PRAGMA를 적용한다.
+    WAL에서는 읽기가 쓰기를 막지 않고, 쓰기 락이 잡혀 있으면 busy_timeout 동안 기다리므로
+    여러 워커가 동시에 기록할 때 "database is locked" 오류가 나지 않는다.
+Postgres: 커넥션 풀 크기/오버플로/재활용 시간과 pool_pre_ping을 설정한다.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+
+def normalize_database_url(url):
+    """Heroku 등이 주는 postgres:// 주소를 SQLAlchemy가 읽는 postgresql:// 로 바꾼다"""
+    if url and url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def engine_options(url, config):
+    """SQLALCHEMY_ENGINE_OPTIONS 기본값 (SQLite는 PRAGMA로 설정하므로 비어 있음)"""
+    backend = make_url(url).get_backend_name()
+    if backend == 'postgresql':
+        return {
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 1800),
+            'pool_pre_ping': True,
+        }
+    return {}
+
+
+def _sqlite_pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return set_pragmas
+
+
+def init_app(app):
+    """create_app에서 db.init_app 다음에 호출: SQLite 엔진에 PRAGMA 리스너를 붙인다"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragma_listener(pragmas))
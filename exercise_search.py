@@ -0,0 +1,249 @@
+"""
+운동 종목 검색 (/api/exercises/search)
+
+SQLite FTS5 가상 테이블 exercise_search(rowid = exercise.id)에 운동 종목의 검색 키를 넣어 두고
+자동 완성 검색을 인덱스로 처리한다. 한글은 자모로 풀어 색인하므로 입력 중인 글자("벤ㅊ"),
+초성("ㅂㅊㅍㄹㅅ"), 단어 중간("프레스")으로도 찾을 수 있다.
+
+- name_keys: 이름 전체와 단어별 자모 (이름이 입력으로 시작하면 가장 높은 순위)
+- alias_keys: 다른 이름(별칭)의 자모
+- infix_keys: 음절마다 자른 뒷부분과 초성 (단어 중간/초성 검색)
+- body_part, description: 원문 그대로
+
+색인은 운동 종목을 ORM으로 쓸 때 flush 이벤트에서 같은 트랜잭션으로 갱신하고, rebuild()는
+전체를 다시 만든다. FTS5가 없는 DB(Postgres 등)에서는 이름/별칭/설명 LIKE 검색으로 대신한다
+(자모/초성 검색 없음).
+"""
+
+import itertools
+import logging
+import re
+import weakref
+
+from sqlalchemy import event, or_, select, text
+from sqlalchemy.exc import OperationalError
+
+from models import db, Exercise
+from tenancy import TenantSession
+
+logger = logging.getLogger(__name__)
+
+MAX_LIMIT = 50
+MAX_QUERY_LENGTH = 100
+
+# bm25 열 가중치 (name_keys, alias_keys, infix_keys, body_part, description)
+WEIGHTS = (10.0, 5.0, 1.0, 1.0, 0.5)
+
+_CREATE = (
+    'CREATE VIRTUAL TABLE IF NOT EXISTS exercise_search USING fts5('
+    'name_keys, alias_keys, infix_keys, body_part, description, '
+    "tokenize = 'unicode61', prefix = '1 2 3 4 5 6')"
+)
+_DELETE = text('DELETE FROM exercise_search WHERE rowid = :id')
+_INSERT = text(
+    'INSERT INTO exercise_search (rowid, name_keys, alias_keys, infix_keys, body_part, description) '
+    'VALUES (:id, :name_keys, :alias_keys, :infix_keys, :body_part, :description)'
+)
+
+_WORDS = re.compile(r'\w+')
+_ALIAS_SEPARATORS = re.compile(r'[,\n]')
+
+_CHO = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_JUNG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+_JONG = ' ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ'  # 첫 칸은 받침 없음
+# 겹모음/겹받침은 자판으로 치는 순서대로 나눈다 (입력 중인 "고"도 "과"와 맞도록)
+_SPLIT = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ',
+}
+
+_indexed_engines = weakref.WeakSet()
+
+
+def _syllable(char):
+    """한글 음절이면 0~11171, 아니면 None"""
+    code = ord(char) - 0xAC00
+    return code if 0 <= code < 11172 else None
+
+
+def jamo(value):
+    """소문자로 바꾸고 한글 음절을 자모로 푼다 ("벤치" → "ㅂㅔㄴㅊㅣ")"""
+    parts = []
+    for char in value.lower():
+        code = _syllable(char)
+        if code is None:
+            parts.append(_SPLIT.get(char, char))
+            continue
+        parts.append(_CHO[code // 588])
+        parts.append(_SPLIT.get(_JUNG[code % 588 // 28], _JUNG[code % 588 // 28]))
+        if code % 28:
+            parts.append(_SPLIT.get(_JONG[code % 28], _JONG[code % 28]))
+    return ''.join(parts)
+
+
+def initials(value):
+    """한글 음절의 초성만 ("벤치프레스" → "ㅂㅊㅍㄹㅅ")"""
+    return ''.join(_CHO[code // 588] for code in map(_syllable, value) if code is not None)
+
+
+def split_aliases(aliases):
+    return [alias.strip() for alias in _ALIAS_SEPARATORS.split(aliases or '') if alias.strip()]
+
+
+def _whole_and_words(value):
+    """붙여 쓴 전체와 (여러 단어면) 단어별 자모"""
+    words = _WORDS.findall(value.lower())
+    keys = [jamo(''.join(words))] if words else []
+    if len(words) > 1:
+        keys.extend(jamo(word) for word in words)
+    return keys, words
+
+
+def search_keys(name, aliases=None):
+    """운동 종목 하나의 색인 값 (name_keys, alias_keys, infix_keys)"""
+    name_keys, words = _whole_and_words(name)
+    alias_keys = []
+    infix_keys = [initials(''.join(words))]
+    for alias in split_aliases(aliases):
+        keys, alias_words = _whole_and_words(alias)
+        alias_keys.extend(keys)
+        words = words + alias_words
+        infix_keys.append(initials(''.join(alias_words)))
+    for word in words:
+        infix_keys.append(initials(word))
+        infix_keys.extend(jamo(word[i:]) for i in range(1, len(word)) if _syllable(word[i]) is not None)
+    return (
+        ' '.join(dict.fromkeys(name_keys)),
+        ' '.join(dict.fromkeys(alias_keys)),
+        ' '.join(key for key in dict.fromkeys(infix_keys) if key),
+    )
+
+
+def _index_row(id, name, aliases, body_part, description):
+    name_keys, alias_keys, infix_keys = search_keys(name, aliases)
+    return {
+        'id': id, 'name_keys': name_keys, 'alias_keys': alias_keys, 'infix_keys': infix_keys,
+        'body_part': body_part, 'description': description or '',
+    }
+
+
+def has_index(connection):
+    """이 DB에 FTS5 색인 테이블이 있는지 (있다고 확인한 엔진은 다시 묻지 않음)"""
+    if connection.dialect.name != 'sqlite':
+        return False
+    if connection.engine in _indexed_engines:
+        return True
+    found = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'exercise_search'")
+    ).first() is not None
+    if found:
+        _indexed_engines.add(connection.engine)
+    return found
+
+
+def create_index(connection):
+    """FTS5 색인 테이블을 만든다 (SQLite가 아니거나 FTS5가 없으면 건너뜀)"""
+    if connection.dialect.name != 'sqlite':
+        return
+    try:
+        connection.execute(text(_CREATE))
+    except OperationalError:
+        logger.warning('SQLite FTS5를 쓸 수 없어 운동 종목 검색은 LIKE로 처리합니다.')
+
+
+def rebuild(connection=None):
+    """운동 종목 전체로 색인을 다시 만든다 (마이그레이션, 대량 입력 후)"""
+    connection = connection if connection is not None else db.session.connection()
+    if not has_index(connection):
+        return
+    rows = connection.execute(select(
+        Exercise.id, Exercise.name, Exercise.aliases, Exercise.body_part, Exercise.description
+    )).all()
+    connection.execute(text('DELETE FROM exercise_search'))
+    if rows:
+        connection.execute(_INSERT, [_index_row(*row) for row in rows])
+
+
+def _after_flush(session, flush_context):
+    changed = [obj for obj in itertools.chain(session.new, session.dirty) if isinstance(obj, Exercise)]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Exercise)]
+    if not changed and not deleted:
+        return
+    connection = session.connection()
+    if not has_index(connection):
+        return
+    connection.execute(_DELETE, [{'id': obj.id} for obj in changed + deleted])
+    if changed:
+        connection.execute(_INSERT, [
+            _index_row(obj.id, obj.name, obj.aliases, obj.body_part, obj.description) for obj in changed
+        ])
+
+
+def _match_expression(words):
+    """검색어 단어마다 (자모 키 앞부분 일치 OR 부위/설명 앞부분 일치), 단어끼리는 AND"""
+    return ' AND '.join(
+        f'({{name_keys alias_keys infix_keys}} : "{jamo(word)}"* OR {{body_part description}} : "{word}"*)'
+        for word in words
+    )
+
+
+def to_dict(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'body_part': row.body_part,
+        'difficulty': row.difficulty,
+        'aliases': split_aliases(row.aliases),
+    }
+
+
+def _browse(body_part, difficulty):
+    query = db.session.query(
+        Exercise.id, Exercise.name, Exercise.body_part, Exercise.difficulty, Exercise.aliases
+    )
+    if body_part:
+        query = query.filter(Exercise.body_part == body_part)
+    if difficulty:
+        query = query.filter(Exercise.difficulty == difficulty)
+    return query
+
+
+def _like_search(words, body_part, difficulty, limit):
+    query = _browse(body_part, difficulty)
+    for word in words:
+        pattern = '%' + word.replace('\\', '\\\\').replace('_', '\\_') + '%'
+        query = query.filter(or_(
+            Exercise.name.ilike(pattern, escape='\\'),
+            Exercise.aliases.ilike(pattern, escape='\\'),
+            Exercise.description.ilike(pattern, escape='\\'),
+        ))
+    return query.order_by(db.func.length(Exercise.name), Exercise.name).limit(limit).all()
+
+
+def search(query, body_part=None, difficulty=None, limit=20):
+    """검색어로 운동 종목을 찾아 순위대로 돌려준다 (검색어가 비면 이름순 목록)"""
+    words = _WORDS.findall(query[:MAX_QUERY_LENGTH].lower())
+    if not words:
+        rows = _browse(body_part, difficulty).order_by(Exercise.name).limit(limit).all()
+    elif has_index(db.session.connection()):
+        rows = db.session.execute(text(
+            'SELECT exercise.id, exercise.name, exercise.body_part, exercise.difficulty, exercise.aliases '
+            'FROM exercise_search JOIN exercise ON exercise.id = exercise_search.rowid '
+            'WHERE exercise_search MATCH :match '
+            'AND (:body_part IS NULL OR exercise.body_part = :body_part) '
+            'AND (:difficulty IS NULL OR exercise.difficulty = :difficulty) '
+            f'ORDER BY bm25(exercise_search, {", ".join(map(str, WEIGHTS))}), length(exercise.name), exercise.id '
+            'LIMIT :limit'
+        ), {
+            'match': _match_expression(words), 'body_part': body_part or None,
+            'difficulty': difficulty or None, 'limit': limit,
+        }).all()
+    else:
+        rows = _like_search(words, body_part, difficulty, limit)
+    return [to_dict(row) for row in rows]
+
+
+def init_app(app):
+    if not event.contains(TenantSession, 'after_flush', _after_flush):
+        event.listen(TenantSession, 'after_flush', _after_flush)
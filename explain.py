@@ -0,0 +1,88 @@
+"""
+EXPLAIN 기반 인덱스 사용 검사
+
+주요 라우트를 테스트 클라이언트로 호출하면서 실행된 SELECT 문을 모은 뒤,
+각 문장에 EXPLAIN QUERY PLAN을 실행해 핫 테이블을 인덱스 없이 훑는(SCAN) 쿼리가
+있는지 확인한다. 현재는 SQLite 전용이다.
+"""
+
+import re
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from models import db
+
+HOT_TABLES = ('workout_session', 'workout_record', 'weight_record')
+
+CHECKED_ROUTES = [
+    '/dashboard',
+    '/workouts',
+    '/weight',
+    '/goals',
+    '/api/calendar',
+    '/api/chart-data',
+    '/api/body-part-data',
+    '/api/prs',
+    '/api/weight-chart-data',
+    '/api/workouts',
+    '/api/analytics/training-load',
+    '/api/analytics/body-part-volume',
+    '/api/analytics/weight-trend',
+    '/api/weight-series?range=all',
+    '/api/changes',
+    '/api/exercises/search?q=ㅂㅊ',
+]
+
+_SCAN_RE = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+_WHERE_RE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+
+
+def capture_queries(client, path):
+    """path를 GET으로 호출하는 동안 실행된 SELECT 문과 파라미터 목록"""
+    captured = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(Engine, 'before_cursor_execute', _capture)
+    try:
+        response = client.get(path)
+        response.get_data()  # 스트리밍 응답도 끝까지 실행
+    finally:
+        event.remove(Engine, 'before_cursor_execute', _capture)
+    return captured
+
+
+def full_scans(plan, statement):
+    """쿼리 플랜에서 인덱스 없이 훑는 핫 테이블 목록
+
+    WHERE 절이 없는 전체 집계(예: 누적 운동 시간)는 어차피 전체를 읽어야 하므로 제외한다.
+    """
+    if not _WHERE_RE.search(statement):
+        return []
+    tables = []
+    for detail in plan:
+        match = _SCAN_RE.match(detail.strip())
+        if match and match.group(1) in HOT_TABLES:
+            tables.append(match.group(1))
+    return tables
+
+
+def check_routes(app, paths=CHECKED_ROUTES):
+    """라우트별 쿼리 플랜을 검사해 (경로, SQL, 플랜, 풀스캔 테이블) 목록을 돌려준다"""
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            raise RuntimeError('EXPLAIN 검사는 SQLite에서만 지원됩니다.')
+
+    client = app.test_client()
+    report = []
+    for path in paths:
+        for statement, parameters in capture_queries(client, path):
+            with app.app_context():
+                with db.engine.connect() as conn:
+                    rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            plan = [row[-1] for row in rows]
+            report.append((path, statement, plan, full_scans(plan, statement)))
+    return report
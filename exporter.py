@@ -0,0 +1,244 @@
+"""
+사용자 기록 내보내기 (CSV / JSON Lines / 컬럼형 바이너리)
+
+운동 세션, 운동 기록, 몸무게 기록을 yield_per로 CHUNK_SIZE 행씩 읽어 바로 직렬화하고,
+필요하면 gzip으로 압축하면서 bytes 조각을 흘려보낸다. 히스토리 길이와 상관없이
+메모리에는 한 청크 분량만 올라간다. 보관된 운동 기록(archive.py)도 날짜 순서대로 합쳐서 내보낸다.
+
+컬럼형 포맷 (FTC1, 분석용)
+    파일 헤더: b'FTC1' + uint32 스키마 길이 + 스키마 JSON [[컬럼 이름, 타입], ...]
+    행 그룹(청크마다 하나): uint32 행 수 + 컬럼별 블록, 마지막에 행 수 0인 그룹으로 끝난다.
+    컬럼 블록: uint8 null 여부 배열(행 수 바이트) + 값
+        int   → int64 배열,  float → float64 배열,  date → int32 (1970-01-01부터 일수)
+        str   → uint32 길이 배열 + UTF-8 바이트
+    모든 숫자는 little-endian. read_columnar()로 다시 읽을 수 있다.
+"""
+
+import csv
+import heapq
+import io
+import itertools
+import json
+import operator
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+import archive
+import serialization
+from models import db, Exercise, WeightRecord, WorkoutSession, WorkoutRecord
+
+CHUNK_SIZE = 2000
+DATASETS = ('sessions', 'records', 'weight')
+FORMATS = ('csv', 'jsonl', 'columnar')
+EPOCH = date(1970, 1, 1)
+
+
+def _dataset_query(dataset, user_id):
+    """데이터 종류별 (스키마 [(컬럼 이름, 타입)], 날짜순 SELECT 문)"""
+    if dataset == 'sessions':
+        columns = [
+            ('id', 'int', WorkoutSession.id),
+            ('date', 'date', WorkoutSession.date),
+            ('total_duration', 'int', WorkoutSession.total_duration),
+            ('notes', 'str', WorkoutSession.notes),
+        ]
+        stmt = select(*[c[2] for c in columns]).where(WorkoutSession.user_id == user_id).order_by(
+            WorkoutSession.date, WorkoutSession.id
+        )
+    elif dataset == 'records':
+        columns = [
+            ('id', 'int', WorkoutRecord.id),
+            ('session_id', 'int', WorkoutRecord.session_id),
+            ('date', 'date', WorkoutSession.date),
+            ('exercise', 'str', Exercise.name),
+            ('body_part', 'str', Exercise.body_part),
+            ('sets', 'int', WorkoutRecord.sets),
+            ('reps', 'int', WorkoutRecord.reps),
+            ('weight', 'float', WorkoutRecord.weight),
+            ('duration', 'int', WorkoutRecord.duration),
+            ('distance', 'float', WorkoutRecord.distance),
+        ]
+        stmt = select(*[c[2] for c in columns]).join(
+            WorkoutSession, WorkoutRecord.session_id == WorkoutSession.id
+        ).outerjoin(
+            Exercise, WorkoutRecord.exercise_id == Exercise.id
+        ).where(WorkoutSession.user_id == user_id).order_by(WorkoutSession.date, WorkoutRecord.id)
+    elif dataset == 'weight':
+        columns = [
+            ('id', 'int', WeightRecord.id),
+            ('date', 'date', WeightRecord.date),
+            ('weight', 'float', WeightRecord.weight),
+            ('body_fat_percentage', 'float', WeightRecord.body_fat_percentage),
+            ('muscle_mass', 'float', WeightRecord.muscle_mass),
+            ('notes', 'str', WeightRecord.notes),
+        ]
+        stmt = select(*[c[2] for c in columns]).where(WeightRecord.user_id == user_id).order_by(
+            WeightRecord.date, WeightRecord.id
+        )
+    else:
+        raise ValueError(f'알 수 없는 데이터 종류입니다: {dataset}')
+    return [(name, kind) for name, kind, _ in columns], stmt
+
+
+def _archived_rows(dataset, user_id):
+    """보관된 세션/기록(archive.py)을 _dataset_query와 같은 컬럼 순서의 튜플로 (날짜, id 순서)"""
+    sessions = archive.iter_sessions(user_id)
+    if dataset == 'sessions':
+        for session in sessions:
+            yield session.id, session.date, session.total_duration, session.notes
+        return
+    # 기록은 날짜 안에서 기록 id 순서 (세션 순서가 아님)
+    for day, group in itertools.groupby(sessions, key=lambda session: session.date):
+        group = archive.with_exercises(list(group))
+        records = sorted((record for session in group for record in session.records), key=lambda record: record.id)
+        for r in records:
+            yield (r.id, r.session_id, day, r.name, r.body_part, r.sets, r.reps, r.weight, r.duration, r.distance)
+
+
+def iter_chunks(dataset, user_id=1, chunk_size=CHUNK_SIZE):
+    """(스키마, 행 청크 제너레이터)를 돌려준다. 행은 컬럼 순서의 튜플.
+
+    보관된 운동 기록이 있으면 날짜 순서대로 합쳐서 chunk_size씩 다시 나눈다.
+    """
+    schema, stmt = _dataset_query(dataset, user_id)
+
+    def chunks():
+        result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+        if dataset == 'weight' or archive.bounds(user_id) is None:
+            yield from result.partitions()
+            return
+        names = [name for name, _ in schema]
+        merged = heapq.merge(
+            itertools.chain.from_iterable(result.partitions()), _archived_rows(dataset, user_id),
+            key=operator.itemgetter(names.index('date'), names.index('id'))
+        )
+        while True:
+            chunk = list(itertools.islice(merged, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    return schema, chunks()
+
+
+# 포맷별 직렬화 (행 청크 → bytes)
+
+def _csv_chunks(schema, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in schema])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _jsonl_chunks(schema, chunks):
+    names = [name for name, _ in schema]
+    for rows in chunks:
+        yield serialization.dumps_lines(dict(zip(names, row)) for row in rows)  # 날짜는 ISO 문자열로
+
+
+def _encode_column(kind, values):
+    nulls = bytes(1 if v is None else 0 for v in values)
+    if kind == 'int':
+        data = array('q', (v or 0 for v in values))
+    elif kind == 'float':
+        data = array('d', (v or 0.0 for v in values))
+    elif kind == 'date':
+        data = array('i', ((v - EPOCH).days if v is not None else 0 for v in values))
+    else:
+        encoded = [(v or '').encode('utf-8') for v in values]
+        lengths = array('I', (len(b) for b in encoded))
+        if sys.byteorder == 'big':
+            lengths.byteswap()
+        return nulls + lengths.tobytes() + b''.join(encoded)
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return nulls + data.tobytes()
+
+
+def _columnar_chunks(schema, chunks):
+    header = json.dumps(schema).encode('utf-8')
+    yield b'FTC1' + struct.pack('<I', len(header)) + header
+    for rows in chunks:
+        parts = [struct.pack('<I', len(rows))]
+        for index, (_, kind) in enumerate(schema):
+            parts.append(_encode_column(kind, [row[index] for row in rows]))
+        yield b''.join(parts)
+    yield struct.pack('<I', 0)
+
+
+def gzip_chunks(chunks, level=6):
+    """bytes 조각들을 gzip 스트림으로 압축하면서 흘려보낸다"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset, fmt, user_id=1, compress=False, chunk_size=CHUNK_SIZE):
+    """dataset을 fmt로 직렬화한 bytes 조각 제너레이터"""
+    if fmt not in FORMATS:
+        raise ValueError(f'지원하지 않는 형식입니다: {fmt}')
+    schema, chunks = iter_chunks(dataset, user_id, chunk_size)
+    writer = {'csv': _csv_chunks, 'jsonl': _jsonl_chunks, 'columnar': _columnar_chunks}[fmt]
+    stream = writer(schema, chunks)
+    return gzip_chunks(stream) if compress else stream
+
+
+def export_filename(dataset, fmt, compress=False):
+    extension = {'csv': 'csv', 'jsonl': 'jsonl', 'columnar': 'ftc'}[fmt]
+    return f'fitness_{dataset}.{extension}' + ('.gz' if compress else '')
+
+
+# 컬럼형 포맷 읽기
+
+def _read_exact(stream, size):
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError('컬럼형 파일이 중간에 끝났습니다.')
+    return data
+
+
+def read_columnar(stream):
+    """FTC1 스트림을 읽어 (스키마, 행 그룹별 {컬럼 이름: 값 리스트}) 제너레이터를 돌려준다"""
+    if _read_exact(stream, 4) != b'FTC1':
+        raise ValueError('FTC1 파일이 아닙니다.')
+    (length,) = struct.unpack('<I', _read_exact(stream, 4))
+    schema = json.loads(_read_exact(stream, length))
+
+    def groups():
+        while True:
+            (count,) = struct.unpack('<I', _read_exact(stream, 4))
+            if count == 0:
+                return
+            columns = {}
+            for name, kind in schema:
+                nulls = _read_exact(stream, count)
+                if kind == 'str':
+                    lengths = struct.unpack(f'<{count}I', _read_exact(stream, 4 * count))
+                    blob = _read_exact(stream, sum(lengths))
+                    values, offset = [], 0
+                    for size in lengths:
+                        values.append(blob[offset:offset + size].decode('utf-8'))
+                        offset += size
+                else:
+                    code, size = {'int': ('q', 8), 'float': ('d', 8), 'date': ('i', 4)}[kind]
+                    values = list(struct.unpack(f'<{count}{code}', _read_exact(stream, size * count)))
+                    if kind == 'date':
+                        values = [EPOCH + timedelta(days=v) for v in values]
+                columns[name] = [None if null else v for null, v in zip(nulls, values)]
+            yield columns
+
+    return schema, groups()
@@ -0,0 +1,246 @@
+"""
+목표 진행률 엔진
+
+목표(Goal)마다 측정 방법(metric)과 기간(goal_type: weekly/monthly/yearly)이 있고, current_value와
+is_achieved는 지금 기간(달력 기준 이번 주/달/해, 목표 날짜가 지났으면 목표 날짜가 든 기간) 안의
+값으로 저장해 둔다. 목표 화면과 대시보드는 저장된 값만 읽는다.
+
+- 운동 횟수/시간/거리/운동한 날 수: 일일 집계(DailyRollup)가 flush될 때 바뀐 양(이전 값과의 차이)을
+  기간 안에 든 목표에 더한다. 집계는 운동 기록을 쓰는 모든 경로(폼, PATCH, /api/sync, 가져오기)가
+  같은 트랜잭션에서 고치므로 목표도 함께 바뀐다.
+- 최장 연속 운동일, 체중 감량: 더하기로 나타낼 수 없어서 관련 집계/몸무게 기록이 바뀌면 그 목표만
+  기간 안의 집계(최대 366행)나 인덱스로 찾는 몸무게 기록 두 개로 다시 계산한다.
+  체중 감량은 기간 시작 직전(없으면 기간 첫) 기록 대비 기간 마지막 기록이 줄어든 양이다.
+- 기간이 바뀐 목표는 읽을 때(load) 새 기간으로 넘기고 다시 계산한다.
+- 일일 집계를 bulk로 지우거나 다시 만든 뒤(전체 삭제, rebuild-rollups)에는 refresh()를 호출해야 한다.
+
+ORM 이벤트에서는 after_flush에서 바뀐 양을 모아 두었다가 after_flush_postexec에서 목표에 반영한다
+(flush 도중에 고친 객체는 그 flush의 상태 정리에 덮일 수 있음). 커밋 중이면 바로 이어지는 flush로 저장된다.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import case, event, func, inspect, select, update
+
+from models import db, DailyRollup, Goal, WeightRecord
+from tenancy import TenantSession
+
+# 측정 방법 → (이름, 기본 단위). 단위로 측정 방법을 고를 때는 먼저 나오는 쪽을 쓴다.
+METRICS = {
+    'sessions': ('운동 횟수', '회'),
+    'duration': ('운동 시간 (분)', '분'),
+    'distance': ('운동 거리 (km)', 'km'),
+    'streak': ('최장 연속 운동일', '일'),
+    'workout_days': ('운동한 날 수', '일'),
+    'weight_loss': ('체중 감량 (기간 시작 체중 대비)', 'kg'),
+    'manual': ('직접 입력', None),
+}
+UNIT_METRICS = {}
+for _metric, (_, _unit) in METRICS.items():
+    if _unit is not None:
+        UNIT_METRICS.setdefault(_unit, _metric)
+
+PERIODS = {'weekly': '이번 주', 'monthly': '이번 달', 'yearly': '올해'}
+
+# 일일 집계 변화량 (세션 수, 운동 시간, 거리, 운동한 날 수)으로 더하는 측정 방법
+_ADDITIVE = ('sessions', 'duration', 'distance', 'workout_days')
+_ROLLUP_COLUMNS = ('session_count', 'total_duration', 'distance')
+_PENDING = 'goal_engine.pending'
+
+
+def window(goal_type, target_date, today):
+    """지금 기간의 (시작일, 마지막 날) - 목표 날짜가 지났으면 목표 날짜가 든 기간"""
+    day = min(today, target_date) if target_date else today
+    if goal_type == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if goal_type == 'yearly':
+        return date(day.year, 1, 1), date(day.year, 12, 31)
+    start = day.replace(day=1)
+    return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def _longest_run(days):
+    """오름차순 날짜 목록에서 하루씩 이어지는 가장 긴 구간의 길이"""
+    best = run = 0
+    previous = None
+    for day in days:
+        run = run + 1 if previous is not None and (day - previous).days == 1 else 1
+        best = max(best, run)
+        previous = day
+    return best
+
+
+def _weight_loss(execute, user_id, start, end):
+    weights = select(WeightRecord.weight).where(WeightRecord.user_id == user_id)
+    latest = execute(weights.where(WeightRecord.date <= end).order_by(
+        WeightRecord.date.desc(), WeightRecord.id.desc()
+    ).limit(1)).scalar()
+    if latest is None:
+        return 0
+    baseline = execute(weights.where(WeightRecord.date < start).order_by(
+        WeightRecord.date.desc(), WeightRecord.id.desc()
+    ).limit(1)).scalar()
+    if baseline is None:
+        baseline = execute(weights.where(WeightRecord.date >= start, WeightRecord.date <= end).order_by(
+            WeightRecord.date, WeightRecord.id
+        ).limit(1)).scalar()
+    return baseline - latest if baseline is not None else 0
+
+
+def compute(execute, user_id, metric, start, end):
+    """기간 안의 측정값을 원본 대신 일일 집계와 몸무게 인덱스로 계산한다"""
+    in_window = (DailyRollup.user_id == user_id, DailyRollup.date >= start, DailyRollup.date <= end)
+    if metric == 'weight_loss':
+        return _weight_loss(execute, user_id, start, end)
+    if metric == 'streak':
+        return _longest_run(execute(select(DailyRollup.date).where(*in_window).order_by(DailyRollup.date)).scalars())
+    if metric == 'workout_days':
+        return execute(select(func.count()).select_from(DailyRollup).where(*in_window)).scalar()
+    column = getattr(DailyRollup, _ROLLUP_COLUMNS[_ADDITIVE.index(metric)])
+    return execute(select(func.coalesce(func.sum(column), 0)).where(*in_window)).scalar()
+
+
+def _achieved(value, target_value):
+    return bool(target_value) and target_value > 0 and value >= target_value
+
+
+def set_progress(goal, value):
+    """진행 값과 달성 여부를 함께 바꾼다"""
+    goal.current_value = round(value, 2)
+    goal.is_achieved = _achieved(goal.current_value, goal.target_value)
+
+
+def recompute(goal, today=None, execute=None):
+    """목표를 지금 기간으로 맞추고 (직접 입력이 아니면) 진행 값을 다시 계산한다. 커밋은 호출한 쪽에서 한다."""
+    start, end = window(goal.goal_type, goal.target_date, today or date.today())
+    goal.period_start = start
+    if goal.metric not in (None, 'manual'):
+        set_progress(goal, compute(execute or db.session.execute, goal.user_id, goal.metric, start, end))
+
+
+def load(user_id, today):
+    """사용자의 목표 (기간이 바뀐 자동 목표는 새 기간으로 넘겨 둠). 커밋은 호출한 쪽에서 한다."""
+    goals = Goal.query.filter_by(user_id=user_id).all()
+    for goal in goals:
+        if goal.metric != 'manual' and goal.period_start != window(goal.goal_type, goal.target_date, today)[0]:
+            recompute(goal, today)
+    return goals
+
+
+def commit_rollovers():
+    """load()가 기간이 바뀐 목표를 새 기간으로 넘겼을 때만 커밋한다 (보통의 조회 요청은 쓰지 않음)"""
+    if any(isinstance(obj, Goal) and db.session.is_modified(obj) for obj in db.session.dirty):
+        db.session.commit()
+
+
+def infer_metrics(connection=None):
+    """직접 입력으로 남아 있는 목표의 측정 방법을 단위로 정한다 (마이그레이션)"""
+    execute = connection.execute if connection is not None else db.session.execute
+    execute(update(Goal.__table__).where(
+        Goal.__table__.c.metric == 'manual', Goal.__table__.c.unit.in_(list(UNIT_METRICS))
+    ).values(metric=case(UNIT_METRICS, value=Goal.__table__.c.unit)))
+
+
+def refresh(connection=None, user_id=None, today=None):
+    """자동 목표의 진행 값을 지금 기간 기준으로 모두 다시 계산한다
+
+    일일 집계를 bulk로 바꾼 뒤(전체 삭제, 재구성, 합성 데이터 생성)와 마이그레이션에서 호출한다.
+    connection이 없으면 ORM으로 고쳐서 변경 기록(changes.py)에도 남는다.
+    """
+    today = today or date.today()
+    if connection is None:
+        query = Goal.query.filter(Goal.metric != 'manual')
+        if user_id is not None:
+            query = query.filter(Goal.user_id == user_id)
+        for goal in query:
+            recompute(goal, today)
+        return
+
+    goal_t = Goal.__table__
+    query = select(goal_t.c.id, goal_t.c.user_id, goal_t.c.metric, goal_t.c.goal_type,
+                   goal_t.c.target_date, goal_t.c.target_value).where(goal_t.c.metric != 'manual')
+    if user_id is not None:
+        query = query.where(goal_t.c.user_id == user_id)
+    for row in connection.execute(query).all():
+        start, end = window(row.goal_type, row.target_date, today)
+        value = round(compute(connection.execute, row.user_id, row.metric, start, end), 2)
+        connection.execute(update(goal_t).where(goal_t.c.id == row.id).values(
+            current_value=value, is_achieved=_achieved(value, row.target_value), period_start=start
+        ))
+
+
+def _committed(obj, key):
+    history = inspect(obj).attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(obj, key)
+
+
+def _rollup_values(obj, committed=False):
+    """일일 집계 행 하나가 목표에 더하는 값 (세션 수, 운동 시간, 거리, 운동한 날 수)"""
+    get = _committed if committed else getattr
+    return [get(obj, key) or 0 for key in _ROLLUP_COLUMNS] + [1]
+
+
+def _after_flush(session, flush_context):
+    # 이 flush 전후 일일 집계의 차이와 몸무게 기록이 바뀐 사용자를 모아 둔다
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+    weight_users = set()
+    for obj in session.new:
+        if isinstance(obj, DailyRollup):
+            deltas[obj.user_id, obj.date] = _rollup_values(obj)
+        elif isinstance(obj, WeightRecord):
+            weight_users.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, DailyRollup):
+            old, new = _rollup_values(obj, committed=True), _rollup_values(obj)
+            delta = deltas[obj.user_id, obj.date]
+            delta[:] = [a + n - o for a, o, n in zip(delta, old, new)]
+        elif isinstance(obj, WeightRecord) and session.is_modified(obj):
+            weight_users.add(obj.user_id)
+    for obj in session.deleted:
+        if isinstance(obj, DailyRollup):
+            delta = deltas[obj.user_id, obj.date]
+            delta[:] = [a - o for a, o in zip(delta, _rollup_values(obj, committed=True))]
+        elif isinstance(obj, WeightRecord):
+            weight_users.add(obj.user_id)
+
+    deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+    if deltas or weight_users:
+        session.info[_PENDING] = (deltas, weight_users)
+
+
+def _after_flush_postexec(session, flush_context):
+    pending = session.info.pop(_PENDING, None)
+    if pending is None:
+        return
+    deltas, weight_users = pending
+    today = date.today()
+    goals = session.query(Goal).filter(
+        Goal.user_id.in_({user_id for user_id, _ in deltas} | weight_users),
+        Goal.metric != 'manual'
+    )
+    for goal in goals:
+        if goal.metric == 'weight_loss':
+            if goal.user_id in weight_users:
+                recompute(goal, today, session.execute)
+            continue
+        start, end = window(goal.goal_type, goal.target_date, today)
+        changed = [
+            delta for (user_id, day), delta in deltas.items()
+            if user_id == goal.user_id and start <= day <= end
+        ]
+        if not changed:
+            continue
+        if goal.period_start != start or goal.metric not in _ADDITIVE:
+            recompute(goal, today, session.execute)
+        else:
+            position = _ADDITIVE.index(goal.metric)
+            set_progress(goal, (goal.current_value or 0) + sum(delta[position] for delta in changed))
+
+
+def init_app(app):
+    if not event.contains(TenantSession, 'after_flush', _after_flush):
+        event.listen(TenantSession, 'after_flush', _after_flush)
+    if not event.contains(TenantSession, 'after_flush_postexec', _after_flush_postexec):
+        event.listen(TenantSession, 'after_flush_postexec', _after_flush_postexec)
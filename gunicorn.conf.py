@@ -0,0 +1,36 @@
+"""
+gunicorn 실행 프로필 (Procfile: gunicorn -c gunicorn.conf.py run:app)
+
+요청 대부분이 DB I/O를 기다리므로 gthread 워커에 스레드를 여러 개 둔다.
+- SQLite: 쓰기는 파일 하나에 직렬화되므로 워커 수를 적게(기본 2) 두고 스레드로 동시성을 얻는다.
+  WAL + busy_timeout 설정(config.SQLITE_PRAGMAS) 덕분에 동시 쓰기는 락을 기다렸다가 처리된다.
+- Postgres: 워커 = CPU 수 × 2 + 1 정도까지 늘릴 수 있다. 워커당 커넥션 풀(DB_POOL_SIZE)이
+  스레드 수 이상이어야 하고, 워커 수 × (DB_POOL_SIZE + DB_MAX_OVERFLOW)가 DB 최대 연결 수를 넘지 않게 한다.
+
+환경 변수로 조정: WEB_CONCURRENCY(워커 수), GUNICORN_THREADS, GUNICORN_TIMEOUT, PORT
+"""
+
+import multiprocessing
+import os
+
+_postgres = os.environ.get('DATABASE_URL', '').startswith(('postgres://', 'postgresql'))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1 if _postgres else 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# 내보내기/가져오기 스트리밍 요청이 길어질 수 있다
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# 메모리 누수에 대비해 일정 요청마다 워커를 교체 (동시에 재시작하지 않도록 jitter)
+max_requests = 1000
+max_requests_jitter = 100
+
+# 워커마다 자기 DB 커넥션을 만들도록 앱은 fork 후에 불러온다
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
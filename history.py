@@ -0,0 +1,128 @@
+"""
+운동 기록 히스토리 배치 조회
+
+세션을 (date, id) 키셋 순서로 일정 크기씩 읽고, 배치마다 해당 세션들의 운동 기록을
+한 번에 가져온다. ORM 객체 대신 컬럼 튜플만 읽으므로 히스토리 길이와 상관없이
+메모리 사용량이 배치 크기로 제한된다.
+
+기간이 보관된 달(archive.py)에 걸치면 보관된 세션을 풀어서 (date, id) 순서로 함께 돌려준다.
+"""
+
+import heapq
+import itertools
+
+import archive
+from models import db, Exercise, WorkoutSession, WorkoutRecord
+from pagination import encode_cursor, keyset_after
+
+BATCH_SIZE = 500
+
+
+def iter_session_batches(user_id=None, start=None, end=None, after=None, batch_size=BATCH_SIZE):
+    """(세션 행 목록, 세션별 운동 기록 dict)를 날짜 오름차순 배치로 돌려주는 제너레이터"""
+    batches = _hot_batches(user_id, start, end, after, batch_size)
+    lower = start
+    if after and (lower is None or after[0] > lower):
+        lower = after[0]
+    if not archive.overlaps(archive.bounds(user_id), lower, end):
+        yield from batches
+        return
+
+    # 핫 테이블 배치와 보관된 세션을 (date, id) 순서로 합쳐 다시 batch_size씩 나눈다
+    pairs = heapq.merge(
+        ((session, records.get(session.id, [])) for sessions, records in batches for session in sessions),
+        ((session, None) for session in archive.iter_sessions(user_id, start, end, after=after)),
+        key=lambda pair: (pair[0].date, pair[0].id)
+    )
+    while True:
+        batch = list(itertools.islice(pairs, batch_size))
+        if not batch:
+            return
+        archived = iter(archive.with_exercises([session for session, records in batch if records is None]))
+        sessions, records_by_session = [], {}
+        for session, records in batch:
+            if records is None:
+                session = next(archived)
+                records = session.records
+            sessions.append(session)
+            records_by_session[session.id] = records
+        yield sessions, records_by_session
+
+
+def _hot_batches(user_id, start, end, after, batch_size):
+    cursor = after
+    while True:
+        query = db.session.query(
+            WorkoutSession.id,
+            WorkoutSession.user_id,
+            WorkoutSession.date,
+            WorkoutSession.total_duration,
+            WorkoutSession.notes
+        )
+        if user_id is not None:
+            query = query.filter(WorkoutSession.user_id == user_id)
+        if start:
+            query = query.filter(WorkoutSession.date >= start)
+        if end:
+            query = query.filter(WorkoutSession.date <= end)
+        if cursor:
+            query = query.filter(keyset_after(WorkoutSession.date, WorkoutSession.id, cursor, descending=False))
+        sessions = query.order_by(WorkoutSession.date.asc(), WorkoutSession.id.asc()).limit(batch_size).all()
+        if not sessions:
+            return
+
+        records_by_session = session_records([s.id for s in sessions])
+        yield sessions, records_by_session
+
+        if len(sessions) < batch_size:
+            return
+        cursor = (sessions[-1].date, sessions[-1].id)
+
+
+def session_records(session_ids):
+    """세션 id 목록 → {세션 id: 운동 기록 행 목록} (기록 순서대로, 쿼리 한 번)
+
+    운동 종목이 지워진 기록도 빠뜨리지 않는다 (name, body_part는 None, 보관된 기록·내보내기와 같음).
+    """
+    records = db.session.query(
+        WorkoutRecord.session_id,
+        WorkoutRecord.id,
+        WorkoutRecord.exercise_id,
+        Exercise.name,
+        Exercise.body_part,
+        WorkoutRecord.sets,
+        WorkoutRecord.reps,
+        WorkoutRecord.weight,
+        WorkoutRecord.duration,
+        WorkoutRecord.distance
+    ).outerjoin(Exercise, WorkoutRecord.exercise_id == Exercise.id).filter(
+        WorkoutRecord.session_id.in_(session_ids)
+    ).order_by(WorkoutRecord.session_id, WorkoutRecord.id).all()
+
+    records_by_session = {}
+    for record in records:
+        records_by_session.setdefault(record.session_id, []).append(record)
+    return records_by_session
+
+
+def session_to_dict(session, records):
+    """세션 행과 운동 기록 행을 JSON으로 보낼 dict로 변환한다 (날짜는 serialization이 ISO 문자열로 씀)"""
+    return {
+        'id': session.id,
+        'user_id': session.user_id,
+        'date': session.date,
+        'total_duration': session.total_duration,
+        'notes': session.notes,
+        'cursor': encode_cursor(session.date, session.id),
+        'records': [{
+            'id': record.id,
+            'exercise_id': record.exercise_id,
+            'exercise': record.name,
+            'body_part': record.body_part,
+            'sets': record.sets,
+            'reps': record.reps,
+            'weight': record.weight,
+            'duration': record.duration,
+            'distance': record.distance
+        } for record in records]
+    }
@@ -0,0 +1,267 @@
+"""
+운동 기록 대량 가져오기 (CSV / JSON)
+
+다른 운동 기록 앱에서 내보낸 파일을 한 행씩 스트리밍으로 읽어 세션 단위로 묶은 뒤,
+큰 배치 단위로 bulk INSERT 한다. 배치마다 ImportJob.rows_processed를 같은 트랜잭션에서
+커밋하므로, 중간에 실패해도 같은 파일로 resume_job_id를 넘기면 커밋된 행 다음부터 이어서 가져온다.
+
+입력 행 하나 = 운동 기록 하나. 필드:
+    date (YYYY-MM-DD, 필수), exercise (운동 이름, 필수), sets, reps, weight, duration, distance,
+    body_part (새 운동 종목을 만들 때 사용), session (같은 날 세션 구분 키),
+    session_duration (세션 총 운동 시간), notes (세션 메모)
+같은 (date, session) 값이 연속된 행들이 하나의 세션이 된다.
+
+JSON은 객체 배열([{...}, ...]) 또는 한 줄에 객체 하나인 JSON Lines를 모두 받는다.
+"""
+
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import datetime
+
+from flask import g
+from sqlalchemy import insert
+
+import changes
+import prs
+import rollups
+import tenancy
+from models import db, Exercise, ImportJob, WorkoutSession, WorkoutRecord
+
+BATCH_SIZE = 5000  # 배치당 운동 기록 수 (세션 경계에서 자른다)
+DEFAULT_BODY_PART = '기타'
+
+
+class ImportRowError(ValueError):
+    """입력 파일의 행을 해석할 수 없을 때"""
+
+    def __init__(self, line, message):
+        super().__init__(f'{line}번째 행: {message}')
+        self.line = line
+
+
+class ImportJobNotFound(ValueError):
+    """이어서 가져올 작업이 없거나 다른 사용자(또는 다른 샤드)의 작업일 때"""
+
+
+class ImportFailed(RuntimeError):
+    """가져오기 도중 실패 (job_id로 이어서 가져올 수 있음, 원인은 __cause__)"""
+
+    def __init__(self, job_id, message):
+        super().__init__(message)
+        self.job_id = job_id
+
+
+def _to_int(value):
+    if value is None or value == '':
+        return 0
+    return int(float(value))
+
+
+def _to_float(value):
+    if value is None or value == '':
+        return 0.0
+    return float(value)
+
+
+def iter_csv_rows(stream):
+    """텍스트 스트림에서 CSV 행(dict)을 하나씩 읽는다"""
+    yield from csv.DictReader(stream)
+
+
+def iter_json_rows(stream, chunk_size=64 * 1024):
+    """JSON 배열 또는 JSON Lines에서 객체를 하나씩 읽는다 (파일 전체를 메모리에 올리지 않음)"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+    while True:
+        # 값 사이의 공백, 쉼표, 배열 괄호는 건너뛴다
+        stripped = buffer.lstrip(' \t\r\n,[]')
+        if stripped != buffer:
+            buffer = stripped
+        if buffer:
+            try:
+                obj, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield obj
+                buffer = buffer[end:]
+                continue
+        if eof:
+            return
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer += chunk
+
+
+def parse_row(raw, line):
+    """입력 행 하나를 정규화된 dict로 변환한다"""
+    try:
+        day = datetime.strptime(str(raw.get('date', '')).strip()[:10], '%Y-%m-%d').date()
+    except ValueError:
+        raise ImportRowError(line, f"날짜 형식이 잘못되었습니다: {raw.get('date')!r}")
+    name = str(raw.get('exercise') or '').strip()
+    if not name:
+        raise ImportRowError(line, '운동 이름(exercise)이 없습니다.')
+    try:
+        return {
+            'date': day,
+            'session': str(raw.get('session') or ''),
+            'exercise': name,
+            'body_part': str(raw.get('body_part') or '').strip() or DEFAULT_BODY_PART,
+            'sets': _to_int(raw.get('sets')),
+            'reps': _to_int(raw.get('reps')),
+            'weight': _to_float(raw.get('weight')),
+            'duration': _to_int(raw.get('duration')),
+            'distance': _to_float(raw.get('distance')),
+            'session_duration': raw.get('session_duration'),
+            'notes': raw.get('notes') or '',
+        }
+    except (TypeError, ValueError) as e:
+        raise ImportRowError(line, f'숫자 형식이 잘못되었습니다: {e}')
+
+
+def iter_sessions(rows, skip=0):
+    """연속된 같은 (date, session) 행을 묶어 (세션 행 목록, 마지막 행 번호)를 돌려준다"""
+    group, group_key, line = [], None, 0
+    for line, raw in enumerate(rows, start=1):
+        if line <= skip:
+            continue
+        row = parse_row(raw, line)
+        key = (row['date'], row['session'])
+        if group and key != group_key:
+            yield group, line - 1
+            group = []
+        group.append(row)
+        group_key = key
+    if group:
+        yield group, line
+
+
+class ExerciseLookup:
+    """운동 이름 → id 메모리 맵 (없는 종목은 만들어서 추가)"""
+
+    def __init__(self):
+        self.ids = {e.name.strip().lower(): (e.id, e.body_part) for e in Exercise.query}
+
+    def resolve(self, name, body_part):
+        key = name.lower()
+        if key not in self.ids:
+            exercise = Exercise(name=name, body_part=body_part, difficulty='초급')
+            db.session.add(exercise)
+            db.session.flush()
+            self.ids[key] = (exercise.id, exercise.body_part)
+        return self.ids[key]
+
+
+def _flush_batch(job, sessions, lookup, rows_processed):
+    """세션 묶음을 bulk INSERT 하고 집계, 개인 기록, 변경 기록, 작업 진행 상황을 같은 트랜잭션에서 커밋한다"""
+    session_rows = []
+    for rows in sessions:
+        first = rows[0]
+        session_duration = next((r['session_duration'] for r in rows if r['session_duration'] not in (None, '')), None)
+        session_rows.append({
+            'user_id': job.user_id,
+            'date': first['date'],
+            'total_duration': _to_int(session_duration) if session_duration is not None else sum(r['duration'] for r in rows),
+            'notes': first['notes'],
+        })
+    session_ids = db.session.scalars(
+        insert(WorkoutSession).returning(WorkoutSession.id, sort_by_parameter_order=True),
+        session_rows
+    ).all()
+
+    record_rows = []
+    lifts = []
+    daily = defaultdict(lambda: [0, 0, 0.0, 0.0])
+    body_parts = defaultdict(int)
+    for session_id, session_row, rows in zip(session_ids, session_rows, sessions):
+        key = (job.user_id, session_row['date'])
+        daily[key][0] += 1
+        daily[key][1] += session_row['total_duration']
+        for r in rows:
+            exercise_id, body_part = lookup.resolve(r['exercise'], r['body_part'])
+            record_rows.append({
+                'session_id': session_id,
+                'exercise_id': exercise_id,
+                'sets': r['sets'],
+                'reps': r['reps'],
+                'weight': r['weight'],
+                'duration': r['duration'],
+                'distance': r['distance'],
+            })
+            lifts.append(prs.Lift(exercise_id, session_row['date'], r['sets'], r['reps'], r['weight'], r['duration'], r['distance']))
+            daily[key][2] += r['sets'] * r['reps'] * r['weight']
+            daily[key][3] += r['distance']
+            body_parts[(job.user_id, session_row['date'], body_part)] += 1
+    record_ids = db.session.scalars(insert(WorkoutRecord).returning(WorkoutRecord.id), record_rows).all()
+    changes.log(WorkoutSession, session_ids, job.user_id)
+    changes.log(WorkoutRecord, record_ids, job.user_id)
+    rollups.add_batch(daily, body_parts)
+    prs.add_lifts(job.user_id, lifts)
+
+    job.rows_processed = rows_processed
+    job.sessions_created += len(session_rows)
+    job.records_created += len(record_rows)
+    db.session.commit()
+
+
+def run_import(stream, fmt, user_id=1, source=None, resume_job_id=None, batch_size=BATCH_SIZE, progress=None):
+    """텍스트 스트림을 가져와 ImportJob을 돌려준다
+
+    progress(job)는 배치가 커밋될 때마다 호출된다. 실패하면 job.status가 'failed'가 되고
+    ImportFailed를 던진다. 같은 입력으로 resume_job_id를 넘기면 이어서 가져온다 (user_id의 작업이 아니면
+    ImportJobNotFound).
+    """
+    if fmt not in ('csv', 'json'):
+        raise ValueError(f'지원하지 않는 형식입니다: {fmt}')
+
+    if resume_job_id is not None:
+        job = db.session.get(ImportJob, resume_job_id)
+        if job is None or job.user_id != user_id or g.get('shard') != tenancy.shard_for_user(user_id):
+            # 다른 사용자의 작업을 이어 받으면 그 사용자의 기록에 행이 들어가므로 없는 작업으로 취급한다
+            raise ImportJobNotFound(f'가져오기 작업 {resume_job_id}을(를) 찾을 수 없습니다.')
+        if job.status == 'completed':
+            return job
+        job.status, job.error = 'running', None
+    else:
+        job = ImportJob(user_id=user_id, source=source, format=fmt, status='running')
+        db.session.add(job)
+    db.session.commit()
+    job_id = job.id
+
+    rows = iter_csv_rows(stream) if fmt == 'csv' else iter_json_rows(stream)
+    lookup = ExerciseLookup()
+    pending, pending_records = [], 0
+    try:
+        for group, last_line in iter_sessions(rows, skip=job.rows_processed):
+            pending.append(group)
+            pending_records += len(group)
+            if pending_records >= batch_size:
+                _flush_batch(job, pending, lookup, last_line)
+                pending, pending_records = [], 0
+                if progress:
+                    progress(job)
+        if pending:
+            _flush_batch(job, pending, lookup, last_line)
+            if progress:
+                progress(job)
+        job.status = 'completed'
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(ImportJob, job_id)
+        job.status = 'failed'
+        job.error = str(e)
+        db.session.commit()
+        raise ImportFailed(job_id, str(e)) from e
+    return job
+
+
+def open_text(binary_stream):
+    """업로드 파일 등 바이너리 스트림을 UTF-8 텍스트 스트림으로 감싼다 (BOM 허용)"""
+    return io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
@@ -0,0 +1,368 @@
+"""
+요청 단위 계측
+
+- 요청마다 처리 시간, SQL 쿼리 수, SQL 실행 시간, 템플릿 렌더링 시간을 재서
+  Server-Timing / X-Query-Count 헤더로 돌려주고 엔드포인트별 히스토그램에 쌓는다.
+  render_metrics()는 이를 Prometheus 텍스트 형식으로 만든다 (/metrics, 워커 프로세스별 값).
+- SLOW_QUERY_MS보다 오래 걸린 쿼리는 바인딩 파라미터와 함께 경고 로그로 남긴다.
+- 뷰에 지정된 쿼리 예산(query budget)을 넘으면 경고를 남기거나
+  (QUERY_BUDGET_ENFORCE 설정 시) 요청을 실패시킨다.
+- PROFILER_ENABLED를 켜면 요청 스레드의 스택을 주기적으로 샘플링해, 가장 느린 요청
+  PROFILER_KEEP개의 스택을 flamegraph.pl / speedscope에서 읽을 수 있는 folded 형식으로 저장한다.
+  샘플링 스레드는 프로세스가 끝날 때나 disable_profiler()로 끌 때 멈춘다.
+"""
+
+import atexit
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import before_render_template, current_app, g, has_app_context, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+UNTRACKED_ENDPOINTS = ('static', 'main.metrics')
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """뷰가 쿼리 예산을 넘었을 때 발생하는 예외"""
+
+
+def query_budget(max_queries, methods=('GET',)):
+    """뷰 함수에 요청당 최대 쿼리 수를 지정하는 데코레이터
+
+    @bp.route 아래에 붙인다. 지정한 HTTP 메서드에만 예산이 적용된다.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.query_budget_methods = tuple(methods)
+        return view
+    return decorator
+
+
+# 메트릭 저장소
+
+class Histogram:
+    """레이블 조합별 누적 히스토그램 (Prometheus histogram)"""
+
+    def __init__(self, name, help_text, buckets, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}  # 레이블 값 튜플 → [버킷별 개수, 합계, 개수]
+
+    def observe(self, labels, value):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{base},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{base}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {count}')
+        return lines
+
+
+class Metrics:
+    """요청 계측 값을 모으는 프로세스 내 저장소"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        labels = ('endpoint', 'method')
+        self.request_duration = Histogram('fitness_request_duration_seconds', '요청 처리 시간', DURATION_BUCKETS, labels)
+        self.sql_duration = Histogram('fitness_request_sql_seconds', '요청당 SQL 실행 시간 합계', DURATION_BUCKETS, labels)
+        self.template_duration = Histogram('fitness_request_template_seconds', '요청당 템플릿 렌더링 시간', DURATION_BUCKETS, labels)
+        self.query_count = Histogram('fitness_request_queries', '요청당 SQL 쿼리 수', QUERY_COUNT_BUCKETS, labels)
+        self.responses = Counter()  # (endpoint, method, status) → 요청 수
+        self.slow_queries = 0
+        self.job_duration = Histogram('fitness_job_duration_seconds', '백그라운드 작업 실행 시간', JOB_DURATION_BUCKETS, ('kind',))
+        self.jobs = Counter()  # (kind, 실행 후 상태) → 실행 횟수
+
+    def record_request(self, endpoint, method, status, duration, sql_time, template_time, queries):
+        labels = (endpoint, method)
+        with self._lock:
+            self.request_duration.observe(labels, duration)
+            self.sql_duration.observe(labels, sql_time)
+            self.template_duration.observe(labels, template_time)
+            self.query_count.observe(labels, queries)
+            self.responses[(endpoint, method, str(status))] += 1
+
+    def record_job(self, kind, status, duration):
+        with self._lock:
+            self.job_duration.observe((kind,), duration)
+            self.jobs[(kind, status)] += 1
+
+    def record_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        with self._lock:
+            lines = ['# HELP fitness_requests_total 응답 수', '# TYPE fitness_requests_total counter']
+            for (endpoint, method, status), count in sorted(self.responses.items()):
+                lines.append(
+                    f'fitness_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {count}'
+                )
+            for histogram in (self.request_duration, self.sql_duration, self.template_duration, self.query_count):
+                lines.extend(histogram.render())
+            lines.extend(['# HELP fitness_jobs_total 이 프로세스에서 실행한 백그라운드 작업 수', '# TYPE fitness_jobs_total counter'])
+            for (kind, status), count in sorted(self.jobs.items()):
+                lines.append(f'fitness_jobs_total{{kind="{_escape(kind)}",status="{status}"}} {count}')
+            lines.extend(self.job_duration.render())
+            lines.extend([
+                '# HELP fitness_slow_queries_total SLOW_QUERY_MS를 넘은 쿼리 수',
+                '# TYPE fitness_slow_queries_total counter',
+                f'fitness_slow_queries_total {self.slow_queries}',
+            ])
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def get_metrics():
+    return current_app.extensions['instrumentation']
+
+
+def render_metrics():
+    """Prometheus 텍스트 형식의 메트릭"""
+    return get_metrics().render()
+
+
+# SQL 계측
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    if has_request_context():
+        g.sql_time = g.get('sql_time', 0.0) + elapsed
+    if not has_app_context():
+        return
+    threshold = current_app.config.get('SLOW_QUERY_MS')
+    if threshold is not None and elapsed * 1000 >= threshold:
+        get_metrics().record_slow_query()
+        where = request.endpoint if has_request_context() else 'cli'
+        params = repr(parameters)
+        if len(params) > 500:
+            params = params[:500] + '...'
+        logger.warning('느린 쿼리 %.1fms (%s): %s | 파라미터: %s', elapsed * 1000, where, ' '.join(statement.split()), params)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _query_failed(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_started'):
+        conn.info['query_started'].pop()
+
+
+# 템플릿 렌더링 계측
+
+def _before_render(sender, template, context, **extra):
+    if has_request_context():
+        g.setdefault('template_started', []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    if has_request_context() and g.get('template_started'):
+        g.template_time = g.get('template_time', 0.0) + time.perf_counter() - g.template_started.pop()
+
+
+# 샘플링 프로파일러
+
+def _short_path(filename):
+    parts = filename.replace('\\', '/').split('/')
+    return '/'.join(parts[-2:])
+
+
+def _fold(frame):
+    """프레임 스택을 folded 형식 한 줄(바깥 → 안쪽, ';'로 구분)로 만든다"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({_short_path(code.co_filename)})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """진행 중인 요청 스레드의 스택을 interval마다 샘플링하고, 느린 요청 keep개의 스택을 파일로 남긴다"""
+
+    def __init__(self, output_dir, interval=0.005, keep=20):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._active = {}  # 스레드 id → Counter(folded 스택 → 샘플 수)
+        self._slowest = []  # (처리 시간, 파일 경로) 최소 힙
+        self._thread = None
+        self._stopping = None  # 샘플링 스레드를 멈추는 Event (스레드마다 새로)
+
+    def start(self, thread_id):
+        with self._lock:
+            self._active[thread_id] = Counter()
+            if self._thread is None:
+                self._stopping = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stopping,),
+                                                name='request-profiler', daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, None)
+
+    def shutdown(self, timeout=1.0):
+        """샘플링 스레드를 멈춘다 (프로세스 종료, 프로파일링을 끌 때). 다음 start()가 다시 띄운다"""
+        with self._lock:
+            thread, stopping = self._thread, self._stopping
+            self._thread = self._stopping = None
+            self._active.clear()
+        if thread is not None:
+            stopping.set()
+            thread.join(timeout)
+
+    def _run(self, stopping):
+        while not stopping.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, samples in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples[_fold(frame)] += 1
+
+    def save_if_slow(self, name, duration, samples):
+        """지금까지 가장 느린 keep개 안에 들면 folded 스택 파일을 쓰고 경로를 돌려준다"""
+        if not samples:
+            return None
+        with self._lock:
+            if len(self._slowest) >= self.keep and duration <= self._slowest[0][0]:
+                return None
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            path = os.path.join(self.output_dir, f'{stamp}-{name}-{duration * 1000:.0f}ms.folded')
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in samples.most_common():
+                    f.write(f'{stack} {count}\n')
+            heapq.heappush(self._slowest, (duration, path))
+            if len(self._slowest) > self.keep:
+                _, evicted = heapq.heappop(self._slowest)
+                if os.path.exists(evicted):
+                    os.remove(evicted)
+        return path
+
+
+# 요청 훅
+
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+    g.sql_time = 0.0
+    g.template_time = 0.0
+    profiler = current_app.extensions.get('request_profiler')
+    if profiler is not None:
+        profiler.start(threading.get_ident())
+
+
+def _finish_response(response):
+    g.response_status = response.status_code
+    duration = time.perf_counter() - g.request_started
+    response.headers['Server-Timing'] = (
+        f'app;dur={duration * 1000:.1f}, db;dur={g.sql_time * 1000:.1f}, tpl;dur={g.template_time * 1000:.1f}'
+    )
+
+    view_func = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None or request.method not in view_func.query_budget_methods:
+        return response
+
+    count = g.query_count
+    response.headers['X-Query-Count'] = str(count)
+    if count > budget:
+        message = f'{request.endpoint}: 쿼리 {count}개 실행 (예산 {budget}개)'
+        if current_app.config['QUERY_BUDGET_ENFORCE']:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return response
+
+
+def _record_request(exc):
+    if 'request_started' not in g:
+        return
+    duration = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'unknown'
+
+    profiler = current_app.extensions.get('request_profiler')
+    if profiler is not None:
+        samples = profiler.stop(threading.get_ident())
+        profiler.save_if_slow(endpoint, duration, samples)
+
+    if endpoint in UNTRACKED_ENDPOINTS:
+        return
+    status = 500 if exc is not None else g.get('response_status', 500)
+    get_metrics().record_request(endpoint, request.method, status, duration,
+                                 g.sql_time, g.template_time, g.query_count)
+
+
+def disable_profiler(app):
+    """실행 중인 앱의 샘플링 프로파일러를 끈다 (진행 중인 요청의 샘플은 버리고 스레드를 멈춤)"""
+    app.config['PROFILER_ENABLED'] = False
+    profiler = app.extensions.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.shutdown()
+
+
+def init_app(app):
+    """앱에 요청 계측, 쿼리 예산 검사, (설정 시) 샘플링 프로파일러를 등록한다"""
+    app.config.setdefault('QUERY_BUDGET_ENFORCE', False)
+    app.config.setdefault('SLOW_QUERY_MS', 200)
+    app.config.setdefault('PROFILER_ENABLED', False)
+    app.config.setdefault('PROFILER_INTERVAL_MS', 5)
+    app.config.setdefault('PROFILER_KEEP', 20)
+    if not app.config.get('PROFILER_DIR'):
+        app.config['PROFILER_DIR'] = os.path.join(app.instance_path, 'profiles')
+
+    app.extensions['instrumentation'] = Metrics()
+    if app.config['PROFILER_ENABLED']:
+        app.extensions['request_profiler'] = SamplingProfiler(
+            app.config['PROFILER_DIR'],
+            interval=app.config['PROFILER_INTERVAL_MS'] / 1000,
+            keep=app.config['PROFILER_KEEP']
+        )
+        atexit.register(app.extensions['request_profiler'].shutdown)
+
+    app.before_request(_start_request)
+    app.after_request(_finish_response)
+    app.teardown_request(_record_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
@@ -0,0 +1,406 @@
+"""
+DB에 저장되는 백그라운드 작업 큐
+
+대량 가져오기, 파일 내보내기, 일일 집계/개인 기록 재구성처럼 오래 걸리는 일은 요청 안에서 하지 않고
+enqueue()로 background_job 테이블에 넣은 뒤 바로 응답한다 (상태는 /api/jobs/<id>로 확인).
+워커는 큐를 폴링해 run_at이 지난 작업을 하나씩 가져가(claim) 실행한다.
+
+- 가져가기는 "status='queued'인 경우에만 running으로 바꾸는" 조건부 UPDATE로 해서
+  여러 워커 프로세스/스레드가 같은 작업을 두 번 실행하지 않는다 (SQLite, Postgres 공통).
+- 실패하면 JOB_RETRY_DELAY × 2^(시도 횟수 - 1)초 뒤에 다시 실행하고, JOB_MAX_ATTEMPTS번 실패하면
+  failed로 끝낸다. JobFailed는 재시도해도 소용없는 오류(잘못된 입력 등)로 바로 실패 처리한다.
+- JOB_TIMEOUT보다 오래 running인 작업은 워커가 죽은 것으로 보고 다른 워커가 다시 가져간다.
+- 내보내기 결과 파일은 JOB_FILE_TTL초가 지나면 워커가 지운다 (sweep_files, SWEEP_INTERVAL마다 확인).
+- 업로드 파일 같은 큰 입력은 spool()로 JOB_FILES_DIR에 저장하고 payload의 input_file에 파일 이름만 넣는다
+  (요청 메모리나 작업 행에 파일 전체를 올리지 않음). 작업이 완료되거나 최종 실패하면 파일을 지운다.
+
+워커 실행 방법
+- 별도 프로세스: flask run-worker --threads N (Procfile의 worker 프로세스, 웹과 따로 늘릴 수 있음)
+- 웹 프로세스 안: JOB_WORKER_THREADS > 0이면 첫 요청 때 스레드 풀을 띄운다 (개발용)
+
+작업이 데이터를 바꾸면 웹 요청과 똑같이 커밋 후 cache.invalidate()를 부른다. 별도 워커 프로세스도
+웹 워커와 같은 데이터 버전 저장소(cache_version 테이블 또는 공유 캐시 백엔드)를 쓰므로 바로 반영된다.
+"""
+
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_
+
+import cache
+import exporter
+import goal_engine
+import importer
+import prs
+import rollups
+import tenancy
+from models import db, BackgroundJob, DailyRollup, PersonalRecord, User, WorkoutSession
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+SWEEP_INTERVAL = 10 * 60  # 워커가 오래된 결과 파일을 찾는 주기 (초)
+INPUT_PREFIX = 'input-'  # spool()로 저장한 입력 파일 (작업이 끝날 때 지움)
+
+
+class JobFailed(Exception):
+    """재시도하지 않고 바로 실패로 끝낼 오류"""
+
+
+def handler(kind):
+    """작업 종류별 실행 함수를 등록하는 데코레이터
+
+    실행 함수는 (job, payload)를 받아 JSON으로 저장할 결과를 돌려준다.
+    """
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def enqueue(kind, payload=None, user_id=None, max_attempts=None):
+    """작업을 큐에 넣는다. 커밋은 호출한 쪽에서 한다."""
+    if kind not in HANDLERS:
+        raise ValueError(f'알 수 없는 작업 종류입니다: {kind}')
+    job = BackgroundJob(
+        kind=kind,
+        user_id=user_id,
+        payload=json.dumps(payload or {}, ensure_ascii=False),
+        status='queued',
+        attempts=0,
+        max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+        run_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def _claimable(now):
+    stale = now - timedelta(seconds=current_app.config['JOB_TIMEOUT'])
+    return or_(
+        and_(BackgroundJob.status == 'queued', BackgroundJob.run_at <= now),
+        and_(BackgroundJob.status == 'running', BackgroundJob.locked_at < stale)
+    )
+
+
+def claim(worker_id):
+    """실행할 작업 하나를 가져간다 (없으면 None, 다른 워커가 먼저 가져간 작업은 건너뜀)"""
+    while True:
+        now = datetime.utcnow()
+        job_id = db.session.query(BackgroundJob.id).filter(_claimable(now)).order_by(
+            BackgroundJob.run_at, BackgroundJob.id
+        ).limit(1).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+
+        claimed = db.session.query(BackgroundJob).filter(
+            BackgroundJob.id == job_id,
+            _claimable(now)
+        ).update({
+            BackgroundJob.status: 'running',
+            BackgroundJob.locked_by: worker_id,
+            BackgroundJob.locked_at: now,
+            BackgroundJob.started_at: now,
+            BackgroundJob.attempts: BackgroundJob.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed == 1:
+            return db.session.get(BackgroundJob, job_id)
+
+
+def execute(job):
+    """가져간 작업을 실행하고 결과/재시도/실패를 기록한다"""
+    job_id = job.id
+    if job.user_id is not None:
+        tenancy.use_user(job.user_id)
+    started = time.perf_counter()
+
+    try:
+        if job.attempts > job.max_attempts:
+            raise JobFailed('실행 시간을 넘겨 다시 가져갔지만 재시도 횟수를 모두 썼습니다.')
+        func = HANDLERS.get(job.kind)
+        if func is None:
+            raise JobFailed(f'알 수 없는 작업 종류입니다: {job.kind}')
+        result = func(job, json.loads(job.payload or '{}'))
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(BackgroundJob, job_id)
+        job.error = f'{type(e).__name__}: {e}'
+        job.locked_by = job.locked_at = None
+        if isinstance(e, JobFailed) or job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+            logger.exception('작업 %s(%s) 실패', job_id, job.kind)
+        else:
+            delay = current_app.config['JOB_RETRY_DELAY'] * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            logger.warning('작업 %s(%s) 실패, %d초 뒤 재시도 (%d/%d): %s',
+                           job_id, job.kind, delay, job.attempts, job.max_attempts, e)
+    else:
+        job.status = 'completed'
+        job.result = json.dumps(result, ensure_ascii=False, default=str)
+        job.error = None
+        job.locked_by = job.locked_at = None
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+    if job.status in ('completed', 'failed'):
+        _remove_input_file(job)
+    _record(job, time.perf_counter() - started)
+    return job
+
+
+def _record(job, duration):
+    metrics = current_app.extensions.get('instrumentation')
+    if metrics is not None:
+        metrics.record_job(job.kind, job.status, duration)
+
+
+def run_next(worker_id):
+    """모든 샤드에서 실행할 작업을 찾아 하나 실행한다 (실행했으면 True)"""
+    for key in tenancy.shard_keys():
+        tenancy.use_shard(key)
+        job = claim(worker_id)
+        if job is not None:
+            execute(job)
+            return True
+    return False
+
+
+def run_pending(worker_id='inline'):
+    """큐가 빌 때까지 작업을 실행하고 실행한 개수를 돌려준다 (재시도 대기 중인 작업은 제외)"""
+    count = 0
+    while run_next(worker_id):
+        count += 1
+    return count
+
+
+def files_dir():
+    """내보내기 결과/업로드 입력 파일 위치 (별도 워커 프로세스를 쓰면 웹과 공유되는 경로여야 함)"""
+    path = current_app.config['JOB_FILES_DIR']
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def spool(stream):
+    """업로드 스트림을 조금씩 files_dir()에 저장하고 payload의 input_file로 넣을 파일 이름을 돌려준다"""
+    name = f'{INPUT_PREFIX}{uuid.uuid4().hex}'
+    path = os.path.join(files_dir(), name)
+    try:
+        with open(path + '.part', 'wb') as f:
+            shutil.copyfileobj(stream, f, 1024 * 1024)
+        os.replace(path + '.part', path)
+    except BaseException:
+        if os.path.exists(path + '.part'):
+            os.remove(path + '.part')
+        raise
+    return name
+
+
+def open_input(payload):
+    """payload의 input_file(spool()로 저장한 파일)을 바이너리 파일 객체로 연다"""
+    path = os.path.join(files_dir(), payload['input_file'])
+    if not os.path.exists(path):
+        raise JobFailed('작업 입력 파일이 없습니다. 다시 업로드해주세요.')
+    return open(path, 'rb')
+
+
+def sweep_files(max_age=None):
+    """max_age초(기본 JOB_FILE_TTL)보다 오래된 결과 파일과 쓰다 만 .part 파일을 지우고 지운 수를 돌려준다"""
+    if max_age is None:
+        max_age = current_app.config['JOB_FILE_TTL']
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(files_dir()):
+        if entry.name.startswith(INPUT_PREFIX) and not entry.name.endswith('.part'):
+            continue  # 대기 중인 작업의 입력일 수 있음
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # 다른 워커가 먼저 지움
+    return removed
+
+
+def _remove_input_file(job):
+    name = json.loads(job.payload or '{}').get('input_file')
+    if name:
+        path = os.path.join(files_dir(), name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class Worker:
+    """큐를 폴링해 작업을 실행하는 스레드 풀"""
+
+    def __init__(self, app, threads=1, poll_interval=1.0, name=None):
+        self.app = app
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+        self._threads = []
+        self._next_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+    def _loop(self, worker_id):
+        while not self._stop.is_set():
+            ran = False
+            with self.app.app_context():
+                try:
+                    ran = run_next(worker_id)
+                    self._sweep()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('작업 큐 폴링 실패')
+                finally:
+                    db.session.remove()
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+    def _sweep(self):
+        # 스레드 하나만 SWEEP_INTERVAL마다 결과 파일을 정리한다
+        with self._sweep_lock:
+            now = time.monotonic()
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + SWEEP_INTERVAL
+        removed = sweep_files()
+        if removed:
+            logger.info('오래된 작업 파일 %d개를 지웠습니다.', removed)
+
+    def start(self):
+        for i in range(self.threads):
+            thread = threading.Thread(target=self._loop, args=(f'{self.name}/{i}',),
+                                      name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """새 작업을 가져가지 않게 하고 실행 중인 작업이 끝날 때까지 기다린다"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        """SIGTERM/SIGINT를 받을 때까지 실행한다 (flask run-worker)"""
+        stopping = threading.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda *args: stopping.set())
+        self.start()
+        stopping.wait()
+        self.stop()
+
+
+def _start_in_process_worker():
+    app = current_app._get_current_object()
+    if 'job_worker' in app.extensions:
+        return
+    with _worker_lock:
+        if 'job_worker' not in app.extensions:
+            app.extensions['job_worker'] = Worker(
+                app, app.config['JOB_WORKER_THREADS'], app.config['JOB_POLL_INTERVAL']
+            ).start()
+
+
+_worker_lock = threading.Lock()
+
+
+def init_app(app):
+    app.config.setdefault('JOB_WORKER_THREADS', 0)
+    app.config.setdefault('JOB_POLL_INTERVAL', 1.0)
+    app.config.setdefault('JOB_MAX_ATTEMPTS', 3)
+    app.config.setdefault('JOB_RETRY_DELAY', 30)
+    app.config.setdefault('JOB_TIMEOUT', 60 * 60)
+    app.config.setdefault('JOB_FILE_TTL', 24 * 60 * 60)
+    if not app.config.get('JOB_FILES_DIR'):
+        app.config['JOB_FILES_DIR'] = os.path.join(app.instance_path, 'jobs')
+    if app.config['JOB_WORKER_THREADS']:
+        # CLI 명령(db-upgrade 등)에서는 띄우지 않도록 첫 요청 때 시작
+        app.before_request(_start_in_process_worker)
+
+
+# 작업 종류
+
+@handler('import-workouts')
+def import_workouts(job, payload):
+    """업로드된 CSV/JSON 파일 가져오기 (실패하면 다음 시도는 커밋된 행 다음부터 이어서)"""
+    try:
+        with open_input(payload) as raw:
+            import_job = importer.run_import(importer.open_text(raw), payload['format'], user_id=job.user_id,
+                                             source=payload.get('source'), resume_job_id=payload.get('resume'))
+    except importer.ImportJobNotFound as e:
+        raise JobFailed(str(e)) from e
+    except importer.ImportFailed as e:
+        if isinstance(e.__cause__, importer.ImportRowError):
+            raise JobFailed(str(e)) from e
+        job.payload = json.dumps(dict(payload, resume=e.job_id), ensure_ascii=False)
+        db.session.commit()
+        raise
+    finally:
+        # 데이터 버전은 웹 워커와 공유되므로(cache.py) 웹의 캐시 응답/조각도 여기서 무효화된다
+        cache.invalidate('workouts', user_id=job.user_id)
+        cache.invalidate('exercises')
+    return {
+        'import_job_id': import_job.id,
+        'rows_processed': import_job.rows_processed,
+        'sessions_created': import_job.sessions_created,
+        'records_created': import_job.records_created,
+    }
+
+
+@handler('export')
+def export(job, payload):
+    """기록 내보내기 결과를 파일로 저장 (/api/jobs/<id>/download로 받음)"""
+    dataset, fmt, compress = payload['dataset'], payload['format'], payload.get('gzip', True)
+    filename = exporter.export_filename(dataset, fmt, compress)
+    path = os.path.join(files_dir(), f'{job.id}-{filename}')
+    written = 0
+    try:
+        with open(path + '.part', 'wb') as f:
+            for chunk in exporter.export_stream(dataset, fmt, user_id=job.user_id, compress=compress):
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(path + '.part', path)
+    except BaseException:
+        # 실패한 시도의 쓰다 만 파일을 남기지 않는다 (재시도는 처음부터 다시 씀)
+        if os.path.exists(path + '.part'):
+            os.remove(path + '.part')
+        raise
+    return {'filename': filename, 'file': os.path.basename(path), 'bytes': written}
+
+
+def rebuild_derived():
+    """현재 DB(샤드)의 일일 집계와 개인 기록을 다시 만들고 목표 진행률을 다시 계산한다
+
+    커밋한 뒤 샤드의 모든 사용자 캐시 응답을 무효화한다 (재구성 전 숫자를 계속 보내지 않도록).
+    """
+    rollups.rebuild()
+    prs.rebuild()
+    goal_engine.refresh()
+    db.session.commit()
+    user_ids = {user_id for user_id, in db.session.query(User.id)}
+    user_ids |= {user_id for user_id, in db.session.query(WorkoutSession.user_id).distinct()}
+    for user_id in sorted(user_ids):
+        cache.invalidate('workouts', user_id=user_id)
+    return {'days': DailyRollup.query.count(), 'personal_records': PersonalRecord.query.count()}
+
+
+@handler('rebuild-rollups')
+def rebuild_rollups(job, payload):
+    """작업이 들어 있는 DB(샤드)의 일일 집계와 개인 기록 재구성 (목표 진행률도 다시 계산)"""
+    return rebuild_derived()
+
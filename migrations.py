@@ -0,0 +1,185 @@
+"""
+버전 관리되는 스키마 마이그레이션
+
+db.create_all()은 없는 테이블만 만들고 기존 테이블에 인덱스나 컬럼을 추가하지 않는다.
+이미 만들어진 fitness_tracker.db에 스키마 변경을 적용하기 위해 마이그레이션을 버전 순서대로
+실행하고, 적용된 버전은 schema_migrations 테이블에 기록한다.
+
+새 마이그레이션은 MIGRATIONS 끝에 (버전, 설명, 단계 목록)으로 추가한다. 단계는 SQL 문자열이거나
+connection을 받는 함수다. 이미 적용된 DB(create_all로 만든 새 DB 포함)에서 다시 실행해도 안전해야 한다.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.schema import CreateTable
+
+import archive
+import changes
+import exercise_search
+import goal_engine
+import prs
+import rollups
+from models import db, BackgroundJob, CacheVersion, DailyRollup, DailyBodyPartRollup, ChangeLog, ImportJob, PersonalRecord, SyncKey, WorkoutArchive, WorkoutRecord, WorkoutSession
+
+
+def _add_column(table, column, sql_type, fill_from=None):
+    """컬럼이 없으면 추가하는 단계 (fill_from: 새 컬럼을 채울 기존 컬럼)"""
+    def step(conn):
+        if column not in {c['name'] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {sql_type}'))
+            if fill_from:
+                conn.execute(text(f'UPDATE {table} SET {column} = {fill_from}'))
+    return step
+
+
+def _add_updated_at(table):
+    """updated_at 컬럼이 없으면 추가하고 created_at으로 채우는 단계"""
+    return _add_column(table, 'updated_at', 'TIMESTAMP', fill_from='created_at')
+
+
+def _use_autoincrement(model, archived_ids):
+    """SQLite 테이블을 AUTOINCREMENT로 다시 만드는 단계 (행과 인덱스 유지, 다른 DB는 그대로)
+
+    SQLite는 가장 큰 id의 행이 지워지면 그 id를 다시 쓴다. 보관 묶음으로 옮긴 id도 다시 쓰지 않도록
+    sqlite_sequence를 보관된 가장 큰 id(archived_ids(conn))까지 올린다.
+    """
+    def step(conn):
+        if conn.dialect.name != 'sqlite':
+            return
+        table = model.__table__
+        name = table.name
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': name}).scalar()
+        if 'AUTOINCREMENT' not in sql.upper():
+            ddl = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+            conn.execute(text(ddl.replace(f'CREATE TABLE {name} ', f'CREATE TABLE {name}_new ', 1)))
+            columns = ', '.join(c['name'] for c in inspect(conn).get_columns(name) if c['name'] in table.c)
+            conn.execute(text(f'INSERT INTO {name}_new ({columns}) SELECT {columns} FROM {name}'))
+            conn.execute(text(f'DROP TABLE {name}'))
+            conn.execute(text(f'ALTER TABLE {name}_new RENAME TO {name}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        last = max(conn.execute(select(func.max(table.c.id))).scalar() or 0, max(archived_ids(conn), default=0))
+        conn.execute(text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': name})
+        if last:
+            conn.execute(text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'), {'name': name, 'seq': last})
+    return step
+
+
+def _archived_session_ids(conn):
+    return [session.id for _, _, chunk in archive.iter_chunks(conn.execute) for session in chunk]
+
+
+def _archived_record_ids(conn):
+    return [record.id for _, _, chunk in archive.iter_chunks(conn.execute) for session in chunk for record in session.records]
+
+
+MIGRATIONS = [
+    (1, '핫 쿼리 컬럼 복합 인덱스', [
+        'CREATE INDEX IF NOT EXISTS ix_workout_session_date_id ON workout_session (date, id)',
+        'CREATE INDEX IF NOT EXISTS ix_workout_session_user_date ON workout_session (user_id, date)',
+        'CREATE INDEX IF NOT EXISTS ix_workout_record_session_id ON workout_record (session_id)',
+        'CREATE INDEX IF NOT EXISTS ix_workout_record_exercise_id ON workout_record (exercise_id)',
+        'CREATE INDEX IF NOT EXISTS ix_workout_record_created_at ON workout_record (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_weight_record_user_date_id ON weight_record (user_id, date, id)',
+    ]),
+    (2, '일일 집계 테이블 생성 및 채우기', [
+        lambda conn: DailyRollup.__table__.create(conn, checkfirst=True),
+        lambda conn: DailyBodyPartRollup.__table__.create(conn, checkfirst=True),
+        rollups.rebuild,
+    ]),
+    (3, '대량 가져오기 작업 테이블', [
+        lambda conn: ImportJob.__table__.create(conn, checkfirst=True),
+    ]),
+    (4, '사용자별 목표 조회 인덱스', [
+        'CREATE INDEX IF NOT EXISTS ix_goal_user_id ON goal (user_id)',
+    ]),
+    (5, '백그라운드 작업 큐 테이블', [
+        lambda conn: BackgroundJob.__table__.create(conn, checkfirst=True),
+    ]),
+    (6, '개인 기록(PR) 테이블 생성 및 채우기', [
+        lambda conn: PersonalRecord.__table__.create(conn, checkfirst=True),
+        prs.rebuild,
+    ]),
+    (7, '동기화 API 멱등 키 테이블', [
+        lambda conn: SyncKey.__table__.create(conn, checkfirst=True),
+    ]),
+    (8, '수정 시각 컬럼과 변경 기록 테이블 (델타 동기화)', [
+        *[_add_updated_at(table) for table in ('exercise', 'workout_session', 'workout_record', 'goal', 'weight_record')],
+        lambda conn: ChangeLog.__table__.create(conn, checkfirst=True),
+        changes.backfill,
+    ]),
+    (9, '운동 종목 별칭 컬럼과 검색 인덱스 (FTS5)', [
+        _add_column('exercise', 'aliases', 'TEXT'),
+        exercise_search.create_index,
+        exercise_search.rebuild,
+    ]),
+    (10, '목표 측정 방법과 기간 컬럼 (진행률 자동 계산)', [
+        _add_column('goal', 'metric', "VARCHAR(20) NOT NULL DEFAULT 'manual'"),
+        _add_column('goal', 'period_start', 'DATE'),
+        # 대시보드가 쓰던 예전 goal_type 값은 기간 + 측정 방법으로 나눈다
+        "UPDATE goal SET goal_type = 'weekly', metric = 'sessions' WHERE goal_type = 'weekly_workouts'",
+        "UPDATE goal SET goal_type = 'monthly', metric = 'duration' WHERE goal_type = 'monthly_duration'",
+        "UPDATE goal SET goal_type = 'monthly', metric = 'weight_loss' WHERE goal_type = 'weight_loss'",
+        goal_engine.infer_metrics,
+        goal_engine.refresh,
+    ]),
+    (11, '운동 기록 보관 테이블 (핫/콜드 분리)', [
+        lambda conn: WorkoutArchive.__table__.create(conn, checkfirst=True),
+    ]),
+    (12, '응답 캐시 데이터 버전 테이블 (워커 간 무효화 공유)', [
+        lambda conn: CacheVersion.__table__.create(conn, checkfirst=True),
+    ]),
+    (13, '운동 세션/기록 id 재사용 방지 (SQLite AUTOINCREMENT)', [
+        _use_autoincrement(WorkoutSession, _archived_session_ids),
+        _use_autoincrement(WorkoutRecord, _archived_record_ids),
+    ]),
+]
+
+
+def _ensure_version_table(conn):
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations ('
+        'version INTEGER PRIMARY KEY, '
+        'description VARCHAR(200) NOT NULL, '
+        'applied_at TIMESTAMP NOT NULL)'
+    ))
+
+
+def applied_versions(conn):
+    """이미 적용된 마이그레이션 버전 집합"""
+    _ensure_version_table(conn)
+    return {row[0] for row in conn.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def current_version(engine=None):
+    """현재 DB의 스키마 버전 (적용된 마이그레이션이 없으면 0)"""
+    with (engine or db.engine).begin() as conn:
+        return max(applied_versions(conn), default=0)
+
+
+def upgrade(target=None, engine=None):
+    """아직 적용되지 않은 마이그레이션을 버전 순서대로 적용하고 적용한 버전 목록을 돌려준다
+
+    마이그레이션 하나는 하나의 트랜잭션으로 실행된다. engine을 주면 그 DB(사용자 샤드)에 적용한다.
+    """
+    engine = engine or db.engine
+    applied = []
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+
+    for version, description, statements in sorted(MIGRATIONS):
+        if version in done or (target is not None and version > target):
+            continue
+        with engine.begin() as conn:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)'),
+                {'v': version, 'd': description, 't': datetime.utcnow()}
+            )
+        applied.append(version)
+    return applied
@@ -0,0 +1,222 @@
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import selectinload
+from datetime import datetime
+
+from tenancy import TenantSession
+
+# 세션 클래스는 사용자 샤드로 쿼리를 보낸다 (tenancy.py 참고)
+db = SQLAlchemy(session_options={'class_': TenantSession})
+
+# 데이터베이스 모델
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Exercise(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    body_part = db.Column(db.String(50), nullable=False)
+    difficulty = db.Column(db.String(20), nullable=False)
+    description = db.Column(db.Text)
+    aliases = db.Column(db.Text)  # 다른 이름 (쉼표나 줄바꿈으로 구분, 검색용)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 동기화용 (changes.py)
+
+class WorkoutSession(db.Model):
+    __table_args__ = (
+        db.Index('ix_workout_session_date_id', 'date', 'id'),  # 기간 조회, 키셋 페이지네이션
+        db.Index('ix_workout_session_user_date', 'user_id', 'date'),  # 사용자별 기간 조회
+        {'sqlite_autoincrement': True},  # 지운(보관한) 행의 id를 다시 쓰지 않음 (동기화/보관 묶음의 id 유지)
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.DateTime)
+    end_time = db.Column(db.DateTime)
+    total_duration = db.Column(db.Integer)  # 분 단위
+    notes = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 동기화용 (changes.py)
+
+    archived = False  # 보관 묶음에서 꺼낸 세션(archive.ArchivedSession)과 구분 (템플릿용)
+
+class WorkoutRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_workout_record_session_id', 'session_id'),  # 세션별 기록 조회
+        db.Index('ix_workout_record_exercise_id', 'exercise_id'),  # 종목/부위별 집계
+        db.Index('ix_workout_record_created_at', 'created_at'),  # 최근 기록 조회
+        {'sqlite_autoincrement': True},  # 지운(보관한) 행의 id를 다시 쓰지 않음 (동기화/보관 묶음의 id 유지)
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('workout_session.id'), nullable=False)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), nullable=False)
+    sets = db.Column(db.Integer, nullable=False)
+    reps = db.Column(db.Integer, nullable=False)
+    weight = db.Column(db.Float)
+    duration = db.Column(db.Integer)  # 분 단위
+    distance = db.Column(db.Float)  # km 단위 (유산소 운동용)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 동기화용 (changes.py)
+    
+    # 관계 설정
+    exercise = db.relationship('Exercise', backref='records')
+    session = db.relationship('WorkoutSession', backref='records')
+
+class Goal(db.Model):
+    __table_args__ = (
+        db.Index('ix_goal_user_id', 'user_id'),  # 사용자별 목표 조회
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    target_value = db.Column(db.Float, nullable=False)
+    current_value = db.Column(db.Float, default=0)
+    unit = db.Column(db.String(20), nullable=False)
+    goal_type = db.Column(db.String(50), nullable=False)  # weekly, monthly, yearly
+    target_date = db.Column(db.Date)
+    is_achieved = db.Column(db.Boolean, default=False)
+    metric = db.Column(db.String(20), nullable=False, default='manual')  # 진행률 계산 방법 (goal_engine.METRICS)
+    period_start = db.Column(db.Date)  # current_value를 계산한 기간의 시작일 (goal_engine.py)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 동기화용 (changes.py)
+
+class WeightRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_weight_record_user_date_id', 'user_id', 'date', 'id'),  # 사용자별 기간 조회, 페이지네이션
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    weight = db.Column(db.Float, nullable=False)  # kg 단위
+    date = db.Column(db.Date, nullable=False)
+    body_fat_percentage = db.Column(db.Float)  # 체지방률 (선택사항)
+    muscle_mass = db.Column(db.Float)  # 근육량 (선택사항)
+    notes = db.Column(db.Text)  # 메모
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 동기화용 (changes.py)
+    
+    # 관계 설정
+    user = db.relationship('User', backref='weight_records')
+
+# 사용자별 일일 운동 집계 (운동 기록을 쓸 때 같은 트랜잭션에서 갱신, rollups.py 참고)
+class DailyRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    total_duration = db.Column(db.Integer, nullable=False, default=0)  # 분 단위
+    volume = db.Column(db.Float, nullable=False, default=0)  # 세트 × 횟수 × 무게 (kg)
+    distance = db.Column(db.Float, nullable=False, default=0)  # km 단위
+
+# 사용자별 일일 운동 부위별 기록 수
+class DailyBodyPartRollup(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    body_part = db.Column(db.String(50), primary_key=True)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+
+# 보관된 운동 기록 (사용자 × 달마다 세션과 기록을 압축한 묶음 하나, archive.py 참고)
+class WorkoutArchive(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # 그 달 1일
+    first_date = db.Column(db.Date, nullable=False)  # 묶음 안 첫 세션 날짜
+    last_date = db.Column(db.Date, nullable=False)  # 묶음 안 마지막 세션 날짜
+    session_count = db.Column(db.Integer, nullable=False, default=0)
+    record_count = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.deferred(db.Column(db.LargeBinary, nullable=False))  # zlib으로 압축한 JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# 사용자별 운동 종목 개인 기록 (운동 기록을 쓸 때 같은 트랜잭션에서 갱신, prs.py 참고)
+class PersonalRecord(db.Model):
+    __table_args__ = (
+        db.Index('ix_personal_record_user_improved', 'user_id', 'improved_on'),  # 최근 갱신한 PR
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    exercise_id = db.Column(db.Integer, db.ForeignKey('exercise.id'), primary_key=True)
+    max_weight = db.Column(db.Float)  # kg
+    max_weight_date = db.Column(db.Date)
+    estimated_1rm = db.Column(db.Float)  # kg (Epley 공식)
+    estimated_1rm_date = db.Column(db.Date)
+    max_volume = db.Column(db.Float)  # 기록 하나의 세트 × 횟수 × 무게 (kg)
+    max_volume_date = db.Column(db.Date)
+    longest_distance = db.Column(db.Float)  # km
+    longest_distance_date = db.Column(db.Date)
+    best_pace = db.Column(db.Float)  # km당 분 (작을수록 좋음)
+    best_pace_date = db.Column(db.Date)
+    improved_on = db.Column(db.Date)  # 위 기록 중 가장 최근에 세운 날짜
+
+    exercise = db.relationship('Exercise')
+
+# 대량 가져오기 작업 (배치마다 진행 상황을 커밋해 실패 후 이어서 가져올 수 있음)
+class ImportJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    source = db.Column(db.String(200))  # 파일 이름
+    format = db.Column(db.String(10), nullable=False)  # csv, json
+    status = db.Column(db.String(20), nullable=False, default='running')  # running, completed, failed
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)  # 커밋된 입력 행 수
+    sessions_created = db.Column(db.Integer, nullable=False, default=0)
+    records_created = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# 백그라운드 작업 큐 (jobs.py 참고, 워커가 status/run_at 순서로 가져가 실행)
+class BackgroundJob(db.Model):
+    __table_args__ = (
+        db.Index('ix_background_job_status_run_at', 'status', 'run_at'),  # 워커 폴링
+        db.Index('ix_background_job_user_id', 'user_id', 'id'),  # 사용자별 작업 목록
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # 시스템 작업이면 비어 있음
+    kind = db.Column(db.String(50), nullable=False)  # import-workouts, export, rebuild-rollups
+    payload = db.Column(db.Text, nullable=False, default='{}')  # 작업 인자 (JSON)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, completed, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # 이 시각 이후에 실행 (재시도 대기)
+    locked_by = db.Column(db.String(100))  # 실행 중인 워커
+    locked_at = db.Column(db.DateTime)
+    result = db.Column(db.Text)  # 결과 (JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+# 동기화 API 멱등 키 (sync.py 참고, 같은 키로 다시 보낸 항목은 처음 만든 행을 돌려줌)
+class SyncKey(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    key = db.Column(db.String(100), primary_key=True)  # 클라이언트가 항목마다 만든 키 (UUID 등)
+    item_type = db.Column(db.String(20), nullable=False)  # session, record, weight
+    entity_id = db.Column(db.Integer, nullable=False)  # 만든 행의 id
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# 변경 기록 (changes.py 참고, id가 클라이언트 동기화 토큰 - 커밋 순서대로 늘어나고 재사용하지 않음)
+class ChangeLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_change_log_user_id', 'user_id', 'id'),  # 사용자별 토큰 이후 변경
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)  # 운동 종목처럼 모든 사용자가 보는 행이면 비어 있음
+    entity = db.Column(db.String(30), nullable=False)  # 테이블 이름
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete (삭제 표시)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# 응답 캐시 데이터 버전 (cache.py 참고, 모든 워커/작업 프로세스가 함께 보는 scope별 무효화 카운터)
+class CacheVersion(db.Model):
+    name = db.Column(db.String(100), primary_key=True)  # scope 또는 scope:user_id
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def eager_records():
+    """세션 → 운동 기록 → 운동 종목을 고정된 쿼리 수(세션 외 1회)로 읽어오는 로딩 옵션"""
+    return selectinload(WorkoutSession.records).joinedload(WorkoutRecord.exercise)
@@ -0,0 +1,105 @@
+"""
+키셋(커서) 페이지네이션
+
+OFFSET 대신 마지막으로 본 행의 (date, id)를 커서로 넘겨 다음 페이지를 읽는다.
+페이지 깊이와 상관없이 (date, id) 인덱스 구간 하나만 읽으면 된다.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(row_date, row_id):
+    """(date, id)를 URL에 넣을 수 있는 커서 문자열로 만든다"""
+    return f'{row_date.strftime("%Y-%m-%d")}_{row_id}'
+
+
+def decode_cursor(cursor):
+    """커서 문자열을 (date, id)로 되돌린다. 형식이 잘못되면 None"""
+    if not cursor:
+        return None
+    try:
+        date_part, id_part = cursor.split('_', 1)
+        return datetime.strptime(date_part, '%Y-%m-%d').date(), int(id_part)
+    except ValueError:
+        return None
+
+
+def keyset_after(date_col, id_col, cursor, descending=True, inclusive=False):
+    """정렬 순서상 커서 다음에 오는 행만 고르는 조건식 (inclusive면 커서 행 포함)"""
+    cursor_date, cursor_id = cursor
+    if descending:
+        id_cond = id_col <= cursor_id if inclusive else id_col < cursor_id
+        return or_(date_col < cursor_date, and_(date_col == cursor_date, id_cond))
+    id_cond = id_col >= cursor_id if inclusive else id_col > cursor_id
+    return or_(date_col > cursor_date, and_(date_col == cursor_date, id_cond))
+
+
+class KeysetPage:
+    """한 페이지 분량의 결과와 이전/다음 페이지 커서"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, lookahead=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.lookahead = lookahead  # 다음 페이지의 첫 행 (변화량 계산 등에 사용)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def query_fetcher(query, model):
+    """paginate()에 넘길 읽기 함수: query를 model.date, model.id 키셋 순서로 limit개 읽는다"""
+    def fetch(cursor, descending, inclusive, limit):
+        rows = query
+        if cursor:
+            rows = rows.filter(keyset_after(model.date, model.id, cursor, descending, inclusive))
+        if descending:
+            rows = rows.order_by(model.date.desc(), model.id.desc())
+        else:
+            rows = rows.order_by(model.date.asc(), model.id.asc())
+        return rows.limit(limit).all()
+    return fetch
+
+
+def paginate(fetch, per_page, after=None, before=None):
+    """(date, id) 내림차순으로 한 페이지를 읽는다
+
+    fetch(cursor, descending, inclusive, limit): 커서 다음(inclusive면 커서 포함) 행을 정렬 순서대로
+    최대 limit개 돌려주는 함수 (cursor가 None이면 처음부터). 행에는 date, id 속성이 있어야 한다.
+    after: 이 커서 이후(더 오래된) 행을 읽는다 (다음 페이지)
+    before: 이 커서 이전(더 최근) 행을 읽는다 (이전 페이지)
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before)
+
+    rows = []
+    if before:
+        # 이전 페이지는 오름차순으로 읽은 뒤 뒤집는다
+        rows = fetch(before, False, False, per_page + 1)
+
+    if rows:
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        # 다음 페이지의 첫 행은 커서 위치의 행(또는 그 다음 행)
+        lookahead = next(iter(fetch(before, True, True, 1)), None)
+    else:
+        rows = fetch(after, True, False, per_page + 1)
+        items = rows[:per_page]
+        lookahead = rows[per_page] if len(rows) > per_page else None
+        has_prev = after is not None
+
+    next_cursor = encode_cursor(items[-1].date, items[-1].id) if lookahead and items else None
+    prev_cursor = encode_cursor(items[0].date, items[0].id) if has_prev and items else None
+    return KeysetPage(items, next_cursor=next_cursor, prev_cursor=prev_cursor, lookahead=lookahead)
+
+
+def paginate_desc(query, model, per_page, after=None, before=None):
+    """query를 model.date, model.id 내림차순으로 한 페이지 읽는다 (paginate() 참고)"""
+    return paginate(query_fetcher(query, model), per_page, after, before)
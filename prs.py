@@ -0,0 +1,231 @@
+"""
+개인 기록(PR) 인덱스
+
+사용자 × 운동 종목마다 최고 무게, 추정 1RM, 최대 볼륨(세트 × 횟수 × 무게), 최장 거리,
+최고 페이스(km당 분)와 그 기록을 세운 날짜를 PersonalRecord 한 행에 둔다.
+운동 기록을 쓰는 쪽이 같은 트랜잭션에서 갱신하므로 대시보드와 /api/prs는 기록 테이블을
+훑지 않고 사용자의 PR 행만 읽는다.
+
+- 추가: 새 기록과 현재 PR을 비교해 더 좋으면 바꾼다 (add_lifts).
+- 수정/삭제: 수정 전후 기록을 비교해 추가된 기록은 위처럼 반영하고, 빠진 기록이 어떤 PR을
+  세운 기록이었던 종목만 원본에서 다시 계산한다 (apply_diff).
+같은 값이면 더 이른 날짜를 기록일로 둬서 순서와 상관없이 rebuild()와 같은 결과가 나온다.
+보관된 기록(archive.py)이 세운 PR은 그대로 남고, 다시 계산할 때는 보관 묶음도 함께 읽는다.
+"""
+
+import itertools
+from collections import Counter, namedtuple
+
+from sqlalchemy import inspect
+
+import archive
+from models import db, PersonalRecord, WorkoutArchive, WorkoutRecord, WorkoutSession
+
+Lift = namedtuple('Lift', 'exercise_id date sets reps weight duration distance')
+
+ONE_RM_MAX_REPS = 12  # 이보다 많은 반복 횟수로는 1RM을 추정하지 않음 (Epley 공식 오차가 커짐)
+
+
+def _weight(lift):
+    return lift.weight if lift.weight and lift.weight > 0 else None
+
+
+def _one_rm(lift):
+    if not lift.weight or lift.weight <= 0 or not lift.reps or lift.reps <= 0 or lift.reps > ONE_RM_MAX_REPS:
+        return None
+    return lift.weight if lift.reps == 1 else round(lift.weight * (1 + lift.reps / 30), 2)
+
+
+def _volume(lift):
+    volume = (lift.sets or 0) * (lift.reps or 0) * (lift.weight or 0)
+    return volume if volume > 0 else None
+
+
+def _distance(lift):
+    return lift.distance if lift.distance and lift.distance > 0 else None
+
+
+def _pace(lift):
+    if not lift.distance or lift.distance <= 0 or not lift.duration or lift.duration <= 0:
+        return None
+    return round(lift.duration / lift.distance, 2)
+
+
+# (컬럼 이름, 기록 → 값, 클수록 좋은지)
+METRICS = (
+    ('max_weight', _weight, True),
+    ('estimated_1rm', _one_rm, True),
+    ('max_volume', _volume, True),
+    ('longest_distance', _distance, True),
+    ('best_pace', _pace, False),
+)
+
+
+def lifts(session, records):
+    """세션과 운동 기록 객체들 → Lift 목록"""
+    return [
+        Lift(r.exercise_id, session.date, r.sets, r.reps, r.weight, r.duration, r.distance)
+        for r in records
+    ]
+
+
+def _apply(row, lift):
+    """lift가 row의 기록보다 좋으면 바꾼다"""
+    for name, metric, higher in METRICS:
+        value = metric(lift)
+        if value is None:
+            continue
+        best, best_date = getattr(row, name), getattr(row, name + '_date')
+        better = best is None or (value > best if higher else value < best)
+        if better or (value == best and lift.date < best_date):
+            setattr(row, name, value)
+            setattr(row, name + '_date', lift.date)
+    _update_improved_on(row)
+
+
+def _update_improved_on(row):
+    """가장 최근에 세운 기록의 날짜 (기록이 하나도 없으면 None)"""
+    dates = [getattr(row, name + '_date') for name, _, _ in METRICS if getattr(row, name + '_date') is not None]
+    row.improved_on = max(dates) if dates else None
+
+
+def _holds_record(row, lift):
+    """lift가 row의 기록 중 하나를 세운 기록인지"""
+    return any(
+        metric(lift) is not None and metric(lift) == getattr(row, name) and lift.date == getattr(row, name + '_date')
+        for name, metric, _ in METRICS
+    )
+
+
+def _load(user_id, exercise_ids):
+    return {
+        row.exercise_id: row
+        for row in PersonalRecord.query.filter(
+            PersonalRecord.user_id == user_id,
+            PersonalRecord.exercise_id.in_(exercise_ids)
+        )
+    }
+
+
+def add_lifts(user_id, new_lifts):
+    """새 기록들을 PR에 반영한다 (대상 종목의 PR 행은 한 번에 읽음). 커밋은 호출한 쪽에서 한다."""
+    if not new_lifts:
+        return
+    rows = _load(user_id, {lift.exercise_id for lift in new_lifts})
+    for lift in new_lifts:
+        row = rows.get(lift.exercise_id)
+        if row is None:
+            row = rows[lift.exercise_id] = PersonalRecord(user_id=user_id, exercise_id=lift.exercise_id)
+            db.session.add(row)
+        _apply(row, lift)
+    for row in rows.values():
+        if row.improved_on is None and row in db.session.new:
+            db.session.expunge(row)  # 무게/거리가 없는 기록뿐이면 PR 행을 만들지 않음
+
+
+def apply_diff(user_id, old_lifts, new_lifts):
+    """세션 수정/삭제 전후 기록을 비교해 PR을 갱신한다
+
+    새 기록(세션/운동 기록)은 이미 flush되어 있어야 한다 (다시 계산할 종목은 원본에서 읽음).
+    """
+    removed = Counter(old_lifts) - Counter(new_lifts)
+    added = Counter(new_lifts) - Counter(old_lifts)
+    if not removed and not added:
+        return
+    rows = _load(user_id, {lift.exercise_id for lift in removed} | {lift.exercise_id for lift in added})
+    stale = {
+        lift.exercise_id for lift in removed
+        if lift.exercise_id in rows and _holds_record(rows[lift.exercise_id], lift)
+    }
+    add_lifts(user_id, [lift for lift in added if lift.exercise_id not in stale])
+    if stale:
+        recompute(user_id, stale)
+
+
+def recompute(user_id, exercise_ids):
+    """사용자의 지정한 종목 PR만 원본 기록에서 다시 계산한다"""
+    rows = _load(user_id, exercise_ids)
+    for row in rows.values():
+        for name, _, _ in METRICS:
+            setattr(row, name, None)
+            setattr(row, name + '_date', None)
+
+    records = db.session.query(
+        WorkoutRecord.exercise_id, WorkoutSession.date, WorkoutRecord.sets, WorkoutRecord.reps,
+        WorkoutRecord.weight, WorkoutRecord.duration, WorkoutRecord.distance
+    ).join(WorkoutSession, WorkoutRecord.session_id == WorkoutSession.id).filter(
+        WorkoutSession.user_id == user_id,
+        WorkoutRecord.exercise_id.in_(exercise_ids)
+    )
+    archived = (lift for _, _, lift in _archived_lifts(db.session.connection(), user_id, set(exercise_ids)))
+    for lift in itertools.chain((Lift(*record) for record in records), archived):
+        row = rows.get(lift.exercise_id)
+        if row is None:
+            row = rows[lift.exercise_id] = PersonalRecord(user_id=user_id, exercise_id=lift.exercise_id)
+            db.session.add(row)
+        _apply(row, lift)
+
+    for row in rows.values():
+        _update_improved_on(row)
+        if row.improved_on is None:
+            if row in db.session.new:
+                db.session.expunge(row)
+            else:
+                db.session.delete(row)
+
+
+def _archived_lifts(connection, user_id=None, exercise_ids=None):
+    """보관된 기록 → (user_id, 종목 id, Lift) (보관 테이블이 없는 마이그레이션 단계에서는 비어 있음)"""
+    if not inspect(connection).has_table(WorkoutArchive.__tablename__):
+        return
+    for chunk_user_id, _, sessions in archive.iter_chunks(connection.execute, user_id):
+        for session in sessions:
+            for r in session.records:
+                if exercise_ids is None or r.exercise_id in exercise_ids:
+                    yield chunk_user_id, r.exercise_id, Lift(
+                        r.exercise_id, session.date, r.sets, r.reps, r.weight, r.duration, r.distance
+                    )
+
+
+def clear(user_id=None, exercise_id=None):
+    """사용자(None이면 모든 사용자) 또는 종목의 PR 행을 지운다"""
+    query = PersonalRecord.query
+    if user_id is not None:
+        query = query.filter(PersonalRecord.user_id == user_id)
+    if exercise_id is not None:
+        query = query.filter(PersonalRecord.exercise_id == exercise_id)
+    query.delete(synchronize_session=False)
+
+
+def rebuild(connection=None, batch_size=5000):
+    """원본 기록에서 모든 사용자의 PR을 처음부터 다시 만든다"""
+    session_t = WorkoutSession.__table__
+    record_t = WorkoutRecord.__table__
+    execute = connection.execute if connection is not None else db.session.execute
+    execute(PersonalRecord.__table__.delete())
+
+    query = db.select(
+        session_t.c.user_id, record_t.c.exercise_id, session_t.c.date, record_t.c.sets, record_t.c.reps,
+        record_t.c.weight, record_t.c.duration, record_t.c.distance
+    ).select_from(record_t.join(session_t, record_t.c.session_id == session_t.c.id))
+    if connection is not None:
+        result = connection.execution_options(yield_per=batch_size).execute(query)
+    else:
+        result = db.session.execute(query, execution_options={'yield_per': batch_size})
+
+    rows = {}
+    archived = _archived_lifts(connection if connection is not None else db.session.connection())
+    for user_id, *fields in itertools.chain(result, ((user_id, *lift) for user_id, _, lift in archived)):
+        lift = Lift(*fields)
+        key = (user_id, lift.exercise_id)
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = PersonalRecord(user_id=user_id, exercise_id=lift.exercise_id)
+        _apply(row, lift)
+
+    values = [
+        {column.name: getattr(row, column.key) for column in PersonalRecord.__table__.columns}
+        for row in rows.values() if row.improved_on is not None
+    ]
+    if values:
+        execute(PersonalRecord.__table__.insert(), values)
@@ -0,0 +1,319 @@
+"""
+일일 집계(rollup) 테이블 관리
+
+운동 세션/기록을 쓰는 라우트가 같은 트랜잭션 안에서 DailyRollup과 DailyBodyPartRollup을
+증감시키므로, 통계 화면은 원본 기록 대신 날짜별 집계 행만 읽으면 된다.
+집계가 어긋났을 때는 rebuild()로 원본 테이블에서 다시 만든다 (flask rebuild-rollups).
+보관된 기록(archive.py)의 집계 행은 그대로 남고, rebuild()는 보관 묶음까지 포함해서 다시 만든다.
+"""
+
+from collections import Counter, defaultdict
+
+from sqlalchemy import and_, bindparam, delete, func, insert, inspect, select, update
+
+import archive
+from models import db, DailyRollup, DailyBodyPartRollup, Exercise, WorkoutArchive, WorkoutSession, WorkoutRecord
+
+
+def _session_contribution(session):
+    """세션 하나가 집계에 더하는 값 (운동 시간, 볼륨, 거리, 부위별 기록 수)"""
+    rows = db.session.query(
+        Exercise.body_part,
+        WorkoutRecord.sets,
+        WorkoutRecord.reps,
+        WorkoutRecord.weight,
+        WorkoutRecord.distance
+    ).outerjoin(Exercise, WorkoutRecord.exercise_id == Exercise.id).filter(
+        WorkoutRecord.session_id == session.id
+    ).all()
+
+    volume = sum((row.sets or 0) * (row.reps or 0) * (row.weight or 0) for row in rows)
+    distance = sum(row.distance or 0 for row in rows)
+    body_parts = Counter(row.body_part for row in rows if row.body_part is not None)
+    return session.total_duration or 0, volume, distance, body_parts
+
+
+def _adjust_body_part(user_id, day, body_part, delta):
+    row = db.session.get(DailyBodyPartRollup, (user_id, day, body_part))
+    if row is None:
+        if delta <= 0:
+            return  # 집계가 어긋나 행이 없음 (빼기만 하면 되므로 만들지 않음, rebuild()로 바로잡음)
+        row = DailyBodyPartRollup(user_id=user_id, date=day, body_part=body_part, record_count=0)
+        db.session.add(row)
+    row.record_count += delta
+    if row.record_count <= 0:
+        db.session.delete(row)
+
+
+def _apply(user_id, day, sessions, duration, volume, distance, body_parts):
+    rollup = db.session.get(DailyRollup, (user_id, day))
+    if rollup is None and sessions > 0:
+        rollup = DailyRollup(user_id=user_id, date=day,
+                             session_count=0, total_duration=0, volume=0, distance=0)
+        db.session.add(rollup)
+    if rollup is not None:  # 없으면 집계가 어긋난 것 (세션을 빼거나 고치는 중이면 만들지 않음)
+        rollup.session_count += sessions
+        rollup.total_duration += duration
+        rollup.volume += volume
+        rollup.distance += distance
+        if rollup.session_count <= 0:
+            db.session.delete(rollup)
+
+    for body_part, count in body_parts.items():
+        if count:
+            _adjust_body_part(user_id, day, body_part, count)
+
+
+def _apply_session(session, sign):
+    duration, volume, distance, body_parts = _session_contribution(session)
+    _apply(session.user_id, session.date, sign, sign * duration, sign * volume, sign * distance,
+           {body_part: sign * count for body_part, count in body_parts.items()})
+
+
+def add_session(session):
+    """세션(과 이미 추가된 운동 기록)을 집계에 더한다. 커밋은 호출한 쪽에서 한다."""
+    _apply_session(session, 1)
+
+
+def remove_session(session):
+    """세션을 집계에서 뺀다. 세션/기록을 수정하거나 지우기 전에 호출해야 한다."""
+    _apply_session(session, -1)
+
+
+def snapshot(session):
+    """수정 전 세션이 집계에 더하고 있는 값 (update_session에 넘김)"""
+    return session.user_id, session.date, _session_contribution(session)
+
+
+def update_session(before, session):
+    """수정 전 snapshot()과 지금 세션의 차이만 집계에 반영한다 (flush된 뒤 호출)
+
+    날짜가 그대로면 기존 집계 행을 차이만큼 고치므로 행을 지웠다가 다시 만들지 않는다.
+    """
+    user_id, day, (duration, volume, distance, body_parts) = before
+    if (user_id, day) != (session.user_id, session.date):
+        _apply(user_id, day, -1, -duration, -volume, -distance,
+               {body_part: -count for body_part, count in body_parts.items()})
+        add_session(session)
+        return
+
+    new_duration, new_volume, new_distance, new_body_parts = _session_contribution(session)
+    _apply(user_id, day, 0, new_duration - duration, new_volume - volume, new_distance - distance,
+           {body_part: new_body_parts[body_part] - body_parts[body_part]
+            for body_part in set(body_parts) | set(new_body_parts)})
+
+
+def add_batch(daily, body_parts):
+    """여러 세션을 한꺼번에 더한다 (대량 가져오기용)
+
+    daily: {(user_id, date): [세션 수, 운동 시간, 볼륨, 거리]}
+    body_parts: {(user_id, date, 부위): 기록 수}
+    기존 집계 행은 배치의 날짜 범위로 한 번에 읽어 온다.
+    """
+    if not daily:
+        return
+    dates = [day for _, day in daily]
+    user_ids = {user_id for user_id, _ in daily}
+    existing = {
+        (row.user_id, row.date): row
+        for row in DailyRollup.query.filter(
+            DailyRollup.user_id.in_(user_ids),
+            DailyRollup.date >= min(dates),
+            DailyRollup.date <= max(dates)
+        )
+    }
+    for key, (sessions, duration, volume, distance) in daily.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            rollup = DailyRollup(user_id=key[0], date=key[1],
+                                 session_count=0, total_duration=0, volume=0, distance=0)
+            db.session.add(rollup)
+        rollup.session_count += sessions
+        rollup.total_duration += duration
+        rollup.volume += volume
+        rollup.distance += distance
+
+    existing_parts = {
+        (row.user_id, row.date, row.body_part): row
+        for row in DailyBodyPartRollup.query.filter(
+            DailyBodyPartRollup.user_id.in_(user_ids),
+            DailyBodyPartRollup.date >= min(dates),
+            DailyBodyPartRollup.date <= max(dates)
+        )
+    }
+    for key, count in body_parts.items():
+        row = existing_parts.get(key)
+        if row is None:
+            row = DailyBodyPartRollup(user_id=key[0], date=key[1], body_part=key[2], record_count=0)
+            db.session.add(row)
+        row.record_count += count
+
+
+def clear(user_id=None):
+    """사용자(None이면 모든 사용자)의 집계 행을 지운다 (전체 운동 기록 삭제 시)"""
+    body_parts = DailyBodyPartRollup.query
+    daily = DailyRollup.query
+    if user_id is not None:
+        body_parts = body_parts.filter(DailyBodyPartRollup.user_id == user_id)
+        daily = daily.filter(DailyRollup.user_id == user_id)
+    body_parts.delete()
+    daily.delete()
+
+
+def move_exercise_body_part(exercise_id, old_body_part, new_body_part):
+    """운동 종목의 부위가 바뀌거나(new_body_part) 종목이 삭제될 때(None) 부위별 집계를 옮긴다
+
+    보관된 기록도 옮겨야 하므로 보관 묶음을 모두 풀어 본다 (종목 수정은 드묾).
+    """
+    rows = db.session.query(
+        WorkoutSession.user_id,
+        WorkoutSession.date,
+        func.count(WorkoutRecord.id)
+    ).join(WorkoutRecord, WorkoutRecord.session_id == WorkoutSession.id).filter(
+        WorkoutRecord.exercise_id == exercise_id
+    ).group_by(WorkoutSession.user_id, WorkoutSession.date).all()
+
+    counts = Counter({(user_id, day): count for user_id, day, count in rows})
+    for user_id, _, sessions in archive.iter_chunks():
+        for session in sessions:
+            count = sum(record.exercise_id == exercise_id for record in session.records)
+            if count:
+                counts[user_id, session.date] += count
+
+    for (user_id, day), count in counts.items():
+        _adjust_body_part(user_id, day, old_body_part, -count)
+        if new_body_part is not None:
+            _adjust_body_part(user_id, day, new_body_part, count)
+
+
+def rebuild(connection=None):
+    """원본 테이블에서 집계를 처음부터 다시 만든다"""
+    execute = connection.execute if connection is not None else db.session.execute
+    execute(delete(DailyBodyPartRollup.__table__))
+    execute(delete(DailyRollup.__table__))
+
+    session_t = WorkoutSession.__table__
+    record_t = WorkoutRecord.__table__
+    exercise_t = Exercise.__table__
+
+    per_session = select(
+        record_t.c.session_id,
+        func.sum(record_t.c.sets * record_t.c.reps * func.coalesce(record_t.c.weight, 0)).label('volume'),
+        func.sum(func.coalesce(record_t.c.distance, 0)).label('distance')
+    ).group_by(record_t.c.session_id).subquery()
+
+    daily = select(
+        session_t.c.user_id,
+        session_t.c.date,
+        func.count(session_t.c.id),
+        func.coalesce(func.sum(session_t.c.total_duration), 0),
+        func.coalesce(func.sum(per_session.c.volume), 0),
+        func.coalesce(func.sum(per_session.c.distance), 0)
+    ).select_from(
+        session_t.outerjoin(per_session, per_session.c.session_id == session_t.c.id)
+    ).group_by(session_t.c.user_id, session_t.c.date)
+    execute(insert(DailyRollup.__table__).from_select(
+        ['user_id', 'date', 'session_count', 'total_duration', 'volume', 'distance'], daily
+    ))
+
+    body_parts = select(
+        session_t.c.user_id,
+        session_t.c.date,
+        exercise_t.c.body_part,
+        func.count(record_t.c.id)
+    ).select_from(
+        record_t.join(session_t, record_t.c.session_id == session_t.c.id)
+        .join(exercise_t, record_t.c.exercise_id == exercise_t.c.id)
+    ).group_by(session_t.c.user_id, session_t.c.date, exercise_t.c.body_part)
+    execute(insert(DailyBodyPartRollup.__table__).from_select(
+        ['user_id', 'date', 'body_part', 'record_count'], body_parts
+    ))
+    _add_archived(connection if connection is not None else db.session.connection())
+
+
+def _merge_rows(execute, table, keys, rows):
+    """{키: 값 dict}를 집계 테이블에 더한다 (있는 행은 UPDATE로 더하고 없는 행은 INSERT)"""
+    if not rows:
+        return
+    dates = [key[1] for key in rows]
+    existing = set(map(tuple, execute(select(*[table.c[name] for name in keys]).where(
+        table.c.user_id.in_({key[0] for key in rows}), table.c.date >= min(dates), table.c.date <= max(dates)
+    ))))
+    updates = [dict(zip(['k_' + name for name in keys], key), **values) for key, values in rows.items() if key in existing]
+    inserts = [dict(zip(keys, key), **values) for key, values in rows.items() if key not in existing]
+    if updates:
+        columns = next(iter(rows.values()))
+        execute(update(table).where(and_(*[table.c[name] == bindparam('k_' + name) for name in keys])).values({
+            name: table.c[name] + bindparam(name) for name in columns
+        }), updates)
+    if inserts:
+        execute(insert(table), inserts)
+
+
+def _add_archived(connection):
+    """보관 묶음의 세션/기록을 집계에 더한다 (rebuild에서 핫 테이블을 집계한 뒤 호출)"""
+    if not inspect(connection).has_table(WorkoutArchive.__tablename__):
+        return  # 보관 테이블을 만드는 마이그레이션 전 단계
+    execute = connection.execute
+    body_part_of = None
+    daily = defaultdict(lambda: {'session_count': 0, 'total_duration': 0, 'volume': 0, 'distance': 0})
+    body_parts = defaultdict(lambda: {'record_count': 0})
+    for user_id, _, sessions in archive.iter_chunks(execute):
+        if body_part_of is None:  # 보관 묶음이 없으면 종목 표도 읽지 않는다
+            body_part_of = dict(execute(select(Exercise.__table__.c.id, Exercise.__table__.c.body_part)).all())
+        for session in sessions:
+            row = daily[user_id, session.date]
+            row['session_count'] += 1
+            row['total_duration'] += session.total_duration or 0
+            for record in session.records:
+                row['volume'] += record.sets * record.reps * (record.weight or 0)
+                row['distance'] += record.distance or 0
+                body_part = body_part_of.get(record.exercise_id)
+                if body_part is not None:
+                    body_parts[user_id, session.date, body_part]['record_count'] += 1
+    _merge_rows(execute, DailyRollup.__table__, ('user_id', 'date'), daily)
+    _merge_rows(execute, DailyBodyPartRollup.__table__, ('user_id', 'date', 'body_part'), body_parts)
+
+
+# 읽기용 헬퍼 (user_id가 None이면 전체 사용자 합계)
+
+def daily_totals(start_date, end_date, user_id=None):
+    """기간 내 날짜별 (세션 수, 총 운동 시간)"""
+    query = db.session.query(
+        DailyRollup.date,
+        func.sum(DailyRollup.session_count),
+        func.sum(DailyRollup.total_duration)
+    ).filter(
+        DailyRollup.date >= start_date,
+        DailyRollup.date <= end_date
+    )
+    if user_id is not None:
+        query = query.filter(DailyRollup.user_id == user_id)
+    return {row[0]: (row[1], row[2]) for row in query.group_by(DailyRollup.date).all()}
+
+
+def workout_dates_before(day, user_id=None):
+    """day 이전에 운동한 날짜를 최근 순으로 돌려주는 쿼리"""
+    query = db.session.query(DailyRollup.date).filter(DailyRollup.date < day)
+    if user_id is not None:
+        query = query.filter(DailyRollup.user_id == user_id)
+    return query.distinct().order_by(DailyRollup.date.desc())
+
+
+def total_duration(user_id=None):
+    """누적 운동 시간 (분)"""
+    query = db.session.query(func.sum(DailyRollup.total_duration))
+    if user_id is not None:
+        query = query.filter(DailyRollup.user_id == user_id)
+    return query.scalar() or 0
+
+
+def body_part_counts(user_id=None):
+    """부위별 누적 기록 수 [(부위, 기록 수)]"""
+    query = db.session.query(
+        DailyBodyPartRollup.body_part,
+        func.sum(DailyBodyPartRollup.record_count)
+    )
+    if user_id is not None:
+        query = query.filter(DailyBodyPartRollup.user_id == user_id)
+    return query.group_by(DailyBodyPartRollup.body_part).order_by(DailyBodyPartRollup.body_part).all()
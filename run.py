@@ -1,40 +1,82 @@
 #!/usr/bin/env python3
 """
 운동 관리 Flask 웹앱 실행 스크립트
+
+gunicorn과 flask CLI는 이 모듈의 app을 사용한다 (gunicorn -c gunicorn.conf.py run:app, flask --app run ...).
+설정은 FLASK_ENV(development/testing/production)로 고른다.
 """
 
 import os
-from app import app, db
+
+from flask import Flask
+
+import cache
+import changes
+import compression
+import database
+import exercise_search
+import goal_engine
+import instrumentation
+import jobs
+import migrations
+import serialization
+import templating
+import tenancy
+from app import bp
 from config import config
+from models import db
 
-def create_app(config_name=None):
-    """애플리케이션 팩토리 함수"""
+def create_app(config_name=None, overrides=None):
+    """애플리케이션 팩토리 함수 (overrides: 설정 클래스 위에 덮어쓸 값, 벤치마크 등에서 사용)"""
     if config_name is None:
         config_name = os.environ.get('FLASK_ENV', 'development')
     
-    app.config.from_object(config[config_name])
+    app = Flask(__name__)
+    app.config.from_object(config.get(config_name, config['default']))
+    app.config.update(overrides or {})
+    app.config['SQLALCHEMY_DATABASE_URI'] = database.normalize_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config['SQLALCHEMY_BINDS'] = {
+        key: database.normalize_database_url(url) for key, url in (app.config.get('SQLALCHEMY_BINDS') or {}).items()
+    }
+    app.config.setdefault(
+        'SQLALCHEMY_ENGINE_OPTIONS',
+        database.engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    )
+    
+    tenancy.init_app(app)
+    db.init_app(app)
+    database.init_app(app)
+    changes.init_app(app)
+    exercise_search.init_app(app)
+    goal_engine.init_app(app)
+    instrumentation.init_app(app)
+    compression.init_app(app)
+    serialization.init_app(app)
+    cache.init_app(app)
+    templating.init_app(app)
+    jobs.init_app(app)
+    app.register_blueprint(bp)
     
     return app
 
+app = create_app()
+
 if __name__ == '__main__':
-    # 환경 설정
     config_name = os.environ.get('FLASK_ENV', 'development')
-    app = create_app(config_name)
     
     # 데이터베이스 초기화
     with app.app_context():
-        db.create_all()
+        for key in tenancy.shard_keys():
+            db.metadata.create_all(db.engines[key])
+            migrations.upgrade(engine=db.engines[key])
         print("데이터베이스가 초기화되었습니다.")
     
     # 개발 서버 실행
     port = int(os.environ.get('PORT', 5000))
-    debug = config_name == 'development'
+    debug = app.config.get('DEBUG', False)
     
     print(f"서버가 포트 {port}에서 실행됩니다.")
     print(f"디버그 모드: {debug}")
     print(f"환경: {config_name}")
     
     app.run(host='0.0.0.0', port=port, debug=debug)
-
-
-
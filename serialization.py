@@ -0,0 +1,152 @@
+"""
+JSON 직렬화
+
+jsonify, request.get_json(), 템플릿의 tojson 필터, NDJSON/JSON Lines 스트리밍이 모두 여기 백엔드를 쓴다.
+
+백엔드 (JSON_BACKEND)
+- auto: orjson 패키지가 있으면 orjson, 없으면 json (기본값)
+- orjson: C 구현 (orjson 패키지 필요)
+- json: 표준 라이브러리
+
+어느 백엔드든 출력이 같도록 맞춘다.
+- date/datetime/time은 ISO 8601 문자열 (orjson은 자체 처리, json은 default에서 isoformat)
+- 비ASCII 문자는 그대로 UTF-8 (\\uXXXX로 이스케이프하지 않음), 구분자 공백 없음
+- jsonify 응답은 Flask 기본값처럼 키를 정렬하고, 스트리밍 줄은 dict 순서 그대로 쓴다
+Decimal, UUID, dataclass, __html__이 있는 객체는 Flask 기본 provider와 같이 변환한다.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+
+from flask import current_app, has_app_context
+from flask.json.provider import DefaultJSONProvider
+
+
+def default(obj):
+    """백엔드가 직접 처리하지 못하는 값을 JSON 값으로 바꾼다"""
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class StdlibBackend:
+    """표준 라이브러리 json"""
+
+    name = 'json'
+
+    def dumps(self, obj, sort_keys=False, indent=None):
+        return json.dumps(
+            obj, default=default, ensure_ascii=False, sort_keys=sort_keys, indent=indent,
+            separators=(',', ': ') if indent else (',', ':')
+        ).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonBackend:
+    """orjson (dumps가 bytes를 바로 돌려주고 date/datetime을 C에서 처리)"""
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson  # 선택 의존성
+        self._orjson = orjson
+
+    def dumps(self, obj, sort_keys=False, indent=None):
+        orjson = self._orjson
+        option = orjson.OPT_NON_STR_KEYS  # json처럼 int 키를 문자열로
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+
+BACKENDS = {'json': StdlibBackend, 'orjson': OrjsonBackend}
+
+
+def create_backend(name='auto'):
+    """이름에 맞는 백엔드를 만든다 (auto는 orjson을 쓸 수 있으면 orjson)"""
+    if name == 'auto':
+        try:
+            return OrjsonBackend()
+        except ImportError:
+            return StdlibBackend()
+    if name not in BACKENDS:
+        raise ValueError(f'지원하지 않는 JSON 백엔드입니다: {name}')
+    return BACKENDS[name]()
+
+
+_fallback = None
+
+
+def get_backend():
+    """현재 앱의 백엔드 (앱 컨텍스트 밖이나 init_app() 하지 않은 앱에서는 auto 백엔드)"""
+    global _fallback
+    backend = current_app.extensions.get('json_backend') if has_app_context() else None
+    if backend is not None:
+        return backend
+    if _fallback is None:
+        _fallback = create_backend()
+    return _fallback
+
+
+def dumps(obj, sort_keys=False):
+    """obj를 UTF-8 JSON bytes로 직렬화한다 (스트리밍 줄 단위용, 키 순서 유지)"""
+    return get_backend().dumps(obj, sort_keys=sort_keys)
+
+
+def dumps_lines(items):
+    """dict들을 JSON Lines bytes 한 덩어리로 (줄마다 끝에 개행)"""
+    encode = get_backend().dumps
+    return b''.join(encode(item) + b'\n' for item in items)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider: 설정한 백엔드로 jsonify / get_json / tojson을 처리한다"""
+
+    default = staticmethod(default)
+    ensure_ascii = False
+
+    def __init__(self, app, backend):
+        super().__init__(app)
+        self.backend = backend
+
+    def _indent(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {'sort_keys', 'indent'}:
+            # json 전용 인자(cls, separators 등)를 넘긴 호출은 표준 라이브러리로
+            return super().dumps(obj, **kwargs)
+        return self.backend.dumps(obj, kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent')).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.backend.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = self.backend.dumps(obj, self.sort_keys, 2 if self._indent() else None)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.config.setdefault('JSON_BACKEND', 'auto')
+    backend = create_backend(app.config['JSON_BACKEND'])
+    app.extensions['json_backend'] = backend
+    app.json = JSONProvider(app, backend)
@@ -0,0 +1,84 @@
+// 운동 종목 검색 (/api/exercises/search)
+// 운동 기록 폼의 종목 선택 목록(select[name="exercise_id"])을 전체 목록 대신 검색 결과로 채운다.
+// 각 운동 행의 .exercise-search 입력에 초성("ㅂㅊ"), 입력 중인 글자("벤ㅊ"), 별칭으로 검색할 수 있다.
+
+const EXERCISE_SEARCH_DELAY = 150;  // 입력이 멈춘 뒤 검색까지 기다리는 시간 (ms)
+const EXERCISE_SEARCH_LIMIT = 20;
+
+function exerciseOption(exercise) {
+    const option = document.createElement('option');
+    option.value = exercise.id;
+    option.setAttribute('data-body-part', exercise.body_part);
+    option.setAttribute('data-name', exercise.name);
+    option.textContent = `${exercise.name} (${exercise.body_part})`;
+    return option;
+}
+
+async function fetchExercises(params) {
+    const response = await fetch('/api/exercises/search?' + new URLSearchParams({
+        limit: EXERCISE_SEARCH_LIMIT, ...params
+    }));
+    if (!response.ok) {
+        return [];
+    }
+    return (await response.json()).results;
+}
+
+// 검색 결과로 선택 목록을 바꾼다. 검색어가 있으면 첫 결과를 바로 고르고,
+// 검색어가 없거나 결과가 없으면 지금 고른 종목을 남겨 둔다.
+function fillExerciseSelect(select, exercises, query) {
+    const current = select.selectedIndex > 0 ? select.options[select.selectedIndex] : null;
+    const keep = current && (!query || !exercises.length) ? current : null;
+    const placeholder = document.createElement('option');
+    placeholder.value = '';
+    placeholder.textContent = '선택하세요';
+    select.replaceChildren(placeholder);
+    if (keep) {
+        select.appendChild(keep);
+    }
+    exercises
+        .filter(exercise => !keep || String(exercise.id) !== keep.value)
+        .forEach(exercise => select.appendChild(exerciseOption(exercise)));
+    if (query && exercises.length) {
+        select.selectedIndex = 1;
+    } else if (keep) {
+        select.value = keep.value;
+    }
+    select.dataset.loaded = 'true';
+    if (typeof updateFieldsForExercise === 'function' && select.value) {
+        updateFieldsForExercise(select);
+    }
+}
+
+async function searchExercises(select, query) {
+    // 늦게 도착한 이전 검색 결과는 버림
+    const sequence = (Number(select.dataset.searchSequence) || 0) + 1;
+    select.dataset.searchSequence = sequence;
+    const exercises = await fetchExercises({ q: query });
+    if (Number(select.dataset.searchSequence) === sequence) {
+        fillExerciseSelect(select, exercises, query);
+    }
+}
+
+function exerciseSelectFor(element) {
+    return element.closest('.exercise-row').querySelector('select[name="exercise_id"]');
+}
+
+document.addEventListener('input', function(event) {
+    if (!event.target.matches('.exercise-search')) {
+        return;
+    }
+    const input = event.target;
+    clearTimeout(input.searchTimer);
+    input.searchTimer = setTimeout(() => {
+        searchExercises(exerciseSelectFor(input), input.value.trim());
+    }, EXERCISE_SEARCH_DELAY);
+});
+
+// 검색하지 않고 목록을 열면 처음 몇 개를 채워 둠
+document.addEventListener('focusin', function(event) {
+    const select = event.target;
+    if (select.matches('select[name="exercise_id"]') && !select.dataset.loaded) {
+        searchExercises(select, '');
+    }
+});
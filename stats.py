@@ -0,0 +1,167 @@
+"""
+대시보드 통계 엔진
+
+대시보드에 필요한 주간/월간 횟수, 총 운동 시간, 히트맵, 연속 운동일을 일일 집계(DailyRollup)에서
+날짜 범위 쿼리 한 번으로 가져온 뒤 메모리에서 계산한다. 목표 진행률은 저장된 값을 읽는다.
+"""
+
+from datetime import timedelta
+
+import goal_engine
+import rollups
+from models import db, Exercise, PersonalRecord
+
+HEATMAP_DAYS = 90  # 히트맵 기간 (최근 3개월)
+PR_RECENT_DAYS = 30  # 이 기간 안에 세운 개인 기록만 최근 성과로 표시
+
+
+def count_streak(daily, today, window_start, user_id):
+    """오늘부터 거꾸로 운동한 날이 이어지는 일수를 센다
+
+    집계 구간 안에서는 메모리의 날짜 맵만 보고, 연속 기록이 구간 시작일까지
+    이어질 때만 그 이전 날짜들을 내림차순으로 한 번 더 읽는다.
+    """
+    streak = 0
+    current_date = today
+    while current_date >= window_start:
+        if current_date not in daily:
+            return streak
+        streak += 1
+        current_date -= timedelta(days=1)
+
+    older_dates = rollups.workout_dates_before(window_start, user_id).yield_per(500)
+    for (session_date,) in older_dates:
+        if session_date != current_date:
+            break
+        streak += 1
+        current_date -= timedelta(days=1)
+    return streak
+
+
+def heatmap_intensity(count, duration):
+    """운동 횟수 + 30분당 1 강도, 최대 5"""
+    if not count:
+        return 0
+    return min(5, count + (duration or 0) // 30)
+
+
+def goal_progress_list(goals):
+    """목표별 진행률(%) - 운동/몸무게 기록을 쓸 때 갱신해 둔 값만 읽는다 (goal_engine.py)"""
+    return [
+        {
+            'title': goal.title,
+            'progress': round(min(100, max(0, (goal.current_value or 0) / goal.target_value * 100)), 1),
+            'is_achieved': goal.is_achieved,
+        }
+        for goal in goals if goal.target_value and goal.target_value > 0
+    ]
+
+
+def build_achievements(consecutive_days, monthly_sessions, today, user_id):
+    """최근 성과 목록을 만든다"""
+    achievements = []
+
+    # 연속 운동일 성과
+    if consecutive_days >= 7:
+        achievements.append({
+            'title': f'{consecutive_days}일 연속 운동 달성!',
+            'icon': 'bi-award',
+            'color': 'text-warning',
+            'days_ago': 0
+        })
+    elif consecutive_days >= 3:
+        achievements.append({
+            'title': f'{consecutive_days}일 연속 운동 중!',
+            'icon': 'bi-fire',
+            'color': 'text-danger',
+            'days_ago': 0
+        })
+
+    # 월간 운동 횟수 성과
+    if monthly_sessions >= 20:
+        achievements.append({
+            'title': f'이번 달 운동 {monthly_sessions}회 달성',
+            'icon': 'bi-calendar-check',
+            'color': 'text-primary',
+            'days_ago': 0
+        })
+    elif monthly_sessions >= 10:
+        achievements.append({
+            'title': f'이번 달 운동 {monthly_sessions}회 진행 중',
+            'icon': 'bi-calendar-check',
+            'color': 'text-info',
+            'days_ago': 0
+        })
+
+    # 개인 기록 갱신 (PR 인덱스에서 최근 PR_RECENT_DAYS일 안에 가장 최근 갱신한 종목)
+    latest_pr = db.session.query(
+        Exercise.name, PersonalRecord.improved_on
+    ).join(Exercise, PersonalRecord.exercise_id == Exercise.id).filter(
+        PersonalRecord.user_id == user_id,
+        PersonalRecord.improved_on >= today - timedelta(days=PR_RECENT_DAYS)
+    ).order_by(PersonalRecord.improved_on.desc()).first()
+
+    if latest_pr:
+        achievements.append({
+            'title': f'{latest_pr.name} 개인기록 갱신',
+            'icon': 'bi-graph-up',
+            'color': 'text-success',
+            'days_ago': (today - latest_pr.improved_on).days
+        })
+
+    return achievements
+
+
+def compute_dashboard_stats(today, user_id):
+    """대시보드 템플릿에 넘길 통계 값들을 계산한다"""
+    week_ago = today - timedelta(days=7)
+    month_ago = today - timedelta(days=30)
+    window_start = min(
+        today - timedelta(days=HEATMAP_DAYS - 1),
+        month_ago,
+        today.replace(day=1),
+        today - timedelta(days=today.weekday())
+    )
+
+    # 날짜별 세션 수/운동 시간 (집계 구간 전체를 한 번에)
+    daily = rollups.daily_totals(window_start, today, user_id)
+
+    weekly_sessions = sum(count for d, (count, _) in daily.items() if d >= week_ago)
+    monthly_sessions = sum(count for d, (count, _) in daily.items() if d >= month_ago)
+
+    # 총 운동 시간 (분)
+    total_duration = rollups.total_duration(user_id)
+
+    # 부위별 운동 분포
+    body_part_stats = rollups.body_part_counts(user_id)
+
+    # 최근 7일간 운동 데이터
+    recent_sessions = [
+        (d, count, duration) for d, (count, duration) in sorted(daily.items()) if d >= week_ago
+    ]
+
+    goal_progress = goal_progress_list(goal_engine.load(user_id, today))
+
+    consecutive_days = count_streak(daily, today, window_start, user_id)
+    achievements = build_achievements(consecutive_days, monthly_sessions, today, user_id)
+
+    heatmap_data = []
+    for i in range(HEATMAP_DAYS):
+        check_date = today - timedelta(days=i)
+        count, duration = daily.get(check_date, (0, 0))
+        heatmap_data.append({
+            'date': check_date,
+            'intensity': heatmap_intensity(count, duration)
+        })
+
+    return {
+        'weekly_sessions': weekly_sessions,
+        'monthly_sessions': monthly_sessions,
+        'total_duration': total_duration,
+        'body_part_stats': body_part_stats,
+        'recent_sessions': recent_sessions,
+        'goal_progress': goal_progress,
+        'consecutive_days': consecutive_days,
+        'achievements': achievements,
+        'heatmap_data': heatmap_data,
+    }
@@ -0,0 +1,193 @@
+"""
+모바일/오프라인 클라이언트용 일괄 쓰기 (/api/sync)
+
+오프라인에서 쌓인 운동 세션, 운동 기록, 몸무게 기록을 요청 한 번에 받아 한 트랜잭션으로 반영한다.
+항목마다 클라이언트가 만든 멱등 키(key)를 붙이며, 이미 반영한 키는 다시 만들지 않고 처음 만든
+행의 id를 돌려주므로 응답을 못 받고 같은 배치를 다시 보내도 안전하다.
+
+    {"items": [
+        {"key": "c1", "type": "session", "date": "2024-01-31", "total_duration": 60, "notes": "",
+         "records": [{"exercise_id": 1, "sets": 3, "reps": 10, "weight": 60}]},
+        {"key": "c2", "type": "record", "session_key": "c1", "exercise_id": 2, "sets": 3, "reps": 12},
+        {"key": "c3", "type": "weight", "date": "2024-01-31", "weight": 70.5}
+    ]}
+
+- record 항목은 session_id(이미 있는 세션) 또는 session_key(이 배치나 이전 동기화에서 만든 세션의 키)로
+  세션을 가리킨다.
+- 모든 항목을 먼저 검사하고(운동 종목 확인은 쿼리 한 번), 잘못된 항목은 쓰지 않고 error 결과만 남긴다.
+  나머지는 모두 쓰고 호출한 쪽이 한 번 커밋한다.
+"""
+
+import prs
+import rollups
+import workout_edits
+from models import db, Exercise, SyncKey, WeightRecord, WorkoutRecord, WorkoutSession
+from workout_edits import EditError, number, parse_date, parse_notes, parse_record
+
+MAX_ITEMS = 500
+MAX_KEY_LENGTH = 100
+
+# 항목 종류 → 바뀌는 캐시 범위
+SCOPES = {'session': 'workouts', 'record': 'workouts', 'weight': 'weight'}
+
+
+def _parse_session(item):
+    unknown = set(item) - {'key', 'type', 'date', 'total_duration', 'notes', 'records'}
+    if unknown:
+        raise EditError(f'알 수 없는 필드입니다: {", ".join(sorted(unknown))}')
+    records = item.get('records', [])
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        raise EditError('records는 객체 목록이어야 합니다.')
+    return {
+        'date': parse_date(item.get('date')),
+        'total_duration': number(item, 'total_duration', int, nullable=True) if 'total_duration' in item else None,
+        'notes': parse_notes(item.get('notes', '')),
+        'records': [parse_record(record) for record in records],
+    }
+
+
+def _parse_record(item):
+    target = [field for field in ('session_id', 'session_key') if field in item]
+    if len(target) != 1:
+        raise EditError('record 항목에는 session_id와 session_key 중 하나가 있어야 합니다.')
+    values = parse_record({k: v for k, v in item.items() if k not in ('key', 'type', target[0])})
+    values[target[0]] = item[target[0]]
+    return values
+
+
+def _parse_weight(item):
+    unknown = set(item) - {'key', 'type', 'date', 'weight', 'body_fat_percentage', 'muscle_mass', 'notes'}
+    if unknown:
+        raise EditError(f'알 수 없는 필드입니다: {", ".join(sorted(unknown))}')
+    if item.get('weight') is None:
+        raise EditError('weight는 필수입니다.')
+    return {
+        'date': parse_date(item.get('date')),
+        'weight': number(item, 'weight', float),
+        'body_fat_percentage': number(item, 'body_fat_percentage', float, nullable=True)
+        if 'body_fat_percentage' in item else None,
+        'muscle_mass': number(item, 'muscle_mass', float, nullable=True) if 'muscle_mass' in item else None,
+        'notes': parse_notes(item.get('notes', '')),
+    }
+
+
+PARSERS = {'session': _parse_session, 'record': _parse_record, 'weight': _parse_weight}
+
+
+def _exercise_ids(item_type, values):
+    if item_type == 'session':
+        return {record['exercise_id'] for record in values['records']}
+    if item_type == 'record':
+        return {values['exercise_id']}
+    return set()
+
+
+def parse_batch(body):
+    """요청 본문 → [(키, 종류, 검사한 값 또는 EditError)] (배치 자체가 잘못되면 EditError)"""
+    items = body.get('items') if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise EditError('items 목록을 보내야 합니다.')
+    if len(items) > MAX_ITEMS:
+        raise EditError(f'한 번에 {MAX_ITEMS}개 항목까지 보낼 수 있습니다.')
+
+    parsed = []
+    for item in items:
+        key = item.get('key') if isinstance(item, dict) else None
+        item_type = item.get('type') if isinstance(item, dict) else None
+        try:
+            if not isinstance(key, str) or not 0 < len(key) <= MAX_KEY_LENGTH:
+                raise EditError(f'key는 1~{MAX_KEY_LENGTH}자 문자열이어야 합니다.')
+            if item_type not in PARSERS:
+                raise EditError(f'type은 {", ".join(PARSERS)} 중 하나여야 합니다.')
+            parsed.append((key, item_type, PARSERS[item_type](item)))
+        except EditError as e:
+            parsed.append((key if isinstance(key, str) else None, item_type, e))
+
+    # 운동 종목은 배치 전체에서 한 번에 확인
+    exercise_ids = set()
+    for _, item_type, values in parsed:
+        if not isinstance(values, EditError):
+            exercise_ids |= _exercise_ids(item_type, values)
+    known = {row.id for row in db.session.query(Exercise.id).filter(Exercise.id.in_(exercise_ids))} \
+        if exercise_ids else set()
+    for i, (key, item_type, values) in enumerate(parsed):
+        if isinstance(values, EditError):
+            continue
+        missing = _exercise_ids(item_type, values) - known
+        if missing:
+            parsed[i] = (key, item_type, EditError(f'없는 운동 종목입니다: {", ".join(map(str, sorted(missing)))}'))
+    return parsed
+
+
+def _create_session(user_id, values):
+    session = WorkoutSession(user_id=user_id, date=values['date'], total_duration=values['total_duration'],
+                             notes=values['notes'])
+    session.records = [WorkoutRecord(**record) for record in values['records']]
+    db.session.add(session)
+    db.session.flush()
+    rollups.add_session(session)
+    prs.add_lifts(user_id, prs.lifts(session, session.records))
+    return session.id
+
+
+def _create_record(user_id, values, keys):
+    if 'session_key' in values:
+        target = keys.get(values.pop('session_key'))
+        if target is None or target[0] != 'session':
+            raise EditError('session_key에 해당하는 세션이 없습니다.')
+        session_id = target[1]
+    else:
+        session_id = values.pop('session_id')
+    session = db.session.get(WorkoutSession, session_id) if isinstance(session_id, int) else None
+    if session is None or session.user_id != user_id:
+        raise EditError(f'세션을 찾을 수 없습니다: {session_id}')
+    workout_edits.apply(session, workout_edits.Edit(inserts=[values]))
+    return session.records[-1].id
+
+
+def _create_weight(user_id, values):
+    record = WeightRecord(user_id=user_id, **values)
+    db.session.add(record)
+    db.session.flush()
+    return record.id
+
+
+def apply_batch(user_id, parsed):
+    """parse_batch() 결과를 반영하고 항목별 결과 목록을 돌려준다. 커밋은 호출한 쪽에서 한다.
+
+    결과: {'key', 'type', 'status': created | duplicate | error, 'id' 또는 'error'}
+    """
+    keys = {
+        row.key: (row.item_type, row.entity_id)
+        for row in SyncKey.query.filter(
+            SyncKey.user_id == user_id,
+            SyncKey.key.in_({key for key, _, _ in parsed if key is not None})
+        )
+    }
+
+    results = []
+    for key, item_type, values in parsed:
+        result = {'key': key, 'type': item_type}
+        if key in keys:
+            if keys[key][0] == item_type:
+                result.update(status='duplicate', id=keys[key][1])
+            else:
+                result.update(status='error', error='다른 종류의 항목에 이미 쓴 key입니다.')
+        elif isinstance(values, EditError):
+            result.update(status='error', error=str(values))
+        else:
+            try:
+                if item_type == 'session':
+                    entity_id = _create_session(user_id, values)
+                elif item_type == 'record':
+                    entity_id = _create_record(user_id, values, keys)
+                else:
+                    entity_id = _create_weight(user_id, values)
+            except EditError as e:
+                result.update(status='error', error=str(e))
+            else:
+                db.session.add(SyncKey(user_id=user_id, key=key, item_type=item_type, entity_id=entity_id))
+                keys[key] = (item_type, entity_id)
+                result.update(status='created', id=entity_id)
+        results.append(result)
+    return results
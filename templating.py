@@ -0,0 +1,92 @@
+"""
+템플릿 조각 캐시와 미리 컴파일
+
+- 조각 캐시: 템플릿에서 비싼 블록을 {% fragment %}로 감싸면 렌더링한 HTML을 저장해 두고 다시 쓴다.
+
+      {% fragment 'workout-session', session.id, scopes=('workouts', 'exercises') %}
+          ...
+      {% endfragment %}
+
+  키는 (조각 이름과 키 값, 사용자, scope별 데이터 버전)이다. 데이터 버전은 응답 캐시(cache.py)와
+  같아서 쓰기 라우트가 cache.invalidate()로 버전을 올리면 다음 렌더링에서 새로 만든다. 날짜에 따라
+  달라지는 조각은 today()를 키 값에 넣는다. RESPONSE_CACHE_BACKEND가 null이면 조각 캐시도 꺼진다.
+  데이터 버전은 워커끼리 공유되므로 조각 저장소가 워커별 LRU여도 다른 워커의 쓰기 뒤에 옛 조각을 쓰지 않는다.
+  조각은 뷰 함수의 계산은 건너뛰지 못하고 렌더링만 아끼므로, 렌더링 자체가 비싼 블록(세션 카드처럼
+  행마다 반복되는 큰 마크업)에만 쓴다.
+- 미리 컴파일: TEMPLATE_PRECOMPILE을 켜면 앱을 만들 때 모든 템플릿을 컴파일해 Jinja 캐시에 올려 두어,
+  워커가 (max_requests로 교체된 뒤에도) 첫 요청에서 컴파일 비용을 내지 않는다.
+  TEMPLATE_BYTECODE_DIR를 지정하면 컴파일 결과를 파일로 남겨 다른 워커와 재시작에서 다시 쓴다.
+"""
+
+import os
+
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+import cache
+from tenancy import current_user_id
+
+
+class FragmentCacheExtension(Extension):
+    """{% fragment 이름, 키 값..., scopes=(...) %} ... {% endfragment %} 태그"""
+
+    tags = {'fragment'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        scopes = nodes.Tuple([], 'load')
+        while parser.stream.skip_if('comma'):
+            if parser.stream.current.test('name:scopes') and parser.stream.look().test('assign'):
+                parser.stream.skip(2)
+                scopes = parser.parse_expression()
+            else:
+                parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endfragment',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(parts), scopes])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, scopes, caller):
+        store = current_app.extensions['fragment_cache']
+        user_id = current_user_id()
+        versions = cache.get_cache().versions(scopes, user_id)
+        key = f'fragment:{":".join(map(str, parts))}:{user_id}:{versions}'
+        html = store.get(key)
+        if html is None:
+            html = caller()
+            store.set(key, str(html), current_app.config['RESPONSE_CACHE_TIMEOUT'])
+        return Markup(html)
+
+
+def _create_store(app):
+    backend = app.extensions['response_cache'].backend
+    if isinstance(backend, cache.LRUBackend):
+        # 조각이 차트 API 응답을 밀어내지 않도록 프로세스 내 LRU는 따로 둔다
+        return cache.LRUBackend(app.config['TEMPLATE_FRAGMENT_MAX_ENTRIES'])
+    return backend  # 공유/null 백엔드는 응답 캐시와 함께 씀 (키 접두사로 구분)
+
+
+def precompile(app):
+    """모든 템플릿을 컴파일해 Jinja 캐시에 올리고 템플릿 수를 돌려준다"""
+    names = app.jinja_env.list_templates(extensions=('html',))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def init_app(app):
+    """cache.init_app() 다음에 호출한다"""
+    app.config.setdefault('TEMPLATE_PRECOMPILE', False)
+    app.config.setdefault('TEMPLATE_BYTECODE_DIR', None)
+    app.config.setdefault('TEMPLATE_FRAGMENT_MAX_ENTRIES', 1024)
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.extensions['fragment_cache'] = _create_store(app)
+
+    if app.config['TEMPLATE_BYTECODE_DIR']:
+        os.makedirs(app.config['TEMPLATE_BYTECODE_DIR'], exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(app.config['TEMPLATE_BYTECODE_DIR'])
+    if app.config['TEMPLATE_PRECOMPILE']:
+        precompile(app)
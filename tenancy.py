@@ -0,0 +1,85 @@
+"""
+사용자(테넌트) 범위와 샤딩
+
+요청마다 현재 사용자 id를 정해 g에 두고 (로그인 세션 → DEFAULT_USER_ID 순서),
+사용자 데이터를 읽고 쓰는 쿼리는 모두 current_user_id()로 거른다.
+
+샤딩(선택): USER_SHARDS에 SQLALCHEMY_BINDS 키 목록을 주면 사용자마다 그중 하나를 골라
+(기본 user_id % 샤드 수, SHARD_RESOLVER로 바꿀 수 있음) 그 사용자 요청의 모든 쿼리를
+해당 DB(SQLite 파일 또는 Postgres 스키마별 주소)로 보낸다. 샤드는 서로 독립된 전체 스키마를
+가지며 운동 종목, 사용자 행도 샤드마다 따로 둔다. 사용자 id는 샤드를 고르는 키이므로
+샤드끼리 겹치지 않게 발급해야 한다.
+"""
+
+from flask import current_app, g, has_app_context, session
+from flask_sqlalchemy.session import Session
+
+
+def shard_for_user(user_id):
+    """사용자 데이터가 있는 바인드 키 (샤딩을 쓰지 않으면 None = 기본 DB)"""
+    shards = current_app.config.get('USER_SHARDS')
+    if not shards:
+        return None
+    resolver = current_app.config.get('SHARD_RESOLVER')
+    if resolver is not None:
+        return resolver(user_id)
+    return shards[user_id % len(shards)]
+
+
+def shard_keys():
+    """마이그레이션/집계 재구성을 돌릴 바인드 키 목록 (기본 DB는 None)"""
+    return [None] + list(current_app.config.get('USER_SHARDS') or [])
+
+
+def use_user(user_id):
+    """이후 쿼리를 user_id 사용자 범위로 (그리고 그 사용자의 샤드로) 보낸다
+
+    요청 밖(CLI, 벤치마크)에서는 app context 안에서 직접 호출한다.
+    """
+    g.user_id = user_id
+    g.shard = shard_for_user(user_id)
+
+
+def use_shard(key):
+    """사용자와 상관없이 특정 샤드 전체를 대상으로 쿼리할 때 (집계 재구성 등)"""
+    g.pop('user_id', None)
+    g.shard = key
+
+
+def current_user_id():
+    """현재 요청(또는 use_user로 지정한) 사용자 id"""
+    if 'user_id' not in g:
+        use_user(current_app.config['DEFAULT_USER_ID'])
+    return g.user_id
+
+
+def login(user_id):
+    """로그인 세션에 사용자를 기록하고 이번 요청부터 그 사용자로 전환한다"""
+    session['user_id'] = user_id
+    use_user(user_id)
+
+
+def _load_user():
+    use_user(session.get('user_id') or current_app.config['DEFAULT_USER_ID'])
+
+
+class TenantSession(Session):
+    """g.shard가 정해져 있으면 모든 쿼리를 그 샤드 엔진으로 보내는 세션"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            shard = g.get('shard')
+            if shard is not None:
+                return self._db.engines[shard]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_app(app):
+    app.config.setdefault('DEFAULT_USER_ID', 1)
+    app.config.setdefault('USER_SWITCH_ENABLED', False)
+    app.config.setdefault('USER_SHARDS', [])
+    app.config.setdefault('SHARD_RESOLVER', None)
+    unknown = [key for key in app.config['USER_SHARDS'] if key not in (app.config.get('SQLALCHEMY_BINDS') or {})]
+    if unknown:
+        raise RuntimeError(f'USER_SHARDS에 SQLALCHEMY_BINDS에 없는 키가 있습니다: {", ".join(unknown)}')
+    app.before_request(_load_user)
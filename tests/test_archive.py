@@ -0,0 +1,66 @@
+"""
+운동 기록 보관(archive.py) 테스트
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import archive
+import migrations
+from models import db, Exercise, WorkoutArchive, WorkoutRecord, WorkoutSession
+from run import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}'})
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        yield app
+        db.session.remove()
+
+
+def _add_session(day):
+    exercise = Exercise.query.first() or Exercise(name='스쿼트', body_part='하체', difficulty='중급')
+    session = WorkoutSession(user_id=1, date=day, total_duration=40)
+    session.records.append(WorkoutRecord(exercise=exercise, sets=3, reps=5, weight=100, duration=0, distance=0))
+    db.session.add(session)
+    db.session.commit()
+    return session.id, session.records[0].id
+
+
+def test_restore_keeps_original_ids(app):
+    # 가장 큰 id의 세션을 보관한 뒤 새로 만든 세션이 그 id를 다시 쓰면 복원할 때 id가 바뀐다
+    archived = _add_session(date(2023, 1, 10))
+    archive.archive(date(2024, 1, 1))
+    assert WorkoutSession.query.count() == 0
+
+    hot = _add_session(date(2024, 2, 1))
+    assert hot[0] > archived[0] and hot[1] > archived[1]
+
+    moved = archive.restore()
+    assert (moved.sessions, moved.records) == (1, 1)
+    assert WorkoutArchive.query.count() == 0
+    restored = db.session.get(WorkoutSession, archived[0])
+    assert restored.date == date(2023, 1, 10)
+    assert [record.id for record in restored.records] == [archived[1]]
+
+
+def test_restore_reports_id_conflict(app):
+    session_id, _ = _add_session(date(2023, 1, 10))
+    archive.archive(date(2024, 1, 1))
+    # 마이그레이션 13 전에 SQLite가 보관한 id를 다시 쓴 경우
+    db.session.add(WorkoutSession(id=session_id, user_id=1, date=date(2024, 2, 1)))
+    db.session.commit()
+
+    with pytest.raises(archive.IdConflict):
+        archive.restore()
+    assert WorkoutArchive.query.count() == 1  # 묶음은 그대로 남는다
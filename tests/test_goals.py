@@ -0,0 +1,67 @@
+"""
+목표 진행률(goal_engine.py) 테스트
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+from models import db, Goal
+from run import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}'})
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        yield app
+        db.session.remove()
+
+
+def _writes(app, path):
+    """GET path가 실행한 INSERT/UPDATE/DELETE와 커밋 수"""
+    writes = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            writes.append(statement)
+
+    def record_commit(conn):
+        writes.append('COMMIT')
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    event.listen(engine, 'commit', record_commit)
+    try:
+        assert app.test_client().get(path).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+        event.remove(engine, 'commit', record_commit)
+    return len(writes)
+
+
+@pytest.mark.parametrize('path', ['/goals', '/dashboard'])
+def test_read_saves_only_period_rollover(app, path):
+    goal = Goal(user_id=1, title='주 3회', target_value=3, unit='회', goal_type='weekly', metric='sessions',
+                period_start=date.today() - timedelta(days=14))
+    db.session.add(goal)
+    db.session.commit()
+
+    # 기간이 바뀐 첫 조회만 목표를 이번 주로 넘겨 저장한다 (기간마다 한 번이라 쿼리 예산에서 뺌)
+    app.config['QUERY_BUDGET_ENFORCE'] = False
+    assert _writes(app, path) > 0
+    app.config['QUERY_BUDGET_ENFORCE'] = True
+    db.session.expire_all()
+    assert db.session.get(Goal, goal.id).period_start == date.today() - timedelta(days=date.today().weekday())
+
+    assert _writes(app, path) == 0  # 이미 이번 기간이면 조회만
@@ -0,0 +1,47 @@
+"""
+운동 기록 히스토리(history.py) 테스트
+
+    python -m pytest tests
+"""
+
+import json
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+from history import session_records
+from models import db, Exercise, WorkoutRecord, WorkoutSession
+from run import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}'})
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        yield app
+        db.session.remove()
+
+
+def test_records_of_deleted_exercise(app):
+    squat = Exercise(name='스쿼트', body_part='하체', difficulty='중급')
+    deleted = Exercise(name='없어질 운동', body_part='전신', difficulty='초급')
+    session = WorkoutSession(user_id=1, date=date(2024, 1, 31), total_duration=40)
+    session.records.append(WorkoutRecord(exercise=squat, sets=3, reps=5, weight=100, duration=0, distance=0))
+    session.records.append(WorkoutRecord(exercise=deleted, sets=1, reps=10, weight=0, duration=5, distance=0))
+    db.session.add(session)
+    db.session.commit()
+    db.session.execute(db.delete(Exercise).where(Exercise.id == deleted.id))
+    db.session.commit()
+
+    records = session_records([session.id])[session.id]
+    assert [(record.name, record.body_part) for record in records] == [('스쿼트', '하체'), (None, None)]
+
+    lines = app.test_client().get('/api/workouts').get_data(as_text=True).splitlines()
+    assert [record['exercise'] for record in json.loads(lines[0])['records']] == ['스쿼트', None]
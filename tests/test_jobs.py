@@ -0,0 +1,63 @@
+"""
+백그라운드 작업(jobs.py) 테스트
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs
+import migrations
+from models import db
+from run import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'JOB_FILES_DIR': str(tmp_path / 'jobs'),
+    })
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        yield app
+        db.session.remove()
+
+
+def _age(name, seconds):
+    path = os.path.join(jobs.files_dir(), name)
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_expired_export_file_is_swept(app):
+    client = app.test_client()
+    response = client.post('/api/export/records?format=csv')
+    assert response.status_code == 202
+    jobs.run_pending()
+    download = response.headers['Location'] + '/download'
+    assert client.get(download).status_code == 200
+
+    name = client.get(response.headers['Location']).json['result']['file']
+    assert jobs.sweep_files() == 0  # 보관 기간 안의 파일은 남긴다
+    _age(name, app.config['JOB_FILE_TTL'] + 1)
+    assert jobs.sweep_files() == 1
+    assert not os.path.exists(os.path.join(jobs.files_dir(), name))
+    assert client.get(download).status_code == 410
+
+
+def test_sweep_keeps_pending_inputs(app):
+    for name in ('input-queued', 'input-stale.part'):
+        open(os.path.join(jobs.files_dir(), name), 'wb').close()
+        _age(name, app.config['JOB_FILE_TTL'] + 1)
+
+    # 아직 실행되지 않은 작업의 입력은 작업이 끝날 때 지우고, 쓰다 만 업로드만 정리한다
+    assert jobs.sweep_files() == 1
+    assert os.listdir(jobs.files_dir()) == ['input-queued']
@@ -0,0 +1,94 @@
+"""
+일일 집계(rollups.py) 테스트
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+import migrations
+import rollups
+from models import db, DailyBodyPartRollup, DailyRollup, Exercise, WorkoutRecord, WorkoutSession
+from run import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app('testing', {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}'})
+    with app.app_context():
+        db.create_all()
+        migrations.upgrade()
+        yield app
+        db.session.remove()
+
+
+def _add_session(day=date(2024, 1, 31)):
+    exercise = Exercise(name='스쿼트', body_part='하체', difficulty='중급')
+    db.session.add(exercise)
+    db.session.flush()
+    session = WorkoutSession(user_id=1, date=day, total_duration=40)
+    session.records.append(WorkoutRecord(exercise_id=exercise.id, sets=3, reps=5, weight=100, duration=0, distance=0))
+    db.session.add(session)
+    db.session.flush()
+    rollups.add_session(session)
+    db.session.commit()
+    return session
+
+
+def test_remove_session_updates_rollups(app):
+    session = _add_session()
+    assert db.session.get(DailyRollup, (1, session.date)).volume == 1500
+
+    rollups.remove_session(session)
+    db.session.commit()
+    assert DailyRollup.query.count() == 0
+    assert DailyBodyPartRollup.query.count() == 0
+
+
+def test_remove_session_without_rollup_rows(app):
+    # 집계가 어긋나 행이 없어도 (직접 DB 수정, 중간에 멈춘 재구성) 세션을 지울 수 있어야 한다
+    session = _add_session()
+    DailyRollup.query.delete()
+    DailyBodyPartRollup.query.delete()
+    db.session.commit()
+
+    response = app.test_client().get(f'/workouts/delete/{session.id}')
+    assert response.status_code == 302
+    assert WorkoutSession.query.count() == 0
+    assert DailyRollup.query.count() == 0
+    assert DailyBodyPartRollup.query.count() == 0
+
+
+def test_move_body_part_without_rollup_rows(app):
+    session = _add_session()
+    exercise_id = session.records[0].exercise_id
+    DailyBodyPartRollup.query.delete()
+    db.session.commit()
+
+    rollups.move_exercise_body_part(exercise_id, '하체', '전신')
+    db.session.commit()
+    rows = DailyBodyPartRollup.query.all()
+    assert [(row.body_part, row.record_count) for row in rows] == [('전신', 1)]
+
+
+def test_rebuild_invalidates_cached_responses(app):
+    _add_session(date.today() - timedelta(days=1))  # 차트는 어제까지 7일
+    client = app.test_client()
+    assert client.get('/api/chart-data').json['data'][-1] == 40
+
+    # 집계가 어긋난 상태의 응답이 캐시되어 있어도 재구성 뒤에는 새 숫자를 보내야 한다
+    DailyRollup.query.delete()
+    db.session.commit()
+    cache.invalidate('workouts', user_id=1)
+    assert client.get('/api/chart-data').json['data'][-1] == 0
+
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups'])
+    assert result.exit_code == 0, result.output
+    assert client.get('/api/chart-data').json['data'][-1] == 40
@@ -0,0 +1,250 @@
+"""
+운동 세션 수정 (바뀐 기록만 반영)
+
+세션의 운동 기록을 모두 지우고 다시 넣는 대신, 제출된 기록을 기존 기록과 맞춰 보고
+값이 바뀐 행만 UPDATE, 새 행만 INSERT, 빠진 행만 DELETE 한다. 그래서 기록 id와 created_at이
+유지되고, 아무것도 바꾸지 않고 저장하면 쓰기가 없다. 일일 집계와 개인 기록도 날짜/운동 시간/
+기록이 바뀐 경우에만 차이를 반영한다.
+
+- 수정 폼(edit_workout): 세션의 전체 기록 목록을 받아 plan_records()로 차이를 구한다.
+- JSON PATCH(/api/workouts/<id>): parse_patch()로 언급된 필드와 기록만 바꾼다.
+"""
+
+from datetime import datetime
+
+import prs
+import rollups
+from models import db, Exercise, WorkoutRecord
+
+RECORD_FIELDS = ('exercise_id', 'sets', 'reps', 'weight', 'duration', 'distance')
+SESSION_FIELDS = ('date', 'total_duration', 'notes')
+
+# JSON으로 받을 때 필드별 타입 (None 허용 여부)
+_INT_FIELDS = {'exercise_id': False, 'sets': False, 'reps': False, 'duration': True}
+_FLOAT_FIELDS = {'weight': True, 'distance': True}
+# 새 기록에서 비워 두면 0으로 저장하는 필드 (폼으로 추가한 기록과 같게, 집계가 NULL을 더하지 않도록)
+_ZERO_DEFAULTS = {'duration': 0, 'distance': 0.0}
+
+
+class EditError(ValueError):
+    """잘못된 수정 요청 (메시지는 사용자에게 그대로 보여줌)"""
+
+
+class Edit:
+    """세션 하나에 적용할 변경 내용"""
+
+    def __init__(self, fields=None, updates=None, inserts=None, deletes=None):
+        self.fields = fields or {}  # 세션 컬럼 → 새 값
+        self.updates = updates or []  # (기존 기록, {컬럼: 새 값})
+        self.inserts = inserts or []  # 새 기록 값 dict
+        self.deletes = deletes or []  # 지울 기존 기록
+
+    def __bool__(self):
+        return bool(self.fields or self.updates or self.inserts or self.deletes)
+
+
+def _values(record):
+    return tuple(getattr(record, field) for field in RECORD_FIELDS)
+
+
+def _changes(record, values):
+    return {field: value for field, value in values.items() if getattr(record, field) != value}
+
+
+def plan_records(existing, submitted):
+    """기존 기록과 제출된 전체 기록 목록 → Edit (기록 부분만)
+
+    submitted는 RECORD_FIELDS 값과 선택적인 'id'를 가진 dict 목록이다. 맞추는 순서:
+    1. id가 있으면 같은 id의 기존 기록
+    2. id가 없으면 값이 모두 같은 남은 기존 기록 (id를 보내지 않는 클라이언트도 쓰기가 없도록)
+    3. 그래도 남으면 같은 종목의 남은 기존 기록과 순서대로 짝지어 바뀐 값만 UPDATE
+    짝이 없는 제출 기록은 INSERT, 어느 제출 기록과도 짝이 안 된 기존 기록은 DELETE 한다.
+    """
+    remaining = {record.id: record for record in existing}
+    edit = Edit()
+    unmatched = []
+
+    for values in submitted:
+        record_id = values.get('id')
+        if record_id is not None:
+            record = remaining.pop(record_id, None)
+            if record is None:
+                raise EditError(f'이 세션에 없는 운동 기록입니다: {record_id}')
+            _plan_update(edit, record, values)
+        else:
+            unmatched.append(values)
+
+    by_values = {}
+    for record in remaining.values():
+        by_values.setdefault(_values(record), []).append(record)
+    leftovers = []
+    for values in unmatched:
+        same = by_values.get(tuple(values[field] for field in RECORD_FIELDS))
+        if same:
+            del remaining[same.pop(0).id]
+        else:
+            leftovers.append(values)
+
+    for values in leftovers:
+        record = next((r for r in remaining.values() if r.exercise_id == values['exercise_id']), None)
+        if record is None:
+            edit.inserts.append({field: values[field] for field in RECORD_FIELDS})
+        else:
+            del remaining[record.id]
+            _plan_update(edit, record, values)
+
+    edit.deletes.extend(remaining.values())
+    return edit
+
+
+def _plan_update(edit, record, values):
+    changes = _changes(record, {field: values[field] for field in RECORD_FIELDS if field in values})
+    if changes:
+        edit.updates.append((record, changes))
+
+
+def plan_session(session, values):
+    """세션 컬럼 중 값이 바뀐 것만"""
+    return {field: value for field, value in values.items() if getattr(session, field) != value}
+
+
+def parse_patch(session, body):
+    """JSON PATCH 본문 → Edit
+
+    {"date": "2024-01-31", "total_duration": 60, "notes": "...",
+     "records": [{"id": 3, "reps": 8}, {"id": 4, "delete": true}, {"exercise_id": 2, "sets": 3, "reps": 10}]}
+    세션 필드는 보낸 것만 바꾸고, records의 항목은 id가 있으면 그 기록의 보낸 필드만 바꾸거나
+    (delete가 참이면) 지우며, id가 없으면 새 기록으로 추가한다. 언급하지 않은 기록은 그대로 둔다.
+    """
+    if not isinstance(body, dict):
+        raise EditError('JSON 객체를 보내야 합니다.')
+    unknown = set(body) - set(SESSION_FIELDS) - {'records'}
+    if unknown:
+        raise EditError(f'알 수 없는 필드입니다: {", ".join(sorted(unknown))}')
+
+    values = {}
+    if 'date' in body:
+        values['date'] = parse_date(body['date'])
+    if 'total_duration' in body:
+        values['total_duration'] = number(body, 'total_duration', int, nullable=True)
+    if 'notes' in body:
+        values['notes'] = parse_notes(body['notes'])
+    edit = Edit(fields=plan_session(session, values))
+
+    items = body.get('records', [])
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise EditError('records는 객체 목록이어야 합니다.')
+    existing = {record.id: record for record in session.records}
+    seen = set()
+    for item in items:
+        record_id = item.get('id')
+        if record_id is None:
+            edit.inserts.append(parse_record(item, allowed=('id', 'delete')))
+            continue
+        fields = parse_record(item, new=False, allowed=('id', 'delete'))
+        record = existing.get(record_id)
+        if record is None:
+            raise EditError(f'이 세션에 없는 운동 기록입니다: {record_id}')
+        if record_id in seen:
+            raise EditError(f'같은 운동 기록이 두 번 있습니다: {record_id}')
+        seen.add(record_id)
+        if item.get('delete'):
+            edit.deletes.append(record)
+        else:
+            _plan_update(edit, record, fields)
+
+    exercise_ids = {values['exercise_id'] for values in edit.inserts}
+    exercise_ids |= {changes['exercise_id'] for _, changes in edit.updates if 'exercise_id' in changes}
+    check_exercises(exercise_ids)
+    return edit
+
+
+def parse_date(value, field='date'):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise EditError(f'{field}는 YYYY-MM-DD 형식이어야 합니다.')
+
+
+def parse_notes(value, field='notes'):
+    if value is not None and not isinstance(value, str):
+        raise EditError(f'{field}는 문자열이어야 합니다.')
+    return value
+
+
+def parse_record(item, new=True, allowed=()):
+    """JSON 운동 기록 항목 → 검사한 컬럼 값 dict
+
+    new면 필수 필드(exercise_id, sets, reps)를 확인하고 보내지 않은 선택 필드는 None으로 채운다
+    (운동 시간/거리는 보내지 않거나 null이면 0).
+    아니면 보낸 필드만 돌려준다. allowed는 기록 필드 외에 있어도 되는 키다.
+    """
+    unknown = set(item) - set(RECORD_FIELDS) - set(allowed)
+    if unknown:
+        raise EditError(f'알 수 없는 운동 기록 필드입니다: {", ".join(sorted(unknown))}')
+    fields = {field: number(item, field, int, nullable) for field, nullable in _INT_FIELDS.items() if field in item}
+    fields.update({field: number(item, field, float, nullable)
+                   for field, nullable in _FLOAT_FIELDS.items() if field in item})
+    if not new:
+        return fields
+    missing = [field for field in ('exercise_id', 'sets', 'reps') if field not in fields]
+    if missing:
+        raise EditError(f'새 운동 기록에 필요한 필드가 없습니다: {", ".join(missing)}')
+    values = {field: fields.get(field) for field in RECORD_FIELDS}
+    values.update({field: zero for field, zero in _ZERO_DEFAULTS.items() if values[field] is None})
+    return values
+
+
+def number(values, field, kind, nullable=False):
+    """values[field]를 0 이상의 int/float로 검사한다 (nullable이면 None 허용)"""
+    value = values[field]
+    if value is None and nullable:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or (kind is int and value != int(value)):
+        raise EditError(f'{field}는 {"정수" if kind is int else "숫자"}여야 합니다.')
+    if value < 0:
+        raise EditError(f'{field}는 0 이상이어야 합니다.')
+    return kind(value)
+
+
+def check_exercises(exercise_ids):
+    """없는 운동 종목 id가 있으면 EditError"""
+    if not exercise_ids:
+        return
+    found = {row.id for row in db.session.query(Exercise.id).filter(Exercise.id.in_(exercise_ids))}
+    missing = set(exercise_ids) - found
+    if missing:
+        raise EditError(f'없는 운동 종목입니다: {", ".join(map(str, sorted(missing)))}')
+
+
+def apply(session, edit):
+    """변경 내용을 반영한다 (집계/개인 기록 포함). 커밋은 호출한 쪽에서 한다.
+
+    반영한 행 수를 {'updated', 'inserted', 'deleted'}로 돌려준다.
+    """
+    counts = {'updated': len(edit.updates), 'inserted': len(edit.inserts), 'deleted': len(edit.deletes)}
+    if not edit:
+        return counts
+
+    # 날짜/운동 시간/기록이 바뀔 때만 집계와 개인 기록을 건드림 (메모만 바꾸면 세션 UPDATE 하나)
+    derived = bool(edit.updates or edit.inserts or edit.deletes or set(edit.fields) & {'date', 'total_duration'})
+    if derived:
+        before = rollups.snapshot(session)
+        old_lifts = prs.lifts(session, session.records)
+
+    for field, value in edit.fields.items():
+        setattr(session, field, value)
+    for record, changes in edit.updates:
+        for field, value in changes.items():
+            setattr(record, field, value)
+    for record in edit.deletes:
+        session.records.remove(record)
+        db.session.delete(record)
+    for values in edit.inserts:
+        session.records.append(WorkoutRecord(**values))
+    db.session.flush()
+
+    if derived:
+        rollups.update_session(before, session)
+        prs.apply_diff(session.user_id, old_lifts, prs.lifts(session, session.records))
+    return counts